@@ -0,0 +1,72 @@
+# Compiles ida-module/ht68fb560.json into ht68regs.py, so that the IDA
+# module (and anything else) can get at the register definitions and
+# the per-bank names without parsing JSON and walking every register
+# for every bank each time.
+#
+# Rerun this after editing the JSON file:
+#   $ python gen-ht68regs.py
+
+import json
+import os
+import sys
+
+BANK_COUNT = 6
+
+HEADER = '''# Holtek HT68FB560 register definitions
+# Generated from ida-module/ht68fb560.json by gen-ht68regs.py; edit the
+# JSON file and rerun that instead of changing this file by hand.
+
+BANK_COUNT = %d
+
+'''
+
+
+def generate(reg_defs, out):
+	out.write(HEADER % BANK_COUNT)
+
+	out.write('# one entry per data memory address, as in the JSON file\n')
+	out.write('REG_DEFS = [\n')
+	for reg in reg_defs:
+		if reg is None:
+			out.write('\tNone,\n')
+			continue
+		fields = ['%r: %r' % ('name', str(reg['name'])), '%r: %r' % ('comment', str(reg['comment']))]
+		if 'banks' in reg:
+			fields.append('%r: %r' % ('banks', list(reg['banks'])))
+		if 'bits' in reg:
+			fields.append('%r: %r' % ('bits', [str(b) if b else None for b in reg['bits']]))
+		out.write('\t{%s},\n' % ', '.join(fields))
+	out.write(']\n\n')
+
+	out.write('# register name -> address\n')
+	out.write('REG_ADDRS = {\n')
+	for addr, reg in enumerate(reg_defs):
+		if reg:
+			out.write('\t%r: 0x%02X,\n' % (str(reg['name']), addr))
+	out.write('}\n\n')
+
+	out.write('# (offset into RAM, name, comment) for every register in every bank\n')
+	out.write('BANK_NAMES = [\n')
+	for bank in range(BANK_COUNT):
+		for addr, reg in enumerate(reg_defs):
+			if reg and ('banks' not in reg or bank in reg['banks']):
+				out.write('\t(0x%03X, %r, %r),\n' % (
+					bank * 0x100 + addr, 'B%d:%s' % (bank, reg['name']), str(reg['comment'])))
+	out.write(']\n\n')
+
+	out.write('# (address, enum name, [(bit, member name), ...]) for registers with named bits\n')
+	out.write('BIT_ENUMS = [\n')
+	for addr, reg in enumerate(reg_defs):
+		if reg and 'bits' in reg:
+			members = [(bit, '%s:%s' % (reg['name'], name)) for bit, name in enumerate(reg['bits']) if name]
+			out.write('\t(0x%02X, %r, %r),\n' % (addr, 'bit_' + str(reg['name']), members))
+	out.write(']\n')
+
+
+if __name__ == '__main__':
+	here = os.path.dirname(os.path.abspath(__file__))
+	with open(os.path.join(here, 'ida-module', 'ht68fb560.json'), 'r') as f:
+		reg_defs = json.load(f)
+	with open(os.path.join(here, 'ht68regs.py'), 'w') as out:
+		generate(reg_defs, out)
+	print('wrote ht68regs.py', file=sys.stderr)
@@ -0,0 +1,302 @@
+# Benchmarks and cross-checks the two HT68 decoders: HoltekMCU (driven
+# by the vendor .fmt file, used by ht68-disasm.py) and the IDA processor
+# module (driven by INSN_DEFS in ht68dec.py). The IDA module is loaded
+# outside IDA with just enough of the ida_* API stubbed out to run its
+# instruction analysis.
+#
+# Every one of the 65536 opcodes is put through both decoders, and any
+# disagreement on the mnemonic or the operands is reported. Throughput is
+# measured over a whole image (every opcode once, by default) and can be
+# recorded as a baseline; a later run that's much slower than the
+# baseline, or any decoder mismatch, makes the run fail.
+#
+# It also checks that incremental listings (ht68incr) come out the same
+# as listings made from scratch, for edits known to have caused trouble.
+
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import types
+
+from ht68flow import read_opcodes
+from ht68incr import IncrementalListing
+from ht68mcu import *
+
+IDA_MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ida-module', 'ht68fb560.py')
+
+# operand types from the IDA SDK
+o_void = 0
+o_reg = 1
+o_mem = 2
+o_imm = 5
+o_near = 7
+
+
+class StubOperand(object):
+	def __init__(self):
+		self.type = o_void
+		self.dtype = 0
+		self.reg = 0
+		self.addr = 0
+		self.value = 0
+
+
+class StubInsn(object):
+	def __init__(self, ea):
+		self.ea = ea
+		self.size = 0
+		self.itype = 0
+		self.Op1 = StubOperand()
+		self.Op2 = StubOperand()
+
+
+def load_ida_module(read_word):
+	# import the processor module with fake ida_* modules; read_word(ea)
+	# supplies the database contents (or None where nothing is mapped)
+	class processor_t(object):
+		def __init__(self):
+			pass
+
+	class IDB_Hooks(object):
+		def __init__(self):
+			pass
+		def hook(self):
+			pass
+		def unhook(self):
+			pass
+
+	class netnode(object):
+		def create(self, name):
+			pass
+
+	procs_dir = os.path.join(tempfile.gettempdir(), 'ht68-bench')
+	stubs = {
+		'processor_t': processor_t, 'IDB_Hooks': IDB_Hooks, 'netnode': netnode,
+		'get_user_idadir': lambda: procs_dir,
+		'is_mapped': lambda ea: read_word(ea) is not None,
+		'get_wide_byte': read_word,
+		'CF_STOP': 0x0001, 'CF_CALL': 0x0002, 'CF_CHG1': 0x0004, 'CF_CHG2': 0x0008,
+		'CF_USE1': 0x0100, 'CF_USE2': 0x0200, 'CF_JUMP': 0x4000,
+		'AS_COLON': 0x0002, 'AS_N2CHR': 0x0200,
+		'o_void': o_void, 'o_reg': o_reg, 'o_mem': o_mem, 'o_imm': o_imm, 'o_near': o_near,
+		'dt_byte': 0,
+	}
+	for name in ('ida_bytes', 'ida_diskio', 'ida_enum', 'ida_ua', 'ida_idp', 'ida_auto', 'ida_nalt',
+			'ida_frame', 'ida_funcs', 'ida_lines', 'ida_problems', 'ida_offset', 'ida_segment',
+			'ida_name', 'ida_netnode', 'ida_ida'):
+		module = types.ModuleType(name)
+		module.__dict__.update(stubs)
+		sys.modules[name] = module
+
+	module = types.ModuleType('ht68fb560')
+	module.__file__ = IDA_MODULE_PATH
+	with open(IDA_MODULE_PATH, 'r') as f:
+		code = compile(f.read(), IDA_MODULE_PATH, 'exec')
+	exec(code, module.__dict__)
+
+	proc = module.PROCESSOR_ENTRY()
+	proc.notify_init(None)
+	proc.ram_addr = 0x10000
+	return module, proc
+
+
+def ida_operands(proc, insn):
+	# (mnemonic, operands) as the IDA module sees an instruction, in
+	# the same terms as cli_operands
+	operands = []
+	for op in (insn.Op1, insn.Op2):
+		if op.type == o_reg:
+			operands.append('A')
+		elif op.type == o_mem:
+			operands.append((1, op.addr - proc.ram_addr))
+		elif op.type == o_imm:
+			operands.append((2, op.value))
+		elif op.type == o_near:
+			operands.append((3, op.addr))
+	if len(operands) == 2 and operands[0][0] == 1 and operands[1][0] == 2 and \
+			INSN_DEFS[insn.itype][IDEF_OP_TYPE] == HTOP_BIT:
+		operands = [(4, (operands[0][1], operands[1][1]))]
+	return (proc.instruc[insn.itype]['name'].lower(), operands)
+
+
+def cli_operands(mcu, opcode):
+	mnem = mcu.find_mnemonic(opcode)
+	data, imm, addr, bit = operand_fields(opcode)
+	values = {1: data, 2: imm, 3: addr, 4: (data, bit)}
+	operands = []
+	for arg in mnem[3]:
+		if isinstance(arg, tuple) and arg[0] == 'operand':
+			operands.append((arg[1], values.get(arg[1])))
+		else:
+			operands.append(arg.upper())
+	return (mnem[2].lower(), operands)
+
+
+def compare_decoders(mcu):
+	# returns a list of (opcode, what HoltekMCU says, what the IDA module
+	# says) for every opcode they disagree on; None means undecodable
+	module, proc = load_ida_module(lambda ea: ea if 0 <= ea < 0x10000 else None)
+	mismatches = []
+	for opcode in range(0x10000):
+		cli = cli_operands(mcu, opcode) if mcu.dispatch_index[opcode] >= 0 else None
+		insn = StubInsn(opcode)
+		ida = ida_operands(proc, insn) if proc.notify_ana(insn) else None
+		if cli != ida:
+			mismatches.append((opcode, cli, ida))
+	return mismatches
+
+
+def call_word(target):
+	return 0x2000 | (target & 0x7FF) | ((target & 0x1800) << 3)
+
+
+# (image size in words, {address: opcode} edits); the image starts out
+# as a call to 0008h, then a 'ret' there
+INCREMENTAL_CASES = [
+	# a call past the end of the image gets a label but has no line
+	(0x200, {0x08: call_word(0x1000)}),
+]
+
+def check_incremental(mcu):
+	# returns descriptions of the cases where updating an incremental
+	# listing doesn't give what a fresh one does
+	failures = []
+	for size, edits in INCREMENTAL_CASES:
+		before = [0] * size
+		before[0] = call_word(0x08)
+		before[0x08] = 0x0003
+		after = list(before)
+		for addr, opcode in edits.items():
+			after[addr] = opcode
+		data = struct.pack('<%dH' % size, *after)
+
+		for analyze in (False, True):
+			case = '%d words, edits %s, analyze=%s' % (size,
+				', '.join('%04X=%04X' % edit for edit in sorted(edits.items())), analyze)
+			fresh = IncrementalListing(mcu, analyze)
+			fresh.update(data)
+			listing = IncrementalListing(mcu, analyze)
+			listing.update(struct.pack('<%dH' % size, *before))
+			try:
+				listing.update(data)
+			except Exception as e:
+				failures.append('%s: %s: %s' % (case, type(e).__name__, e))
+				continue
+			if listing.lines != fresh.lines:
+				failures.append(case)
+	return failures
+
+
+def best_time(func, repeat):
+	best = None
+	for i in range(repeat):
+		began = time.perf_counter()
+		func()
+		elapsed = time.perf_counter() - began
+		if best is None or elapsed < best:
+			best = elapsed
+	return best
+
+
+def run_benchmarks(mcu, opcodes, repeat):
+	# returns {benchmark name: words per second}
+	words = len(opcodes)
+	image = struct.pack('<%dH' % words, *opcodes)
+	module, proc = load_ida_module(lambda ea: opcodes[ea] if 0 <= ea < words else None)
+
+	def cli_disasm():
+		disasm = mcu.disasm
+		for opcode in opcodes:
+			disasm(opcode)
+
+	def ida_itype():
+		get_itype = module.get_itype_for_opcode
+		for opcode in opcodes:
+			get_itype(opcode)
+
+	def ida_ana():
+		proc.decode_cache = {}
+		ana = proc.notify_ana
+		for ea in range(words):
+			ana(StubInsn(ea))
+
+	benches = [
+		('cli_disasm', cli_disasm),
+		('ida_get_itype_for_opcode', ida_itype),
+		('ida_notify_ana', ida_ana),
+	]
+	if np is not None:
+		benches.append(('cli_disasm_image', lambda: mcu.disasm_image(image)))
+
+	results = {}
+	for name, func in benches:
+		results[name] = words / best_time(func, repeat)
+	return results
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Benchmark and cross-check the HT68 decoders.',
+		epilog='example: %(prog)s HT68FB560 --baseline bench.json --record')
+	parser.add_argument('mcu_name', help='MCU name, used to find vendor-data/<name>.fmt and .inc')
+	parser.add_argument('--image', default=None,
+		help='program image to time decoding on (default: every opcode once)')
+	parser.add_argument('--repeat', type=int, default=5,
+		help='time each benchmark this many times and keep the best (default: 5)')
+	parser.add_argument('--baseline', default=None,
+		help='JSON file of earlier results to compare against')
+	parser.add_argument('--record', action='store_true',
+		help='save these results as the new baseline')
+	parser.add_argument('--tolerance', type=float, default=0.2,
+		help='fail if anything is this much slower than the baseline (default: 0.2)')
+	args = parser.parse_args()
+	if args.record and not args.baseline:
+		parser.error('--record needs --baseline')
+
+	mcu = HoltekMCU.load(args.mcu_name)
+	failed = False
+
+	mismatches = compare_decoders(mcu)
+	for opcode, cli, ida in mismatches[:20]:
+		print('mismatch %04X: HoltekMCU %r, IDA module %r' % (opcode, cli, ida))
+	print('%d of 65536 opcodes decode differently' % len(mismatches))
+	if mismatches:
+		failed = True
+
+	for failure in check_incremental(mcu):
+		print('incremental listing differs: %s' % failure)
+		failed = True
+
+	opcodes = read_opcodes(args.image) if args.image else list(range(0x10000))
+	results = run_benchmarks(mcu, opcodes, args.repeat)
+
+	baseline = {}
+	if args.baseline and os.path.exists(args.baseline):
+		with open(args.baseline, 'r') as f:
+			baseline = json.load(f)
+
+	for name in sorted(results):
+		line = '%-28s %12.0f words/s' % (name, results[name])
+		if name in baseline:
+			ratio = results[name] / baseline[name]
+			line += '  (%.0f%% of baseline)' % (ratio * 100)
+			if ratio < 1 - args.tolerance:
+				line += '  REGRESSION'
+				failed = True
+		print(line)
+
+	if args.record:
+		with open(args.baseline, 'w') as f:
+			json.dump(results, f, indent=1, sort_keys=True)
+			f.write('\n')
+
+	if failed:
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -1,166 +1,450 @@
-import struct
+import time
+
+# taken before anything else is imported, for --stats
+STARTED = time.perf_counter()
+
+import argparse
+import concurrent.futures
+import json
+import os
 import sys
-from parsec import *
-
-whitespace = regex(r'\s*', re.MULTILINE)
-lexeme = lambda p: p << whitespace
-comma = lexeme(string(','))
-simple_token = lexeme(regex('[a-zA-Z0-9_]+'))
-
-decimal_number = lexeme(regex('[0-9]+')).parsecmap(int)
-hex_number = lexeme(regex('[0-9][0-9a-fA-F]*[hH]')).parsecmap(lambda z: int(z[:-1], 16))
-number = hex_number ^ decimal_number
-bit_spec = lexeme(string('.')) >> lexeme(decimal_number)
-
-@lexeme
-@generate
-def operand():
-	yield string('&')
-	n = yield decimal_number
-	return ('operand', n)
-
-@generate
-def mnemonic_def():
-	num = yield number
-	assert num == 1
-	yield comma
-	required_value = yield number
-	yield comma
-	mask = yield number
-	yield comma
-	mnem = yield simple_token
-	args = yield sepBy(operand | simple_token, comma)
-	return (required_value, mask, mnem, args)
-
-@generate
-def inc_def():
-	name = yield simple_token
-	yield lexeme(string('EQU'))
-	yield lexeme(string('['))
-	addr = yield number
-	yield lexeme(string(']'))
-
-	# there must be a nicer way to do this...
-	bit = yield times(bit_spec, 0, 1)
-	if bit:
-		return (name, addr, bit[0])
+
+from ht68args import parse_address
+from ht68banks import BankAnalysis
+from ht68dec import *
+from ht68flow import *
+from ht68incr import IncrementalListing
+from ht68match import read_names
+from ht68mcu import *
+
+IMPORT_TIME = time.perf_counter() - STARTED
+
+# size of the buffer listings are written through
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# --incremental keeps its state next to the listing, in <listing> + this
+STATE_SUFFIX = '.state'
+
+# how often --watch looks at the image, in seconds
+WATCH_INTERVAL = 0.2
+
+
+def write_listing(mcu, source, out, start=0, end=None, analyze=False, names=None):
+	# returns the number of words written; names is an optional list
+	# of (address, name) for code, e.g. from ht68match's names files.
+	# If mcu.stats is set, the time taken is added to it; with analyze,
+	# formatting is counted as part of writing
+	stats = mcu.stats
+	write = out.write
+	count = 0
+	if analyze:
+		began = time.perf_counter()
+		flow = FlowGraph(read_opcodes(source))
+		if names:
+			flow.labels.update(names)
+		notes = BankAnalysis(flow).notes()
+		if stats is not None:
+			code_end = flow.size if end is None else min(end, flow.size)
+			stats.count_opcodes(mcu, [flow.opcodes[addr] for addr in range(max(start, 0), code_end) if flow.is_code[addr]])
+			analyzed = time.perf_counter()
+			stats.add_time('analyze', analyzed - began)
+		for address, opcode, label, line in flow.iter_listing(mcu, start, end, notes):
+			if label is not None:
+				if address in flow.functions or address in flow.entries:
+					write('\n')
+				write('%s:\n' % label)
+			write('%04x : %04x : %s\n' % (address, opcode, line))
+			count += 1
+		if stats is not None:
+			stats.add_time('write', time.perf_counter() - analyzed)
 	else:
-		return (name, addr, None)
-
-
-class HoltekMCU:
-	def __init__(self, fmt_lines, inc_lines):
-		self.mnemonics = []
-		self.mem_labels = {}
-
-		mode = None
-		for line in fmt_lines:
-			line = line.strip()
-			if not line:
-				continue
-			elif line.startswith('%'):
-				mode = line[1:]
-			elif mode == 'mnemonic':
-				self.add_mnemonic_from_str(line)
-		
-		for line in inc_lines:
-			c = line.find(';')
-			if c > -1:
-				line = line[:c]
-			line = line.strip()
-			if not line:
-				continue
-			
-			inc = inc_def.parse(line)
-			if inc:
-				name, addr, bit = inc
-				key = (addr, bit)
-				if key not in self.mem_labels:
-					self.mem_labels[key] = name
-
-	def add_mnemonic_from_str(self, s):
-		mnem = mnemonic_def.parse(s)
-		assert mnem != None
-		self.mnemonics.append(mnem)
-
-	def find_mnemonic(self, opcode):
-		for mnem in self.mnemonics:
-			required_value = mnem[0]
-			mask = mnem[1]
-			if (opcode & mask) == required_value:
-				return mnem
-
-	def process_arg(self, arg, opcode):
-		if isinstance(arg, tuple) and arg[0] == 'operand':
-			# for correctness, we should be parsing the 'operand'
-			# strings in the fmt file
-			#
-			# the format for these isn't really clear, so let's just
-			# wing it for now...
-			if arg[1] == 1:
-				# data memory
-				addr = (opcode & 0x7F) | ((opcode >> 7) & 0x80)
-				return self.nice_label(addr)
-			elif arg[1] == 2:
-				# immediate
-				val = opcode & 0xFF
-				return '%02Xh' % val
-			elif arg[1] == 3:
-				# address
-				val = (opcode & 0x7FF) | ((opcode >> 3) & 0x1800)
-				return '%04Xh' % val
-			elif arg[1] == 4:
-				# bit of data memory
-				addr = (opcode & 0x7F) | ((opcode >> 7) & 0x80)
-				bit = (opcode >> 7) & 7
-				return self.nice_label(addr, bit)
-			else:
-				return 'unknown operand type %d' % arg[1]
-		else:
-			return arg
+		if stats is not None:
+			began = time.perf_counter()
+			decoding = stats.total('decode', 'format')
+		labels = dict(names) if names else None
+		for address, opcode, line in mcu.iter_disasm(source, start, end, labels):
+			if labels and address in labels:
+				write('%s:\n' % labels[address])
+			write('%04x : %04x : %s\n' % (address, opcode, line))
+			count += 1
+		if stats is not None:
+			# whatever the decoding didn't account for went on writing
+			stats.add_time('write', time.perf_counter() - began - (stats.total('decode', 'format') - decoding))
+	return count
+
+
+def write_incremental(listing, image, output, start=0, end=None, save=True):
+	# brings an IncrementalListing up to date with the image and
+	# writes it out, along with its state if save is set; returns
+	# (words written, words rendered)
+	with open(image, 'rb') as f:
+		data = f.read()
+	rendered = listing.update(data)
+	began = time.perf_counter()
+	count = listing.write_file(output, start, end)
+	if save:
+		listing.save(output + STATE_SUFFIX)
+	if listing.mcu.stats is not None:
+		listing.mcu.stats.add_time('write', time.perf_counter() - began)
+	return count, rendered
+
+
+def watch_image(listing, image, output, start=0, end=None):
+	# rewrite the listing whenever the image changes, until interrupted;
+	# the state is only saved on the way out, since it's all in memory
+	# until then
+	last = None
+	try:
+		while True:
+			try:
+				st = os.stat(image)
+				current = (st.st_mtime_ns, st.st_size)
+			except FileNotFoundError:
+				# probably being replaced; look again in a moment
+				current = None
+			if current is not None and current != last:
+				began = time.perf_counter()
+				count, rendered = write_incremental(listing, image, output, start, end, False)
+				print('%s -> %s (%d words rendered in %.1fms)' % (
+					image, output, rendered, (time.perf_counter() - began) * 1000), file=sys.stderr)
+				last = current
+			time.sleep(WATCH_INTERVAL)
+	finally:
+		if listing.hashes is not None:
+			listing.save(output + STATE_SUFFIX)
+
+
+# output formats, and the extension used for each in batch mode
+OUTPUT_FORMATS = {
+	'listing': '.asm',
+	'npy': '.npy',
+	'jsonl': '.jsonl',
+}
+
+EXPORT_COLUMNS = ('address', 'opcode', 'mnemonic', 'itype', 'data', 'imm', 'addr', 'bit',
+	'flags', 'code', 'label', 'target_label')
+
+
+def export_labels(flow, names):
+	# returns the sorted label names, and address -> index into them
+	labels = {}
+	if flow is not None:
+		labels.update(flow.labels)
+	if names:
+		labels.update(names)
+	label_names = sorted(set(labels.values()))
+	label_ids = dict((name, index) for index, name in enumerate(label_names))
+	return label_names, dict((addr, label_ids[name]) for addr, name in labels.items())
+
+
+def decode_columns(mcu, source, start=0, end=None, analyze=False, names=None):
+	# decode an image into EXPORT_COLUMNS, one entry per word, plus the
+	# label names the label columns refer to. With numpy that's an
+	# EXPORT_DTYPE array built from decode_image over the mapped image;
+	# without, a dict of lists
+	if np is None:
+		return decode_columns_slowly(mcu, source, start, end, analyze, names)
+
+	with map_image(source) as mapped:
+		view = mapped.cast('B')
+		try:
+			count = len(view) // 2
+			start = max(start, 0)
+			end = count if end is None else min(end, count)
+			flow = None
+			if analyze:
+				# the flow analysis needs the whole image either way
+				flow = FlowGraph(np.frombuffer(view, dtype='<u2', count=count).tolist())
+			chunk = view[start * 2:max(start, end) * 2]
+			fields = mcu.decode_image(chunk)
+			chunk.release()
+		finally:
+			view.release()
+
+	label_names, address_labels = export_labels(flow, names)
+	records = np.empty(len(fields), dtype=EXPORT_DTYPE)
+	records['address'] = np.arange(start, start + len(fields), dtype=np.uint32)
+	for name in ('opcode', 'mnemonic', 'data', 'imm', 'addr', 'bit'):
+		records[name] = fields[name]
+
+	# indexed by itype, with one extra entry at the end for -1
+	itype = np.frombuffer(ITYPE_TABLE, dtype=np.int8)[fields['opcode']]
+	records['itype'] = itype
+	records['flags'] = np.array(FEATURES + [0], dtype=np.uint16)[itype]
+	if flow is not None:
+		records['code'] = np.frombuffer(flow.is_code, dtype=np.uint8)[start:start + len(fields)]
+	else:
+		records['code'] = itype >= 0
 
-	def nice_label(self, addr, bit=None):
-		key = (addr, bit)
-		if key in self.mem_labels:
-			return self.mem_labels[key]
+	label = np.full(len(fields), -1, dtype=np.int32)
+	targets = np.full(0x2000, -1, dtype=np.int32)
+	for addr, index in address_labels.items():
+		if start <= addr < start + len(fields):
+			label[addr - start] = index
+		if 0 <= addr < len(targets):
+			targets[addr] = index
+	records['label'] = label
+	is_jump = np.array([op_type == HTOP_ADDR for op_type in OP_TYPES] + [False])[itype]
+	records['target_label'] = np.where(is_jump, targets[fields['addr']], -1)
+	return records, label_names
+
+
+def decode_columns_slowly(mcu, source, start=0, end=None, analyze=False, names=None):
+	# decode_columns for when there's no numpy
+	opcodes = read_opcodes(source)
+	start = max(start, 0)
+	end = len(opcodes) if end is None else min(end, len(opcodes))
+	flow = FlowGraph(opcodes) if analyze else None
+	label_names, address_labels = export_labels(flow, names)
+
+	columns = dict((name, []) for name in EXPORT_COLUMNS)
+	dispatch_index = mcu.dispatch_index
+	for address in range(start, end):
+		opcode = opcodes[address]
+		itype = ITYPE_TABLE[opcode]
+		data, imm, addr, bit = operand_fields(opcode)
+		columns['address'].append(address)
+		columns['opcode'].append(opcode)
+		columns['mnemonic'].append(dispatch_index[opcode])
+		columns['itype'].append(itype)
+		columns['data'].append(data)
+		columns['imm'].append(imm)
+		columns['addr'].append(addr)
+		columns['bit'].append(bit)
+		columns['flags'].append(FEATURES[itype] if itype >= 0 else 0)
+		columns['code'].append(flow.is_code[address] if flow is not None else int(itype >= 0))
+		columns['label'].append(address_labels.get(address, -1))
+		if itype >= 0 and OP_TYPES[itype] == HTOP_ADDR:
+			columns['target_label'].append(address_labels.get(addr, -1))
 		else:
-			if bit is None:
-				if addr >= 0xA0:
-					return '[0%02Xh]' % addr
-				else:
-					return '[%02Xh]' % addr
-			else:
-				return '%s.%d' % (self.nice_label(addr), bit)
+			columns['target_label'].append(-1)
+	return columns, label_names
 
-	def disasm(self, opcode):
-		mnemonic = self.find_mnemonic(opcode)
-		if not mnemonic:
-			return '<<UNKNOWN>>'
-		insn = mnemonic[2]
-		args = [self.process_arg(arg, opcode) for arg in mnemonic[3]]
-		return '%s %s' % (insn, ', '.join(args))
 
+def write_npy(mcu, source, path, start=0, end=None, analyze=False, names=None):
+	# writes a structured array (EXPORT_DTYPE) that np.load(path,
+	# mmap_mode='r') can map straight back in, along with a .json file
+	# naming the mnemonics, labels and flags it refers to; returns the
+	# number of words written
+	if np is None:
+		raise RuntimeError('--format npy requires numpy')
+	records, label_names = decode_columns(mcu, source, start, end, analyze, names)
+	np.save(path, records)
 
+	meta = {
+		'mnemonics': [mnemonic_key(mnem) for mnem in mcu.mnemonics],
+		'itypes': [d[IDEF_MNEMONIC] for d in INSN_DEFS],
+		'labels': label_names,
+		'flags': dict((name, flag) for flag, name in FEATURE_NAMES),
+	}
+	with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+		json.dump(meta, f, indent=1)
+		f.write('\n')
+	return len(records)
 
-if __name__ == '__main__':
-	if len(sys.argv) == 3:
-		mcu_name = sys.argv[1]
-		prog_name = sys.argv[2]
 
-		with open('vendor-data/%s.fmt' % mcu_name, 'r') as f:
-			fmt_lines = f.readlines()
-		with open('vendor-data/%s.inc' % mcu_name, 'r') as f:
-			inc_lines = f.readlines()
+def write_jsonl(mcu, source, out, start=0, end=None, analyze=False, names=None):
+	# one JSON object per word; slower and bigger than npy, but needs
+	# nothing to read it
+	columns, label_names = decode_columns(mcu, source, start, end, analyze, names)
+	if np is not None:
+		columns = dict((name, columns[name].tolist()) for name in EXPORT_COLUMNS)
+	operand_names = {1: 'data', 2: 'imm', 3: 'addr', 4: 'bit'}
+	write = out.write
+	for i in range(len(columns['address'])):
+		opcode = columns['opcode'][i]
+		index = columns['mnemonic'][i]
+		itype = columns['itype'][i]
+		label = columns['label'][i]
+		target = columns['target_label'][i]
+		record = {
+			'address': columns['address'][i],
+			'opcode': opcode,
+			'mnemonic': mnemonic_key(mcu.mnemonics[index]) if index >= 0 else None,
+			'itype': INSN_DEFS[itype][IDEF_MNEMONIC] if itype >= 0 else None,
+			'code': bool(columns['code'][i]),
+			'flags': [name for flag, name in FEATURE_NAMES if columns['flags'][i] & flag],
+			'label': label_names[label] if label >= 0 else None,
+			'target': label_names[target] if target >= 0 else None,
+		}
+		if index >= 0:
+			for arg in mcu.mnemonics[index][3]:
+				if isinstance(arg, tuple) and arg[1] in operand_names:
+					key = operand_names[arg[1]]
+					record[key] = columns[key][i]
+					if arg[1] == 4:
+						record['data'] = columns['data'][i]
+		write(json.dumps(record, sort_keys=True))
+		write('\n')
+	return len(columns['address'])
+
+
+# state for batch worker processes, set up once by init_batch_worker
+batch_mcu = None
+
+def init_batch_worker(mcu):
+	global batch_mcu
+	batch_mcu = mcu
+
+def run_batch_job(job):
+	# returns (words written, DisasmStats or None)
+	image, listing, start, end, analyze, collect_stats, output_format = job
+	batch_mcu.stats = DisasmStats() if collect_stats else None
+	os.makedirs(os.path.dirname(listing) or '.', exist_ok=True)
+	if output_format == 'npy':
+		count = write_npy(batch_mcu, image, listing, start, end, analyze)
+	else:
+		writer = write_jsonl if output_format == 'jsonl' else write_listing
+		with open(listing, 'w', buffering=OUTPUT_BUFFER_SIZE) as out:
+			count = writer(batch_mcu, image, out, start, end, analyze)
+	return count, batch_mcu.stats
+
+
+def run_batch(mcu, images, output_dir, start, end, jobs, analyze=False, output_format='listing'):
+	# if mcu.stats is set, every worker's timings and counts are merged
+	# into it (so the phase times add up CPU time across workers)
+	#
+	# listings mirror the layout of the images below their common
+	# folder, so a corpus of <release>/program.bin files doesn't
+	# end up with every listing fighting over the same name
+	root = os.path.commonpath([os.path.dirname(os.path.abspath(i)) for i in images])
+	batch = []
+	for image in images:
+		rel = os.path.relpath(os.path.abspath(image), root)
+		listing = os.path.join(output_dir, os.path.splitext(rel)[0] + OUTPUT_FORMATS[output_format])
+		batch.append((image, listing, start, end, analyze, mcu.stats is not None, output_format))
+
+	began = time.perf_counter()
+	total_words = 0
+	with concurrent.futures.ProcessPoolExecutor(
+			max_workers=jobs, initializer=init_batch_worker, initargs=(mcu,)) as pool:
+		for job, (count, stats) in zip(batch, pool.map(run_batch_job, batch)):
+			print('%s -> %s (%d words)' % (job[0], job[1], count), file=sys.stderr)
+			total_words += count
+			if stats is not None:
+				mcu.stats.merge(stats)
+	elapsed = time.perf_counter() - began
 
-		mcu = HoltekMCU(fmt_lines, inc_lines)
+	print('disassembled %d images, %d words in %.2fs (%.0f words/s)' % (
+		len(batch), total_words, elapsed, total_words / elapsed if elapsed else 0),
+		file=sys.stderr)
 
-		with open(prog_name, 'rb') as f:
-			code = f.read()
 
-		for address in range(0, len(code) // 2):
-			opcode = struct.unpack_from('<H', code, address * 2)[0]
-			print('%04x : %04x : %s' % (address, opcode, mcu.disasm(opcode)))
+def write_stats(mcu, path, images):
+	report = mcu.stats.as_dict(mcu)
+	report['images'] = images
+	report['seconds'] = round(time.perf_counter() - STARTED, 6)
+	line = json.dumps(report, sort_keys=True) + '\n'
+	if path == '-':
+		sys.stderr.write(line)
 	else:
-		print('must specify a MCU name and a program name')
-		print('example: %s HT68FB560 program.bin' % sys.argv[0])
+		with open(path, 'a') as f:
+			f.write(line)
 
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Disassemble Holtek HT68 program images.',
+		epilog='example: %(prog)s HT68FB560 program.bin > program.asm')
+	parser.add_argument('mcu_name', help='MCU name, used to find vendor-data/<name>.fmt and .inc')
+	parser.add_argument('prog_name', nargs='+',
+		help='program image to disassemble; give several images or folders with --output-dir for batch mode')
+	parser.add_argument('-s', '--start', type=parse_address, default=0,
+		help='first word address to disassemble')
+	parser.add_argument('-e', '--end', type=parse_address, default=None,
+		help='word address to stop at (exclusive)')
+	parser.add_argument('-a', '--analyze', action='store_true',
+		help='follow control flow from the vectors, label branch targets and show unreachable words as data')
+	parser.add_argument('-o', '--output', default=None,
+		help='write the listing to this file instead of stdout')
+	parser.add_argument('-d', '--output-dir', default=None,
+		help='batch mode: write one .asm listing per image into this folder')
+	parser.add_argument('-j', '--jobs', type=int, default=None,
+		help='batch mode: number of worker processes (default: one per core)')
+	parser.add_argument('-n', '--names', default=None,
+		help='names file (as written by ht68match.py) to label code addresses with')
+	parser.add_argument('-f', '--format', choices=sorted(OUTPUT_FORMATS), default='listing',
+		help='listing (the default), npy (a NumPy structured array, needs --output) or jsonl')
+	parser.add_argument('-i', '--incremental', action='store_true',
+		help='keep state next to the --output listing and only redo what changed in the image since last time')
+	parser.add_argument('-w', '--watch', action='store_true',
+		help='keep running, updating the --output listing incrementally whenever the image changes')
+	parser.add_argument('--stats', nargs='?', const='-', default=None, metavar='FILE',
+		help='report phase timings and a mnemonic histogram as a line of JSON, on stderr or appended to FILE')
+	args = parser.parse_args()
+
+	if args.output_dir is None:
+		if len(args.prog_name) > 1 or os.path.isdir(args.prog_name[0]):
+			parser.error('disassembling several images needs --output-dir')
+	elif args.output:
+		parser.error('--output and --output-dir are mutually exclusive')
+	elif args.names:
+		parser.error('--names only applies to a single image')
+	if args.incremental or args.watch:
+		if args.output is None:
+			parser.error('--incremental and --watch need --output')
+		if args.format != 'listing':
+			parser.error('--incremental and --watch only make listings')
+	if args.format == 'npy':
+		if np is None:
+			parser.error('--format npy requires numpy')
+		if args.output_dir is None and args.output is None:
+			parser.error('--format npy needs --output or --output-dir')
+
+	began = time.perf_counter()
+	mcu = HoltekMCU.load(args.mcu_name)
+	if args.stats is not None:
+		mcu.stats = DisasmStats()
+		mcu.stats.add_time('import', IMPORT_TIME)
+		mcu.stats.add_time('load', time.perf_counter() - began)
+	names = read_names(args.names) if args.names else None
+
+	if args.output_dir is not None:
+		images = find_images(args.prog_name)
+		if not images:
+			parser.error('no images found')
+		run_batch(mcu, images, args.output_dir, args.start, args.end, args.jobs, args.analyze, args.format)
+		if args.stats is not None:
+			write_stats(mcu, args.stats, len(images))
+		return
+
+	if args.incremental or args.watch:
+		image = args.prog_name[0]
+		listing = IncrementalListing.load(args.output + STATE_SUFFIX, mcu, args.analyze, names)
+		if args.watch:
+			try:
+				watch_image(listing, image, args.output, args.start, args.end)
+			except KeyboardInterrupt:
+				pass
+			return
+		write_incremental(listing, image, args.output, args.start, args.end)
+		if args.stats is not None:
+			write_stats(mcu, args.stats, 1)
+		return
+
+	if args.format == 'npy':
+		write_npy(mcu, args.prog_name[0], args.output, args.start, args.end, args.analyze, names)
+		if args.stats is not None:
+			write_stats(mcu, args.stats, 1)
+		return
+
+	if args.output:
+		out = open(args.output, 'w', buffering=OUTPUT_BUFFER_SIZE)
+	else:
+		out = open(sys.stdout.fileno(), 'w', buffering=OUTPUT_BUFFER_SIZE, closefd=False)
+
+	try:
+		writer = write_jsonl if args.format == 'jsonl' else write_listing
+		with out:
+			writer(mcu, args.prog_name[0], out, args.start, args.end, args.analyze, names)
+		if args.stats is not None:
+			write_stats(mcu, args.stats, 1)
+	except BrokenPipeError:
+		# the reader went away (e.g. piped into head); that's fine,
+		# but stop Python complaining again when it flushes stdout
+		devnull = os.open(os.devnull, os.O_WRONLY)
+		os.dup2(devnull, sys.stdout.fileno())
+
+
+if __name__ == '__main__':
+	main()
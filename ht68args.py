@@ -0,0 +1,15 @@
+# Command line helpers shared by the ht68 tools
+# Standard library only, so tools that just need to read their
+# arguments (like the ht68server client) can import it cheaply.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+
+def parse_address(s):
+	# accept 0x1F0, 1F0h or plain decimal
+	if s[-1] in 'hH':
+		return int(s[:-1], 16)
+	return int(s, 0)
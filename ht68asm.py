@@ -0,0 +1,358 @@
+# Holtek HT68 assembler
+#
+# The inverse of ht68-disasm.py, driven by the same vendor .fmt and .inc
+# files: every mnemonic definition is filed in a hash table under its
+# name and operand shape (e.g. ('MOV', ('A', 'num'))), so assembling a
+# line is a lookup, and the .inc names work as operands. It accepts what
+# the disassembler prints, plus:
+#
+#   label:                     code labels (forward references are fine)
+#   name EQU [0C8h].1          data memory names, like in the .inc file
+#   name EQU 0F07h             constants and external code addresses
+#   ORG 19F1h                  set the address
+#   DW 1234h, 5678h            raw words
+#   ; comments
+#
+# It's one pass over the source; operands naming a label that isn't
+# defined yet are patched in at the end.
+
+import argparse
+import re
+import struct
+import sys
+
+from ht68args import parse_address
+from ht68dec import *
+from ht68mcu import *
+
+label_re = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*:')
+equ_re = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s+EQU\s+(.*)$', re.IGNORECASE)
+hex_re = re.compile(r'^[0-9A-Fa-f]+[hH]$')
+term_re = re.compile(r'\s*([+-]?)\s*([^+\-\s]+)\s*')
+
+
+class AssemblerError(Exception):
+	pass
+
+
+class UnresolvedSymbol(AssemblerError):
+	pass
+
+
+def operand_shape(arg):
+	# how a .fmt argument looks in the source
+	if isinstance(arg, tuple) and arg[0] == 'operand':
+		return {1: 'data', 2: 'num', 3: 'num', 4: 'bit'}.get(arg[1], 'unknown')
+	return arg.upper()
+
+
+# operand kind -> (largest value, function putting it into opcode bits)
+OPERAND_ENCODERS = {
+	1: (0xFF, lambda v: (v & 0x7F) | ((v & 0x80) << 7)),
+	2: (0xFF, lambda v: v & 0xFF),
+	3: (0x1FFF, lambda v: (v & 0x7FF) | ((v & 0x1800) << 3)),
+}
+
+
+class Assembler:
+	def __init__(self, mcu, symbols=None):
+		# symbols optionally maps code names to addresses, e.g. from a
+		# names file
+		self.mcu = mcu
+
+		self.encodings = {}
+		for index, mnem in enumerate(mcu.mnemonics):
+			key = (mnem[2].upper(), tuple(operand_shape(arg) for arg in mnem[3]))
+			self.encodings.setdefault(key, []).append(index)
+
+		self.mem_names = {}
+		for key in sorted(mcu.mem_labels, key=lambda k: (k[0], -1 if k[1] is None else k[1])):
+			self.mem_names.setdefault(mcu.mem_labels[key].upper(), key)
+
+		self.base_symbols = {}
+		for name, value in (symbols or {}).items():
+			self.base_symbols[name.upper()] = value
+
+	def assemble(self, lines, origin=0):
+		# returns a list of (start address, [words]), one per ORG
+		self.symbols = dict(self.base_symbols)
+		self.mem_symbols = dict(self.mem_names)
+		self.blocks = [(origin, [])]
+		self.address = origin
+		fixups = []
+
+		for number, line in enumerate(lines, 1):
+			try:
+				fixup = self._assemble_line(line)
+				if fixup is not None:
+					fixups.append((number, line) + fixup)
+			except AssemblerError as e:
+				raise AssemblerError('line %d: %s' % (number, e))
+
+		for number, line, words, offset, candidates, operands in fixups:
+			try:
+				words[offset] = self._encode(candidates, operands)
+			except AssemblerError as e:
+				raise AssemblerError('line %d: %s' % (number, e))
+
+		return [(start, words) for start, words in self.blocks if words]
+
+	def _emit(self, word):
+		words = self.blocks[-1][1]
+		words.append(word)
+		self.address += 1
+		return words, len(words) - 1
+
+	def _assemble_line(self, line):
+		c = line.find(';')
+		if c > -1:
+			line = line[:c]
+
+		m = equ_re.match(line)
+		if m:
+			self._define(m.group(1), m.group(2).strip())
+			return None
+
+		m = label_re.match(line)
+		if m:
+			name = m.group(1).upper()
+			if name in self.symbols and name not in self.base_symbols:
+				raise AssemblerError('%s is defined twice' % m.group(1))
+			self.symbols[name] = self.address
+			line = line[m.end():]
+
+		line = line.strip()
+		if not line:
+			return None
+
+		parts = line.split(None, 1)
+		mnem = parts[0].upper()
+		operands = [op.strip() for op in parts[1].split(',')] if len(parts) > 1 else []
+
+		if mnem == 'ORG':
+			if len(operands) != 1:
+				raise AssemblerError('ORG takes one address')
+			self.address = self._evaluate(operands[0])
+			self.blocks.append((self.address, []))
+			return None
+		elif mnem == 'DW':
+			for op in operands:
+				self._emit(self._evaluate(op) & 0xFFFF)
+			return None
+
+		candidates = self._lookup(mnem, operands)
+		try:
+			word = self._encode(candidates, operands)
+		except UnresolvedSymbol:
+			words, offset = self._emit(0)
+			return (words, offset, candidates, operands)
+		self._emit(word)
+		return None
+
+	def _define(self, name, value):
+		key = name.upper()
+		if value.startswith('['):
+			self.mem_symbols[key] = self._memory(value)
+		else:
+			self.symbols[key] = self._evaluate(value)
+
+	def _shape(self, operand):
+		upper = operand.upper()
+		if upper == 'A':
+			return 'A'
+		if operand.startswith('['):
+			return 'bit' if '.' in operand else 'data'
+		if upper in self.mem_symbols:
+			return 'data' if self.mem_symbols[upper][1] is None else 'bit'
+		if '.' in operand:
+			return 'bit'
+		return 'num'
+
+	def _lookup(self, mnem, operands):
+		shape = tuple(self._shape(op) for op in operands)
+		candidates = self.encodings.get((mnem, shape))
+		if candidates is None:
+			raise AssemblerError("no form of %s takes '%s'" % (mnem, ', '.join(operands)))
+		return candidates
+
+	def _evaluate(self, text):
+		# numbers and symbols, added and subtracted
+		value = 0
+		pos = 0
+		text = text.strip()
+		if not text:
+			raise AssemblerError('missing value')
+		while pos < len(text):
+			m = term_re.match(text, pos)
+			if not m or m.end() == pos:
+				raise AssemblerError('bad expression %r' % text)
+			term = self._term(m.group(2))
+			value += -term if m.group(1) == '-' else term
+			pos = m.end()
+		return value
+
+	def _term(self, term):
+		upper = term.upper()
+		if upper in self.symbols:
+			return self.symbols[upper]
+		if hex_re.match(term):
+			return int(term[:-1], 16)
+		if term[0].isdigit():
+			try:
+				if term[:2].lower() in ('0x', '0b', '0o'):
+					return int(term, 0)
+				return int(term, 10)
+			except ValueError:
+				raise AssemblerError('bad number %r' % term)
+		raise UnresolvedSymbol('unknown symbol %s' % term)
+
+	def _memory(self, operand):
+		# returns (address, bit or None) for a data memory operand
+		upper = operand.upper()
+		if upper in self.mem_symbols:
+			return self.mem_symbols[upper]
+		bit = None
+		if '.' in operand:
+			operand, bit_text = operand.rsplit('.', 1)
+			bit = self._evaluate(bit_text)
+			if not 0 <= bit <= 7:
+				raise AssemblerError('bit %d out of range' % bit)
+			base = self._memory(operand)
+			if base[1] is not None:
+				raise AssemblerError('%s is already a bit' % operand)
+			return (base[0], bit)
+		if operand.startswith('[') and operand.endswith(']'):
+			return (self._evaluate(operand[1:-1]), None)
+		raise AssemblerError('unknown memory operand %s' % operand)
+
+	def _encode(self, candidates, operands):
+		error = None
+		for index in candidates:
+			required, mask, name, args = self.mcu.mnemonics[index]
+			word = required
+			try:
+				for arg, operand in zip(args, operands):
+					if isinstance(arg, tuple):
+						word |= self._encode_operand(arg[1], operand)
+			except UnresolvedSymbol:
+				raise
+			except AssemblerError as e:
+				error = e
+				continue
+			if (word & mask) != required or self.mcu.dispatch_index[word] != index:
+				error = AssemblerError('%s %s encodes as a different instruction' % (name, ', '.join(operands)))
+				continue
+			return word
+		raise error
+
+	def _encode_operand(self, kind, operand):
+		if kind == 4:
+			addr, bit = self._memory(operand)
+			if bit is None:
+				raise AssemblerError('%s needs a bit number' % operand)
+			if not 0 <= addr <= 0xFF:
+				raise AssemblerError('address %Xh out of range' % addr)
+			return OPERAND_ENCODERS[1][1](addr) | (bit << 7)
+		if kind == 1:
+			value, bit = self._memory(operand)
+			if bit is not None:
+				raise AssemblerError('%s is a bit, not a byte' % operand)
+		else:
+			value = self._evaluate(operand)
+			if kind == 2 and -0x80 <= value < 0:
+				value &= 0xFF
+		limit, encode = OPERAND_ENCODERS[kind]
+		if not 0 <= value <= limit:
+			raise AssemblerError('%s is out of range' % operand)
+		return encode(value)
+
+
+def check_round_trip(mcu, opcodes=range(0x10000)):
+	# disassemble and reassemble every decodable opcode, returning a
+	# list of (opcode, text, reassembled word or error message) for
+	# every one that doesn't come back the same
+	asm = Assembler(mcu)
+	failures = []
+	for opcode in opcodes:
+		if mcu.dispatch_index[opcode] < 0:
+			continue
+		text = mcu.disasm(opcode)
+		try:
+			blocks = asm.assemble([text])
+			word = blocks[0][1][0]
+		except AssemblerError as e:
+			failures.append((opcode, text, str(e)))
+			continue
+		if word != opcode:
+			failures.append((opcode, text, '%04X' % word))
+	return failures
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Assemble Holtek HT68 source, using the vendor instruction set definitions.',
+		epilog='example: %(prog)s HT68FB560 patch.asm -n program.names')
+	parser.add_argument('mcu_name', help='MCU name, used to find vendor-data/<name>.fmt and .inc')
+	parser.add_argument('source', nargs='?', help='source file to assemble')
+	parser.add_argument('-n', '--names', default=None,
+		help='names file (as written by ht68match.py) for code addresses')
+	parser.add_argument('-o', '--output', default=None,
+		help='write a program image with the assembled code in it')
+	parser.add_argument('-i', '--image', default=None,
+		help='with --output: start from this image instead of an empty one')
+	parser.add_argument('--origin', type=parse_address, default=0,
+		help='address to assemble at until the first ORG (default: 0)')
+	parser.add_argument('--check', action='store_true',
+		help='check that every opcode survives a disassemble/assemble round trip')
+	args = parser.parse_args()
+
+	mcu = HoltekMCU.load(args.mcu_name)
+
+	if args.check:
+		failures = check_round_trip(mcu)
+		for opcode, text, result in failures:
+			print('%04X: %s -> %s' % (opcode, text, result))
+		print('%d opcodes failed the round trip' % len(failures), file=sys.stderr)
+		if failures:
+			sys.exit(1)
+		if args.source is None:
+			return
+
+	if args.source is None:
+		parser.error('nothing to assemble')
+
+	symbols = {}
+	if args.names:
+		from ht68match import read_names
+		for addr, name in read_names(args.names):
+			symbols[name] = addr
+
+	with open(args.source, 'r') as f:
+		lines = f.read().splitlines()
+	try:
+		blocks = Assembler(mcu, symbols).assemble(lines, args.origin)
+	except AssemblerError as e:
+		sys.exit('%s: %s' % (args.source, e))
+
+	if args.output:
+		if args.image:
+			with open(args.image, 'rb') as f:
+				image = bytearray(f.read())
+		else:
+			image = bytearray()
+		for start, words in blocks:
+			end = (start + len(words)) * 2
+			if len(image) < end:
+				image.extend(bytes(end - len(image)))
+			image[start * 2:end] = struct.pack('<%dH' % len(words), *words)
+		with open(args.output, 'wb') as f:
+			f.write(image)
+	else:
+		# the same form patches.md and patches.json use
+		for start, words in blocks:
+			data = struct.pack('<%dH' % len(words), *words)
+			print('%04X: %s' % (start, ' '.join('%02X' % b for b in data)))
+
+
+if __name__ == '__main__':
+	main()
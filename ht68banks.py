@@ -0,0 +1,596 @@
+# Holtek HT68FB560 bank and memory pointer analysis
+# Shared by the command line tools and the IDA module; like ht68dec,
+# it sticks to what Python 2.7 supports.
+#
+# Works out which physical byte of data memory an instruction touches
+# when that depends on the registers: IAR0 goes through MP0, IAR1
+# through BP:MP1, and the banked special function registers follow BP.
+# This is constant propagation over the FlowGraph's basic blocks,
+# tracking ACC, BP, MP0 and MP1 with a worklist. Each register is a
+# (mask, value) pair of the bits known so far, so something like
+# 'mov A,BP / and A,0F8h / or A,2 / mov BP,A' still pins the bank down.
+#
+# The memory model is the one ht68sim uses: registers from 00h to 7Fh
+# are shared between banks except those in BANKED_SFRS, and direct
+# accesses from 80h up always hit bank 0; only IAR1 reaches the other
+# banks' general purpose RAM.
+#
+# Calls are handled without context: a function starts from what all
+# its call sites agree on, and after a call, whatever the function (or
+# anything it calls) might write is forgotten. Interrupt handlers start
+# from nothing, and are assumed to put back whatever they change.
+# Writes through IAR0/IAR1 are assumed to miss the tracked registers,
+# wherever the pointer goes; that's what the call summaries assume too,
+# and it means knowing less never makes an instruction's result known
+# better, so the outcome doesn't depend on the order blocks are visited.
+#
+# Every block's entry state only ever loses bits, so each block is
+# visited a bounded number of times and the whole pass stays linear in
+# the size of the image. After FlowGraph.update, update() only goes
+# through the functions whose blocks or callees changed again, along
+# with whatever their new states reach.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+from ht68dec import *
+from ht68regs import *
+
+IAR0 = REG_ADDRS['IAR0']
+MP0 = REG_ADDRS['MP0']
+IAR1 = REG_ADDRS['IAR1']
+MP1 = REG_ADDRS['MP1']
+BP = REG_ADDRS['BP']
+ACC = REG_ADDRS['ACC']
+
+# special function registers that exist separately in each bank
+BANKED_SFRS = frozenset(addr for addr, reg in enumerate(REG_DEFS) if reg and 'banks' in reg)
+
+
+def physical_address(bank, offset):
+	if offset < 0x80 and offset not in BANKED_SFRS:
+		return offset
+	return (bank << 8) | offset
+
+
+# the tracked registers, in the order they appear in a state; a state
+# is a tuple of (known bits mask, value) pairs
+TRACKED = (ACC, BP, MP0, MP1)
+SLOTS = dict((addr, slot) for slot, addr in enumerate(TRACKED))
+ACC_SLOT = SLOTS[ACC]
+BP_SLOT = SLOTS[BP]
+MP0_SLOT = SLOTS[MP0]
+MP1_SLOT = SLOTS[MP1]
+
+UNKNOWN = (0, 0)
+UNKNOWN_STATE = (UNKNOWN,) * len(TRACKED)
+
+
+def meet_value(x, y):
+	mask = x[0] & y[0] & ~(x[1] ^ y[1])
+	return (mask, x[1] & mask)
+
+
+def meet(a, b):
+	return tuple(meet_value(x, y) for x, y in zip(a, b))
+
+
+def meet_all(states):
+	# the meet of one or more states
+	result = None
+	for state in states:
+		result = state if result is None else meet(result, state)
+	return result
+
+
+def resolve(state, mem):
+	# the physical address an access to data address mem reaches, or
+	# None if it depends on something unknown
+	if mem == IAR0:
+		mp0 = state[MP0_SLOT]
+		if mp0[0] != 0xFF:
+			return None
+		return physical_address(0, mp0[1])
+	elif mem == IAR1:
+		bp, mp1 = state[BP_SLOT], state[MP1_SLOT]
+		if bp[0] & 7 != 7 or mp1[0] != 0xFF:
+			return None
+		return physical_address(bp[1] & 7, mp1[1])
+	elif mem in BANKED_SFRS:
+		bp = state[BP_SLOT]
+		if bp[0] & 7 != 7:
+			return None
+		return physical_address(bp[1] & 7, mem)
+	return physical_address(0, mem)
+
+
+# how each instruction changes a tracked value: functions of (A, the
+# [m] or immediate operand, bit number) giving the new value of A or
+# of [m]. Arithmetic needs everything known; the bitwise instructions
+# keep whatever bits they can.
+
+def _arith(func):
+	def transfer(a, m, bit):
+		if a[0] != 0xFF or m[0] != 0xFF:
+			return UNKNOWN
+		return (0xFF, func(a[1], m[1]) & 0xFF)
+	return transfer
+
+def _step(delta):
+	def transfer(a, m, bit):
+		if m[0] != 0xFF:
+			return UNKNOWN
+		return (0xFF, (m[1] + delta) & 0xFF)
+	return transfer
+
+def _and(a, m, bit):
+	ones = a[0] & m[0] & a[1] & m[1]
+	zeros = (a[0] & ~a[1]) | (m[0] & ~m[1])
+	return ((ones | zeros) & 0xFF, ones)
+
+def _or(a, m, bit):
+	ones = (a[0] & a[1]) | (m[0] & m[1])
+	zeros = a[0] & m[0] & ~a[1] & ~m[1]
+	return ((ones | zeros) & 0xFF, ones)
+
+def _xor(a, m, bit):
+	mask = a[0] & m[0]
+	return (mask, (a[1] ^ m[1]) & mask)
+
+def _rotate(x, left):
+	if left:
+		return ((x << 1) | (x >> 7)) & 0xFF
+	return ((x >> 1) | (x << 7)) & 0xFF
+
+_UNKNOWN = lambda a, m, bit: UNKNOWN
+_A = lambda a, m, bit: a
+_M = lambda a, m, bit: m
+_CPL = lambda a, m, bit: (m[0], ~m[1] & m[0])
+_SWAP = lambda a, m, bit: (((m[0] << 4) | (m[0] >> 4)) & 0xFF, ((m[1] << 4) | (m[1] >> 4)) & 0xFF)
+_RL = lambda a, m, bit: (_rotate(m[0], True), _rotate(m[1], True))
+_RR = lambda a, m, bit: (_rotate(m[0], False), _rotate(m[1], False))
+# through carry, which isn't tracked: the bit shifted in is unknown
+_RLC = lambda a, m, bit: ((m[0] << 1) & 0xFE, (m[1] << 1) & 0xFE)
+_RRC = lambda a, m, bit: (m[0] >> 1, m[1] >> 1)
+_SET_BIT = lambda a, m, bit: (m[0] | (1 << bit), m[1] | (1 << bit))
+_CLR_BIT = lambda a, m, bit: (m[0] | (1 << bit), m[1] & ~(1 << bit))
+
+_ADD = _arith(lambda a, m: a + m)
+_SUB = _arith(lambda a, m: a - m)
+
+DEST_A = 0
+DEST_MEM = 1
+
+# (mnemonic, operand type) -> (destination, transfer function), for
+# every instruction that writes A or data memory
+TRANSFER_RULES = {
+	('mov', HTOP_A_IMM): (DEST_A, _M),
+	('add', HTOP_A_IMM): (DEST_A, _ADD),
+	('sub', HTOP_A_IMM): (DEST_A, _SUB),
+	('and', HTOP_A_IMM): (DEST_A, _and),
+	('or', HTOP_A_IMM): (DEST_A, _or),
+	('xor', HTOP_A_IMM): (DEST_A, _xor),
+	('ret', HTOP_A_IMM): (DEST_A, _M),
+	('mov', HTOP_DATA_A): (DEST_MEM, _A),
+	('mov', HTOP_A_DATA): (DEST_A, _M),
+	('add', HTOP_A_DATA): (DEST_A, _ADD),
+	('addm', HTOP_A_DATA): (DEST_MEM, _ADD),
+	('sub', HTOP_A_DATA): (DEST_A, _SUB),
+	('subm', HTOP_A_DATA): (DEST_MEM, _SUB),
+	('and', HTOP_A_DATA): (DEST_A, _and),
+	('andm', HTOP_A_DATA): (DEST_MEM, _and),
+	('or', HTOP_A_DATA): (DEST_A, _or),
+	('orm', HTOP_A_DATA): (DEST_MEM, _or),
+	('xor', HTOP_A_DATA): (DEST_A, _xor),
+	('xorm', HTOP_A_DATA): (DEST_MEM, _xor),
+	('adc', HTOP_A_DATA): (DEST_A, _UNKNOWN),
+	('adcm', HTOP_A_DATA): (DEST_MEM, _UNKNOWN),
+	('sbc', HTOP_A_DATA): (DEST_A, _UNKNOWN),
+	('sbcm', HTOP_A_DATA): (DEST_MEM, _UNKNOWN),
+	('cpla', HTOP_DATA): (DEST_A, _CPL),
+	('cpl', HTOP_DATA): (DEST_MEM, _CPL),
+	('sza', HTOP_DATA): (DEST_A, _M),
+	('swapa', HTOP_DATA): (DEST_A, _SWAP),
+	('swap', HTOP_DATA): (DEST_MEM, _SWAP),
+	('inca', HTOP_DATA): (DEST_A, _step(1)),
+	('inc', HTOP_DATA): (DEST_MEM, _step(1)),
+	('siza', HTOP_DATA): (DEST_A, _step(1)),
+	('siz', HTOP_DATA): (DEST_MEM, _step(1)),
+	('deca', HTOP_DATA): (DEST_A, _step(-1)),
+	('dec', HTOP_DATA): (DEST_MEM, _step(-1)),
+	('sdza', HTOP_DATA): (DEST_A, _step(-1)),
+	('sdz', HTOP_DATA): (DEST_MEM, _step(-1)),
+	('rla', HTOP_DATA): (DEST_A, _RL),
+	('rl', HTOP_DATA): (DEST_MEM, _RL),
+	('rra', HTOP_DATA): (DEST_A, _RR),
+	('rr', HTOP_DATA): (DEST_MEM, _RR),
+	('rlca', HTOP_DATA): (DEST_A, _RLC),
+	('rlc', HTOP_DATA): (DEST_MEM, _RLC),
+	('rrca', HTOP_DATA): (DEST_A, _RRC),
+	('rrc', HTOP_DATA): (DEST_MEM, _RRC),
+	('tabrd', HTOP_DATA): (DEST_MEM, _UNKNOWN),
+	('daa', HTOP_DATA): (DEST_MEM, _UNKNOWN),
+	('clr', HTOP_DATA): (DEST_MEM, lambda a, m, bit: (0xFF, 0)),
+	('set', HTOP_DATA): (DEST_MEM, lambda a, m, bit: (0xFF, 0xFF)),
+	('set', HTOP_BIT): (DEST_MEM, _SET_BIT),
+	('clr', HTOP_BIT): (DEST_MEM, _CLR_BIT),
+}
+
+# itype -> (destination, transfer function) or None
+TRANSFERS = [TRANSFER_RULES.get((d[IDEF_MNEMONIC], d[IDEF_OP_TYPE])) for d in INSN_DEFS]
+
+
+def transfer(state, opcode):
+	# the state after executing opcode (anything but a call) in state
+	itype = ITYPE_TABLE[opcode]
+	if itype < 0 or TRANSFERS[itype] is None:
+		return state
+	dest, func = TRANSFERS[itype]
+	htop = OP_TYPES[itype]
+	value = OPVALUE_TABLE[opcode]
+	if htop == HTOP_A_IMM:
+		operand = (0xFF, value)
+		slot = ACC_SLOT
+		bit = 0
+	else:
+		mem = value & 0xFF
+		target = resolve(state, mem)
+		slot = SLOTS.get(target)
+		operand = state[slot] if slot is not None else UNKNOWN
+		bit = value >> 8
+		if dest == DEST_A:
+			slot = ACC_SLOT
+		elif slot is None or mem in (IAR0, IAR1):
+			return state
+	result = func(state[ACC_SLOT], operand, bit)
+	if result == state[slot]:
+		return state
+	state = list(state)
+	state[slot] = result
+	return tuple(state)
+
+
+def written_slots(opcode):
+	# bitmask of the tracked registers an instruction writes directly
+	itype = ITYPE_TABLE[opcode]
+	if itype < 0 or TRANSFERS[itype] is None:
+		return 0
+	if TRANSFERS[itype][0] == DEST_A:
+		return 1 << ACC_SLOT
+	slot = SLOTS.get(OPVALUE_TABLE[opcode] & 0xFF)
+	return 0 if slot is None else 1 << slot
+
+
+def forget(state, slots):
+	# state with the registers in the slots bitmask made unknown
+	if not slots:
+		return state
+	return tuple(UNKNOWN if slots & (1 << slot) else value for slot, value in enumerate(state))
+
+
+BANK_NAME_LOOKUP = dict((offset, name) for offset, name, comment in BANK_NAMES)
+
+def describe_physical(phys):
+	# 'B1:FRCR' for banked registers, 'B2:[85h]' for RAM
+	name = BANK_NAME_LOOKUP.get(phys)
+	if name is not None:
+		return name
+	return 'B%d:[%02Xh]' % (phys >> 8, phys & 0xFF)
+
+
+class BankAnalysis(object):
+	def __init__(self, flow):
+		self.flow = flow
+		self.states = {}       # block start -> state on entry
+		self.arrivals = {}     # address -> {source: state arriving from it}
+		self.sent = {}         # block start -> [(address, source)] it arrived at
+		self.accesses = {}     # address -> physical address of its [m]
+		self.summaries = {}    # function entry -> tracked registers it may write, as a slot bitmask
+		self.direct = {}       # function entry -> tracked registers its own blocks write
+		self.callees = {}      # function entry -> functions it calls (or tail calls)
+		self.callers = {}      # function entry -> functions calling it
+		self.blocks_of = {}    # function entry -> starts of its blocks
+		self.owners = {}       # block start -> functions it's part of
+
+		stops = flow.functions | flow.entries
+		for entry in flow.function_entries():
+			self._scan_function(entry, stops)
+		self._summarize(set(self.direct), True)
+		# arrivals come from a block start, ~address for a call, or
+		# None for the vectors
+		for addr in flow.entries:
+			self.arrivals.setdefault(addr, {})[None] = UNKNOWN_STATE
+		self._resolve(self._propagate(set(flow.block_index)))
+
+	def update(self, found):
+		# bring the analysis up to date after flow.update carried on from
+		# where it was, given the addresses it found; returns the
+		# addresses whose accesses resolve differently now.
+		#
+		# Only the functions whose blocks changed (or that call those
+		# whose summaries changed) are propagated through again, along
+		# with anything their new states reach
+		flow = self.flow
+		removed, added = flow.block_changes
+		arrivals = self.arrivals
+
+		def sources(addr):
+			# functions with a block jumping or falling through to addr
+			owners = set()
+			for source in arrivals.get(addr, ()):
+				if source is not None and source >= 0:
+					owners.update(self.owners.get(source, ()))
+			return owners
+
+		affected = set()
+		for block in removed:
+			affected.update(self.owners.pop(block[0], ()))
+		for block in added:
+			if block[0] in flow.functions or block[0] in flow.entries:
+				affected.add(block[0])
+			affected.update(sources(block[0]))
+		for addr in found:
+			if addr in flow.functions and addr not in self.direct:
+				# a new function, which may be cutting the end off others
+				affected.add(addr)
+				affected.update(self.owners.get(addr, ()))
+				affected.update(sources(addr))
+
+		stops = flow.functions | flow.entries
+		shrunk = False
+		for entry in affected:
+			direct = self.direct.get(entry, 0)
+			callees = self.callees.get(entry, set())
+			self._scan_function(entry, stops)
+			if direct & ~self.direct[entry] or not callees <= self.callees[entry]:
+				shrunk = True
+
+		functions = set(affected)
+		for entry in self._summarize(affected, shrunk):
+			functions.update(self.callers.get(entry, ()))
+		region = set(block[0] for block in removed)
+		region.update(block[0] for block in added)
+		region.update(self._function_starts(functions))
+		return self._resolve(self._propagate(region))
+
+	def _scan_function(self, entry, stops):
+		# what a function's own blocks write and call
+		flow = self.flow
+		opcodes = flow.opcodes
+		for start in self.blocks_of.get(entry, ()):
+			self.owners.get(start, set()).discard(entry)
+		for callee in self.callees.get(entry, ()):
+			self.callers[callee].discard(entry)
+
+		slots = 0
+		called = set()
+		starts = []
+		for start, end, successors in flow.function_blocks(entry):
+			starts.append(start)
+			for addr in range(start, end):
+				opcode = opcodes[addr]
+				if flow.flow_kind(opcode) == FLOW_CALL:
+					called.add(OPVALUE_TABLE[opcode])
+				else:
+					slots |= written_slots(opcode)
+			# tail calls count as calls
+			called.update(s for s in successors if s in stops and s != entry)
+
+		self.direct[entry] = slots
+		self.callees[entry] = called
+		self.blocks_of[entry] = starts
+		for start in starts:
+			self.owners.setdefault(start, set()).add(entry)
+		for callee in called:
+			self.callers.setdefault(callee, set()).add(entry)
+
+	def _summarize(self, entries, shrunk):
+		# bring the summaries of entries, whose own blocks changed, and
+		# of everything calling them up to date; returns the functions
+		# whose summaries changed. If any of them might have lost bits,
+		# their callers start again from what they write themselves
+		summaries = self.summaries
+		callers = self.callers
+		work = list(entries)
+		if shrunk:
+			seen = set(entries)
+			while work:
+				for caller in callers.get(work.pop(), ()):
+					if caller not in seen:
+						seen.add(caller)
+						work.append(caller)
+			work = list(seen)
+		old = dict((entry, summaries.get(entry)) for entry in work)
+		for entry in work:
+			base = self.direct[entry]
+			summaries[entry] = base if shrunk else base | summaries.get(entry, 0)
+
+		queued = set(work)
+		for entry in old:
+			if summaries[entry] != old[entry]:
+				for caller in callers.get(entry, ()):
+					if caller not in queued:
+						queued.add(caller)
+						work.append(caller)
+		while work:
+			entry = work.pop()
+			queued.discard(entry)
+			slots = summaries[entry]
+			for callee in self.callees[entry]:
+				slots |= summaries.get(callee, 0)
+			if slots != summaries[entry]:
+				old.setdefault(entry, summaries[entry])
+				summaries[entry] = slots
+				for caller in callers.get(entry, ()):
+					if caller not in queued:
+						queued.add(caller)
+						work.append(caller)
+		return [entry for entry, slots in old.items() if summaries[entry] != slots]
+
+	def _propagate(self, region):
+		# work out the states of the blocks starting in region again,
+		# taking whatever arrives from outside it as it is; returns the
+		# starts of every block whose state was worked out.
+		#
+		# States only lose bits as they're worked out, so a block outside
+		# region that something lower arrives at just goes along with it.
+		# If what arrives there goes up instead (or away), the block may
+		# be stuck lower than it should be (held down by a loop), so the
+		# functions it's part of join region and it all starts again
+		flow = self.flow
+		opcodes = flow.opcodes
+		block_index = flow.block_index
+		states = self.states
+		arrivals = self.arrivals
+		sent = self.sent
+		summaries = self.summaries
+		region = set(region)
+		visited = set()
+
+		while True:
+			popped = {}
+			for start in region:
+				for addr, source in sent.pop(start, ()):
+					state = arrivals[addr].pop(source, None)
+					if addr not in region:
+						popped[(addr, source)] = state
+				states.pop(start, None)
+
+			work = []
+			for start in sorted(region):
+				if start in block_index and arrivals.get(start):
+					states[start] = meet_all(arrivals[start].values())
+					work.append(start)
+			queued = set(work)
+			visited.update(region)
+			raised = set()
+
+			while work:
+				start = work.pop()
+				queued.discard(start)
+				visited.add(start)
+				start, end, successors = block_index[start]
+				state = states[start]
+				out = []
+				for addr in range(start, end):
+					opcode = opcodes[addr]
+					if flow.flow_kind(opcode) == FLOW_CALL:
+						target = OPVALUE_TABLE[opcode]
+						out.append((target, ~addr, state))
+						state = forget(state, summaries.get(target, 0))
+					else:
+						state = transfer(state, opcode)
+				for successor in successors:
+					out.append((successor, start, state))
+
+				sent[start] = [(addr, source) for addr, source, state in out]
+				for addr, source, state in out:
+					arrived = arrivals.setdefault(addr, {})
+					before = arrived.get(source)
+					arrived[source] = state
+					if addr not in block_index:
+						continue
+					if addr not in region and before is not None and meet(before, state) != state:
+						raised.add(addr)
+						continue
+					old = states.get(addr)
+					new = state if old is None else meet(old, state)
+					if new != old:
+						states[addr] = new
+						if addr not in queued:
+							queued.add(addr)
+							work.append(addr)
+
+			for (addr, source), state in popped.items():
+				if addr in block_index and addr not in region:
+					now = arrivals[addr].get(source)
+					if now is None or meet(state, now) != now:
+						raised.add(addr)
+			if not raised:
+				return visited
+			functions = set()
+			for addr in raised:
+				region.add(addr)
+				functions.update(self.owners.get(addr, ()))
+			region.update(self._function_starts(functions))
+
+	def _function_starts(self, functions):
+		# the starts of the blocks of functions and of everything on a
+		# call cycle through them, which could carry states back in
+		starts = set()
+		done = set()
+		for entry in functions:
+			if entry in done:
+				continue
+			cycle = self._call_cycle(entry)
+			done.update(cycle)
+			for member in cycle:
+				starts.update(self.blocks_of[member])
+		return starts
+
+	def _call_cycle(self, entry):
+		# entry and every function that both it calls (directly or not)
+		# and calls it; searches out from it both ways at once, and
+		# stops when either side runs out
+		searches = [(self.callees, self.callers, set([entry]), [entry]),
+			(self.callers, self.callees, set([entry]), [entry])]
+		while True:
+			for edges, back, seen, work in searches:
+				if work:
+					for other in edges.get(work.pop(), ()):
+						if other not in seen:
+							seen.add(other)
+							work.append(other)
+					continue
+				# seen is everything reachable from entry one way, so the
+				# cycle is whatever in it reaches entry the other way
+				cycle = set([entry])
+				work = [entry]
+				while work:
+					for other in back.get(work.pop(), ()):
+						if other in seen and other not in cycle:
+							cycle.add(other)
+							work.append(other)
+				return cycle
+
+	def _resolve(self, starts):
+		# work out the accesses in the blocks starting at starts again;
+		# returns the addresses whose accesses changed
+		flow = self.flow
+		opcodes = flow.opcodes
+		block_index = flow.block_index
+		summaries = self.summaries
+		accesses = self.accesses
+		changed = set()
+		for start in starts:
+			if start not in block_index:
+				continue
+			start, end, successors = block_index[start]
+			state = self.states.get(start)
+			for addr in range(start, end):
+				old = accesses.pop(addr, None)
+				if state is None:
+					if old is not None:
+						changed.add(addr)
+					continue
+				opcode = opcodes[addr]
+				if flow.flow_kind(opcode) == FLOW_CALL:
+					state = forget(state, summaries.get(OPVALUE_TABLE[opcode], 0))
+				else:
+					access = memory_access(opcode)
+					if access is not None:
+						mem = access[0]
+						if mem in (IAR0, IAR1) or mem in BANKED_SFRS:
+							phys = resolve(state, mem)
+							if phys is not None:
+								accesses[addr] = phys
+					state = transfer(state, opcode)
+				if accesses.get(addr) != old:
+					changed.add(addr)
+		return changed
+
+	def notes(self):
+		# address -> text naming what its [m] resolved to, for listings
+		return dict((addr, describe_physical(phys)) for addr, phys in self.accesses.items())
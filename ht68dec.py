@@ -0,0 +1,342 @@
+# Holtek HT68FB560 instruction decoder
+# Shared by ht68-disasm.py and the IDA processor module, so it must
+# not depend on IDA and must keep working under IDA 7.0's Python 2.7.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+from array import array
+
+HTOP_NONE   = 0   # no operand
+HTOP_DATA   = 1   # [m]
+HTOP_DATA_A = 2   # [m],A
+HTOP_A_DATA = 3   # A,[m]
+HTOP_A_IMM  = 4   # A,imm
+HTOP_ADDR   = 5   # program address
+HTOP_BIT    = 6   # [m].i
+
+IDEF_MAGIC_VALUE = 0
+IDEF_MASK        = 1
+IDEF_MNEMONIC    = 2
+IDEF_OP_TYPE     = 3
+IDEF_FEATURE     = 4
+IDEF_COMMENT     = 5
+
+# instruction features; these have the same meaning as IDA's CF_*
+# flags, which the IDA module translates them into
+FL_STOP = 0x0001  # doesn't pass execution to the next instruction
+FL_CALL = 0x0002  # call
+FL_CHG1 = 0x0004  # modifies the first operand
+FL_CHG2 = 0x0008  # modifies the second operand
+FL_USE1 = 0x0100  # uses the first operand
+FL_USE2 = 0x0200  # uses the second operand
+FL_JUMP = 0x4000  # indirect jump (addm to PCL)
+
+INSN_DEFS = [
+	(0x0000, 0xffff, 'nop',     HTOP_NONE,   0,                       'Nothing'),
+	(0x0001, 0xffff, 'clrwdt',  HTOP_NONE,   0,                       'Pre-Clear Watchdog Timer'),
+	(0x0002, 0xffff, 'halt',    HTOP_NONE,   FL_STOP,                 'Enter power down mode'),
+	(0x0003, 0xffff, 'ret',     HTOP_NONE,   FL_STOP,                 'Return from subroutine'),
+	(0x0004, 0xffff, 'reti',    HTOP_NONE,   FL_STOP,                 'Return from interrupt'),
+	(0x0005, 0xffff, 'clrwdt2', HTOP_NONE,   0,                       'Pre-Clear Watchdog Timer 2'),
+	(0x0080, 0xbf80, 'mov',     HTOP_DATA_A, FL_CHG1|FL_USE2,         '[m] := A'),
+	(0x0100, 0xbf80, 'cpla',    HTOP_DATA,   FL_USE1,                 'A := ~[m]'),
+	(0x0180, 0xbf80, 'cpl',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] := ~[m]'),
+	(0x0200, 0xbf80, 'sub',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A -= [m]'),
+	(0x0280, 0xbf80, 'subm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] := A - [m]'),
+	(0x0300, 0xbf80, 'add',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A += [m]'),
+	(0x0380, 0xbf80, 'addm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2|FL_JUMP, '[m] += A'),
+	(0x0400, 0xbf80, 'xor',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A ^= [m]'),
+	(0x0480, 0xbf80, 'xorm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] ^= A'),
+	(0x0500, 0xbf80, 'or',      HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A |= [m]'),
+	(0x0580, 0xbf80, 'orm',     HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] |= A'),
+	(0x0600, 0xbf80, 'and',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A &= [m]'),
+	(0x0680, 0xbf80, 'andm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] &= A'),
+	(0x0700, 0xbf80, 'mov',     HTOP_A_DATA, FL_CHG1|FL_USE2,         'A := [m]'),
+	(0x1000, 0xbf80, 'sza',     HTOP_DATA,   FL_USE1,                 'A := [m]; if (A == 0) skip next'),
+	(0x1080, 0xbf80, 'sz',      HTOP_DATA,   FL_USE1,                 'if ([m] == 0) skip next'),
+	(0x1100, 0xbf80, 'swapa',   HTOP_DATA,   FL_USE1,                 'A := swapNibbles([m])'),
+	(0x1180, 0xbf80, 'swap',    HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] := swapNibbles([m])'),
+	(0x1200, 0xbf80, 'sbc',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A ^= [m]'),
+	(0x1280, 0xbf80, 'sbcm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] ^= A'),
+	(0x1300, 0xbf80, 'adc',     HTOP_A_DATA, FL_USE1|FL_CHG1|FL_USE2, 'A ^= [m]'),
+	(0x1380, 0xbf80, 'adcm',    HTOP_A_DATA, FL_USE1|FL_USE2|FL_CHG2, '[m] ^= A'),
+	(0x1400, 0xbf80, 'inca',    HTOP_DATA,   FL_USE1,                 'A := [m] + 1'),
+	(0x1480, 0xbf80, 'inc',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m]++'),
+	(0x1500, 0xbf80, 'deca',    HTOP_DATA,   FL_USE1,                 'A := [m] - 1'),
+	(0x1580, 0xbf80, 'dec',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m]--'),
+	(0x1600, 0xbf80, 'siza',    HTOP_DATA,   FL_USE1,                 'A := [m] + 1; if (A == 0) skip next'),
+	(0x1680, 0xbf80, 'siz',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m]++; if ([m] == 0) skip next'),
+	(0x1700, 0xbf80, 'sdza',    HTOP_DATA,   FL_USE1,                 'A := [m] - 1; if (A == 0) skip next'),
+	(0x1780, 0xbf80, 'sdz',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m]--; if ([m] == 0) skip next'),
+	(0x1800, 0xbf80, 'rla',     HTOP_DATA,   FL_USE1,                 'A := [m] rotLeft 1'),
+	(0x1880, 0xbf80, 'rl',      HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] rotLeft 1'),
+	(0x1900, 0xbf80, 'rra',     HTOP_DATA,   FL_USE1,                 'A := [m] rotRight 1'),
+	(0x1980, 0xbf80, 'rr',      HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] rotRight 1'),
+	(0x1a00, 0xbf80, 'rlca',    HTOP_DATA,   FL_USE1,                 'A := [m] rotLeft 1   (with carry)'),
+	(0x1a80, 0xbf80, 'rlc',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] rotLeft 1   (with carry)'),
+	(0x1b00, 0xbf80, 'rrca',    HTOP_DATA,   FL_USE1,                 'A := [m] rotRight 1  (with carry)'),
+	(0x1b80, 0xbf80, 'rrc',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] rotRight 1  (with carry)'),
+	(0x1d00, 0xbf80, 'tabrd',   HTOP_DATA,   FL_CHG1,                 'TBLH:[m] := program[TBHP:TBLP]'),
+	(0x1e80, 0xbf80, 'daa',     HTOP_DATA,   FL_CHG1,                 '[m] = bcdAdjust(A)'),
+	(0x1f00, 0xbf80, 'clr',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] := 0'),
+	(0x1f80, 0xbf80, 'set',     HTOP_DATA,   FL_USE1|FL_CHG1,         '[m] := FFh'),
+	(0x0900, 0xff00, 'ret',     HTOP_A_IMM,  FL_CHG1|FL_USE2|FL_STOP, 'A := imm; return'),
+	(0x0a00, 0xff00, 'sub',     HTOP_A_IMM,  FL_USE1|FL_CHG1|FL_USE2, 'A -= imm'),
+	(0x0b00, 0xff00, 'add',     HTOP_A_IMM,  FL_USE1|FL_CHG1|FL_USE2, 'A += imm'),
+	(0x0c00, 0xff00, 'xor',     HTOP_A_IMM,  FL_USE1|FL_CHG1|FL_USE2, 'A ^= imm'),
+	(0x0d00, 0xff00, 'or',      HTOP_A_IMM,  FL_USE1|FL_CHG1|FL_USE2, 'A |= imm'),
+	(0x0e00, 0xff00, 'and',     HTOP_A_IMM,  FL_USE1|FL_CHG1|FL_USE2, 'A &= imm'),
+	(0x0f00, 0xff00, 'mov',     HTOP_A_IMM,  FL_CHG1|FL_USE2,         'A := imm'),
+	(0x2000, 0x3800, 'call',    HTOP_ADDR,   FL_CALL|FL_USE1,         'call addr'),
+	(0x2800, 0x3800, 'jmp',     HTOP_ADDR,   FL_STOP|FL_USE1,         'jump to addr'),
+	(0x3000, 0xbc00, 'set',     HTOP_BIT,    FL_CHG1|FL_USE2,         '[m] := 1'),
+	(0x3400, 0xbc00, 'clr',     HTOP_BIT,    FL_CHG1|FL_USE2,         '[m] := 0'),
+	(0x3800, 0xbc00, 'snz',     HTOP_BIT,    FL_USE1|FL_USE2,         'if ([m] != 0) skip next'),
+	(0x3c00, 0xbc00, 'sz',      HTOP_BIT,    FL_USE1|FL_USE2,         'if ([m] == 0) skip next'),
+]
+
+class NiceEnum(object):
+	pass
+
+def get_itype_name(itype):
+	# choose a non-conflicting name for certain instructions
+	d = INSN_DEFS[itype]
+	name = 'i_' + d[IDEF_MNEMONIC]
+	if d[IDEF_OP_TYPE] == HTOP_BIT:
+		name += '_bit'
+	elif d[IDEF_OP_TYPE] == HTOP_A_IMM:
+		name += '_imm'
+	return name
+
+itypes = NiceEnum()
+for _itype in range(len(INSN_DEFS)):
+	setattr(itypes, get_itype_name(_itype), _itype)
+
+SKIP_ITYPES = set((itypes.i_sza, itypes.i_sz, itypes.i_siza, itypes.i_siz, itypes.i_sdza, itypes.i_sdz, itypes.i_snz_bit, itypes.i_sz_bit))
+
+PCL_ADDR = 0x06
+
+# the reset and interrupt vectors
+VECTORS = [
+	(0x00, 'ResetVector'),
+	(0x04, 'Interrupt_INT0_Pin'),
+	(0x08, 'Interrupt_INT1_Pin'),
+	(0x0C, 'Interrupt_USB'),
+	(0x10, 'Interrupt_MFunct0'),
+	(0x14, 'Interrupt_MFunct1'),
+	(0x18, 'Interrupt_MFunct2'),
+	(0x1C, 'Interrupt_MFunct3'),
+	(0x20, 'Interrupt_SIM'),
+	(0x24, 'Interrupt_SPIA'),
+	(0x28, 'Interrupt_LVD'),
+]
+
+# how each instruction affects control flow, for analyses that walk
+# the code outside IDA
+FLOW_NEXT = 0       # falls through to the next word
+FLOW_SKIP = 1       # may skip the next word
+FLOW_STOP = 2       # never falls through (ret, reti, halt)
+FLOW_JUMP = 3       # unconditional jump to its address operand
+FLOW_CALL = 4       # call to its address operand, then falls through
+FLOW_ADDM = 5       # falls through, unless it's 'addm A,PCL' (jump table)
+
+def get_flow_kind(itype):
+	feature = INSN_DEFS[itype][IDEF_FEATURE]
+	if itype in SKIP_ITYPES:
+		return FLOW_SKIP
+	elif itype == itypes.i_jmp:
+		return FLOW_JUMP
+	elif feature & FL_CALL:
+		return FLOW_CALL
+	elif feature & FL_STOP:
+		return FLOW_STOP
+	elif feature & FL_JUMP:
+		return FLOW_ADDM
+	else:
+		return FLOW_NEXT
+
+FLOW_KINDS = [get_flow_kind(itype) for itype in range(len(INSN_DEFS))]
+
+# instruction cycles, as ht68sim counts them: two for anything that
+# loads the PC (jmp, call and the returns) and for tabrd, one for the
+# rest; a skip that's taken, or writing PCL, costs one more
+SKIP_TAKEN_CYCLES = 1
+PCL_WRITE_CYCLES = 1
+
+def get_cycle_cost(itype):
+	d = INSN_DEFS[itype]
+	if d[IDEF_MNEMONIC] in ('jmp', 'call', 'ret', 'reti', 'tabrd'):
+		return 2
+	return 1
+
+CYCLE_COSTS = [get_cycle_cost(itype) for itype in range(len(INSN_DEFS))]
+
+
+def operand_fields(op):
+	# extract (data address, immediate, program address, bit number)
+	# from an opcode; works on plain ints and numpy arrays alike
+	data = (op & 0x7F) | ((op >> 7) & 0x80)
+	imm = op & 0xFF
+	addr = (op & 0x7FF) | ((op >> 3) & 0x1800)
+	bit = (op >> 7) & 7
+	return data, imm, addr, bit
+
+
+def fill_dispatch(table, magic, mask, value):
+	# store value in every slot of a 65536-entry opcode table that
+	# matches (op & mask) == magic and hasn't been claimed yet, by
+	# walking all subsets of the bits the mask doesn't care about;
+	# so filling in definition order gives first-match priority
+	if (magic & mask) != magic:
+		return
+	free = ~mask & 0xFFFF
+	sub = 0
+	while True:
+		op = magic | sub
+		if table[op] < 0:
+			table[op] = value
+		if sub == free:
+			break
+		sub = (sub - free) & free
+
+
+def _build_itype_table():
+	table = array('b', [-1]) * 0x10000
+	for itype, d in enumerate(INSN_DEFS):
+		fill_dispatch(table, d[IDEF_MAGIC_VALUE], d[IDEF_MASK], itype)
+	return table
+
+# opcode -> itype (-1 if the opcode doesn't decode)
+ITYPE_TABLE = _build_itype_table()
+
+# operand type -> function pulling that operand's value out of an opcode
+OPVALUE_EXTRACTORS = {
+	HTOP_NONE:   lambda op: None,
+	HTOP_DATA:   lambda op: (op & 0x7F) | ((op >> 7) & 0x80),
+	HTOP_DATA_A: lambda op: (op & 0x7F) | ((op >> 7) & 0x80),
+	HTOP_A_DATA: lambda op: (op & 0x7F) | ((op >> 7) & 0x80),
+	HTOP_A_IMM:  lambda op: op & 0xFF,
+	HTOP_ADDR:   lambda op: (op & 0x7FF) | ((op >> 3) & 0x1800),
+	HTOP_BIT:    lambda op: ((op & 0x7F) | ((op >> 7) & 0x80), (op >> 7) & 7),
+}
+
+def _build_opvalue_table():
+	table = array('H', [0]) * 0x10000
+	for op in range(0x10000):
+		itype = ITYPE_TABLE[op]
+		if itype >= 0:
+			value = OPVALUE_EXTRACTORS[INSN_DEFS[itype][IDEF_OP_TYPE]](op)
+			if isinstance(value, tuple):
+				value = value[0] | (value[1] << 8)
+			table[op] = value or 0
+	return table
+
+# opcode -> packed operand value: the data address, immediate or
+# program address, or for bit operands (bit << 8) | data address
+OPVALUE_TABLE = _build_opvalue_table()
+
+# itype -> operand type, so callers need not go through INSN_DEFS
+OP_TYPES = [d[IDEF_OP_TYPE] for d in INSN_DEFS]
+
+# itype -> FL_* features
+FEATURES = [d[IDEF_FEATURE] for d in INSN_DEFS]
+
+FEATURE_NAMES = [
+	(FL_STOP, 'STOP'),
+	(FL_CALL, 'CALL'),
+	(FL_CHG1, 'CHG1'),
+	(FL_CHG2, 'CHG2'),
+	(FL_USE1, 'USE1'),
+	(FL_USE2, 'USE2'),
+	(FL_JUMP, 'JUMP'),
+]
+
+
+def get_itype_for_opcode(op):
+	itype = ITYPE_TABLE[op]
+	if itype < 0:
+		return None
+	return itype
+
+def get_opvalue_for_opcode(itype, op):
+	htop = OP_TYPES[itype]
+	if htop == HTOP_NONE:
+		return None
+	value = OPVALUE_TABLE[op]
+	if htop == HTOP_BIT:
+		return (value & 0xFF, value >> 8)
+	return value
+
+def decode(op):
+	# returns (itype, operand value) with the same conventions as
+	# get_opvalue_for_opcode, or (None, None) for a bad opcode
+	itype = ITYPE_TABLE[op]
+	if itype < 0:
+		return (None, None)
+	return (itype, get_opvalue_for_opcode(itype, op))
+
+def memory_access(op):
+	# returns (data address, bit or None, reads, writes) for an
+	# instruction's data memory operand, or None if it hasn't got one;
+	# reads and writes follow the FL_USE/FL_CHG features, like the data
+	# xrefs the IDA module makes
+	itype = ITYPE_TABLE[op]
+	if itype < 0:
+		return None
+	htop = OP_TYPES[itype]
+	if htop == HTOP_A_DATA:
+		use, chg = FL_USE2, FL_CHG2
+	elif htop in (HTOP_DATA, HTOP_DATA_A, HTOP_BIT):
+		use, chg = FL_USE1, FL_CHG1
+	else:
+		return None
+	feature = FEATURES[itype]
+	value = OPVALUE_TABLE[op]
+	bit = value >> 8 if htop == HTOP_BIT else None
+	return (value & 0xFF, bit, bool(feature & use), bool(feature & chg))
+
+
+def format_data_address(addr):
+	# data memory operand in the vendor's syntax, e.g. [45h] or [0C8h];
+	# a hex number can't start with a letter
+	if addr >= 0xA0:
+		return '[0%02Xh]' % addr
+	return '[%02Xh]' % addr
+
+
+def guess_jump_table_end(start, read_opcode):
+	# read_opcode(addr) returns the word at addr, or None if there's
+	# nothing there
+	guaranteed_end = None
+	work_ea = start
+
+	# we want to keep going until we find something that can't
+	# possibly be part of the jump table
+	while work_ea != guaranteed_end:
+		# what's here?
+		op = read_opcode(work_ea)
+		if op is None:
+			break
+		itype = ITYPE_TABLE[op]
+
+		if itype == itypes.i_ret or itype == itypes.i_ret_imm:
+			# ret can be part of the jump table, that's fine
+			# just keep going
+			work_ea += 1
+		elif itype == itypes.i_jmp:
+			target = OPVALUE_TABLE[op]
+			if guaranteed_end is None or target < guaranteed_end:
+				# we know that if we're jumping to an instruction,
+				# then that's definitely _after_ the jump table
+				# so we consider that to be a point where we must end
+				guaranteed_end = target
+			work_ea += 1
+		else:
+			# this is not a ret or a jump
+			# so it's probably not part of the jump table
+			break
+
+	return work_ea - 1
@@ -0,0 +1,466 @@
+# Holtek HT68FB560 control flow analysis
+# Shared by the command line tools; like ht68dec, it sticks to what
+# Python 2.7 supports.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import bisect
+import os
+import struct
+
+from ht68dec import *
+
+
+def read_opcodes(source):
+	# source can be a filename or an open binary file
+	if hasattr(source, 'read'):
+		code = source.read()
+	else:
+		with open(source, 'rb') as f:
+			code = f.read()
+	count = len(code) // 2
+	return list(struct.unpack_from('<%dH' % count, code))
+
+
+def find_images(paths, extensions=('.bin',)):
+	# expand directories into every file inside them with one of the
+	# given extensions
+	images = []
+	for path in paths:
+		if os.path.isdir(path):
+			for dirpath, dirnames, filenames in os.walk(path):
+				dirnames.sort()
+				for filename in sorted(filenames):
+					if os.path.splitext(filename)[1].lower() in extensions:
+						images.append(os.path.join(dirpath, filename))
+		else:
+			images.append(path)
+	return images
+
+
+def load_flow(path, names_path=None):
+	# the image's FlowGraph, with names from names_path or from a names
+	# file next to the image if there is one
+	from ht68match import read_names
+	flow = FlowGraph(read_opcodes(path))
+	if names_path is None:
+		names_path = os.path.splitext(path)[0] + '.names'
+		if not os.path.exists(names_path):
+			names_path = None
+	if names_path is not None:
+		flow.labels.update(read_names(names_path))
+	return flow
+
+
+class FlowGraph(object):
+	# Recursive-descent analysis of a whole image: follows control
+	# flow out from the vectors with a worklist, so that only words
+	# actually reachable as code get treated as instructions, then
+	# splits the code up into basic blocks and generates labels.
+	#
+	# Every word is decoded and visited at most once, so this is
+	# linear in the size of the image.
+
+	def __init__(self, opcodes, entries=VECTORS):
+		self.opcodes = opcodes
+		self.size = len(opcodes)
+
+		self.is_code = bytearray(self.size)
+		self.is_leader = bytearray(self.size)
+		self.functions = set()
+		self.jump_targets = set()
+		self.jump_tables = {}     # addm address -> (first entry, last entry)
+		self.call_sites = []      # (caller address, target)
+		self.labels = {}
+		self.entries = set(addr for addr, name in entries)
+		self._entry_names = list(entries)
+		self._blocks = None
+		self._block_starts = None
+		self._block_index = None
+		# (blocks that went away, blocks that replaced them) in the last
+		# update, if the blocks had been worked out by then
+		self.block_changes = None
+
+		self._follow([addr for addr, name in entries])
+		self._make_labels(entries)
+
+	@property
+	def blocks(self):
+		# (start, end, successors), with end exclusive; worked out when
+		# first needed, since the listings don't use them
+		if self._blocks is None:
+			self._blocks = self._build_blocks()
+			self._block_starts = [block[0] for block in self._blocks]
+		return self._blocks
+
+	@property
+	def block_index(self):
+		# block start -> block
+		if self._block_index is None:
+			self._block_index = dict((block[0], block) for block in self.blocks)
+		return self._block_index
+
+	def flow_kind(self, opcode):
+		itype = ITYPE_TABLE[opcode]
+		if itype < 0:
+			return None
+		return FLOW_KINDS[itype]
+
+	def _follow(self, entries, resume=(), marked=None, found=None):
+		# resume lists addresses to carry on from without making them
+		# leaders; every word newly found to be code is appended to
+		# marked, if given, and every address that newly became a
+		# leader, call or jump target or jump table entry is added to
+		# found
+		size = self.size
+		opcodes = self.opcodes
+		is_code = self.is_code
+		is_leader = self.is_leader
+
+		work = []
+		for addr in entries:
+			if 0 <= addr < size:
+				is_leader[addr] = 1
+				work.append(addr)
+		work.extend(resume)
+
+		def branch(target):
+			if 0 <= target < size:
+				if found is not None and not is_leader[target]:
+					found.add(target)
+				is_leader[target] = 1
+				if not is_code[target]:
+					work.append(target)
+
+		while work:
+			addr = work.pop()
+
+			while 0 <= addr < size and not is_code[addr]:
+				opcode = opcodes[addr]
+				kind = self.flow_kind(opcode)
+				if kind is None:
+					# not an instruction, so whatever led us here was
+					# probably wrong; don't go any further
+					break
+				is_code[addr] = 1
+				if marked is not None:
+					marked.append(addr)
+
+				if kind == FLOW_NEXT:
+					addr += 1
+				elif kind == FLOW_SKIP:
+					branch(addr + 1)
+					branch(addr + 2)
+					break
+				elif kind == FLOW_CALL:
+					target = OPVALUE_TABLE[opcode]
+					if found is not None and target not in self.functions:
+						found.add(target)
+					self.functions.add(target)
+					self.call_sites.append((addr, target))
+					branch(target)
+					addr += 1
+				elif kind == FLOW_JUMP:
+					target = OPVALUE_TABLE[opcode]
+					if found is not None and target not in self.jump_targets:
+						found.add(target)
+					self.jump_targets.add(target)
+					branch(target)
+					break
+				elif kind == FLOW_ADDM and OPVALUE_TABLE[opcode] == PCL_ADDR:
+					start = addr + 1
+					end = guess_jump_table_end(start, self.read_opcode)
+					self.jump_tables[addr] = (start, end)
+					for entry in range(start, end + 1):
+						if found is not None:
+							found.add(entry)
+						branch(entry)
+					break
+				elif kind == FLOW_ADDM:
+					addr += 1
+				else:
+					break
+
+	def read_opcode(self, addr):
+		if 0 <= addr < self.size:
+			return self.opcodes[addr]
+		return None
+
+	def _flow_effects(self, addr, opcode):
+		# what an instruction contributes to the analysis, as a set that
+		# only grows as the instruction gains successors; None if it's
+		# not an instruction, or is an 'addm A,PCL' (whose jump table
+		# depends on the words after it)
+		kind = self.flow_kind(opcode)
+		if kind is None:
+			return None
+		if kind == FLOW_NEXT or (kind == FLOW_ADDM and OPVALUE_TABLE[opcode] != PCL_ADDR):
+			return set([('fall', addr + 1)])
+		elif kind == FLOW_SKIP:
+			return set([('fall', addr + 1), ('branch', addr + 1), ('fall', addr + 2), ('branch', addr + 2)])
+		elif kind == FLOW_CALL:
+			target = OPVALUE_TABLE[opcode]
+			return set([('fall', addr + 1), ('fall', target), ('branch', target), ('call', target)])
+		elif kind == FLOW_JUMP:
+			target = OPVALUE_TABLE[opcode]
+			return set([('fall', target), ('branch', target), ('jump', target)])
+		elif kind == FLOW_STOP:
+			return set()
+		return None
+
+	def _reached(self, addr):
+		# whether the analysis already arrived at addr, even if it
+		# stopped there because it wasn't an instruction
+		if self.is_leader[addr]:
+			return True
+		prev = addr - 1
+		if prev < 0 or not self.is_code[prev]:
+			return False
+		return ('fall', addr) in (self._flow_effects(prev, self.opcodes[prev]) or ())
+
+	def update(self, changes, found=None):
+		# changes maps addresses to new opcodes. Edits that only add to
+		# the control flow (what a patch usually does: some padding
+		# filled in with new code and a word turned into a call to it)
+		# carry on from the existing analysis, so take time in
+		# proportion to the new code, and only redo the labels and
+		# basic blocks around it. Anything that could take flow away
+		# means analysing the whole image again.
+		#
+		# Returns the addresses that became code, or None if the whole
+		# image was analysed again. Otherwise, found (if given) gets the
+		# addresses that became branch or call targets, which are the
+		# only ones whose labels were regenerated (so any names applied
+		# on top need applying again there)
+		resume = []
+		for addr in sorted(changes):
+			opcode = changes[addr]
+			if self.is_code[addr]:
+				old = self._flow_effects(addr, self.opcodes[addr])
+				new = self._flow_effects(addr, opcode)
+				if old is None or new is None or not old <= new:
+					return self._reanalyze(changes)
+				resume.append(addr)
+			elif self._reached(addr):
+				resume.append(addr)
+		for first, last in self.jump_tables.values():
+			for addr in changes:
+				if first - 1 <= addr <= last + 1:
+					return self._reanalyze(changes)
+
+		for addr, opcode in changes.items():
+			self.opcodes[addr] = opcode
+		was_code = set(addr for addr in resume if self.is_code[addr])
+		if was_code:
+			self.call_sites = [site for site in self.call_sites if site[0] not in was_code]
+		for addr in was_code:
+			self.is_code[addr] = 0
+		marked = []
+		if found is None:
+			found = set()
+		self._follow([], resume, marked, found)
+		self.block_changes = None
+		if self._blocks is not None:
+			dirty = set(changes)
+			dirty.update(marked)
+			dirty.update(addr for addr in found if 0 <= addr < self.size)
+			self.block_changes = self._update_blocks(dirty)
+		self._relabel(found)
+		return [addr for addr in marked if addr not in was_code]
+
+	def _reanalyze(self, changes):
+		for addr, opcode in changes.items():
+			self.opcodes[addr] = opcode
+		self.__init__(self.opcodes, self._entry_names)
+		return None
+
+	def _build_blocks(self):
+		size = self.size
+		is_code = self.is_code
+
+		blocks = []
+		addr = 0
+		while addr < size:
+			if not is_code[addr]:
+				addr += 1
+				continue
+			block = self._scan_block(addr)
+			blocks.append(block)
+			addr = block[1]
+		return blocks
+
+	def _scan_block(self, start):
+		# the basic block starting at start, which must be code
+		size = self.size
+		opcodes = self.opcodes
+		is_code = self.is_code
+		is_leader = self.is_leader
+
+		addr = start
+		while True:
+			opcode = opcodes[addr]
+			kind = self.flow_kind(opcode)
+			addr += 1
+
+			if kind == FLOW_SKIP:
+				successors = [a for a in (addr, addr + 1) if a < size]
+				break
+			elif kind == FLOW_JUMP:
+				target = OPVALUE_TABLE[opcode]
+				successors = [target] if target < size else []
+				break
+			elif kind == FLOW_STOP:
+				successors = []
+				break
+			elif (addr - 1) in self.jump_tables:
+				first, last = self.jump_tables[addr - 1]
+				successors = list(range(first, last + 1))
+				break
+			elif addr >= size or not is_code[addr] or is_leader[addr]:
+				successors = [addr] if addr < size and is_code[addr] else []
+				break
+
+		return (start, addr, successors)
+
+	def _update_blocks(self, dirty):
+		# rescan the blocks holding (or ending just before) the dirty
+		# addresses, carrying on until the new blocks line up with the
+		# old ones again; returns (old blocks, new blocks)
+		size = self.size
+		is_code = self.is_code
+		blocks = self._blocks
+		starts = self._block_starts
+		index = self.block_index
+
+		removed = []
+		added = []
+		scanned = 0
+		for addr in sorted(dirty | set(addr - 1 for addr in dirty)):
+			if addr < scanned or not 0 <= addr < size:
+				continue
+			i = bisect.bisect_right(starts, addr) - 1
+			if i >= 0 and addr < blocks[i][1]:
+				start = blocks[i][0]
+			elif is_code[addr]:
+				start = addr
+				i += 1
+			else:
+				continue
+
+			new = []
+			pos = start
+			while True:
+				block = self._scan_block(pos)
+				new.append(block)
+				pos = block[1]
+				if pos > addr and (pos >= size or not is_code[pos] or pos in index):
+					break
+			j = bisect.bisect_left(starts, pos, i)
+			for block in blocks[i:j]:
+				del index[block[0]]
+			removed.extend(blocks[i:j])
+			blocks[i:j] = new
+			starts[i:j] = [block[0] for block in new]
+			for block in new:
+				index[block[0]] = block
+			added.extend(new)
+			scanned = pos
+		return removed, added
+
+	def function_entries(self):
+		return sorted(self.functions | self.entries)
+
+	def function_blocks(self, entry):
+		# the blocks making up the function starting at entry, in address
+		# order: everything reachable from it without following calls,
+		# stopping at jumps into other functions (tail calls)
+		block_index = self.block_index
+		stops = self.functions | self.entries
+
+		seen = set([entry])
+		work = [entry]
+		found = []
+		while work:
+			block = block_index.get(work.pop())
+			if block is None:
+				continue
+			found.append(block)
+			for successor in block[2]:
+				if successor not in seen and successor not in stops:
+					seen.add(successor)
+					work.append(successor)
+		found.sort()
+		return found
+
+	def function_calls(self, entry):
+		# call targets made by a function, in address order
+		calls = []
+		opcodes = self.opcodes
+		for start, end, successors in self.function_blocks(entry):
+			for addr in range(start, end):
+				opcode = opcodes[addr]
+				if self.flow_kind(opcode) == FLOW_CALL:
+					calls.append(OPVALUE_TABLE[opcode])
+		return calls
+
+	def function_tail_calls(self, entry):
+		# functions a function jumps into instead of calling, directly
+		# or through a jump table, in address order
+		stops = self.functions | self.entries
+		targets = set()
+		for start, end, successors in self.function_blocks(entry):
+			targets.update(s for s in successors if s in stops and s != entry)
+		return sorted(targets)
+
+	def _make_labels(self, entries):
+		labels = self.labels
+		for target in self.jump_targets:
+			labels[target] = 'loc_%04X' % target
+		for addm_addr, (first, last) in self.jump_tables.items():
+			for entry in range(first, last + 1):
+				labels[entry] = 'jtbl_%04X_case_%02X' % (addm_addr, entry - first)
+		for target in self.functions:
+			labels[target] = 'sub_%04X' % target
+		for addr, name in entries:
+			labels[addr] = name
+
+	def _relabel(self, addrs):
+		# what _make_labels would give addrs, without going through
+		# every label
+		labels = self.labels
+		entry_names = dict(self._entry_names)
+		for addr in addrs:
+			if addr in entry_names:
+				labels[addr] = entry_names[addr]
+			elif addr in self.functions:
+				labels[addr] = 'sub_%04X' % addr
+			else:
+				case = None
+				for addm_addr, (first, last) in self.jump_tables.items():
+					if first <= addr <= last:
+						case = 'jtbl_%04X_case_%02X' % (addm_addr, addr - first)
+				if case is not None:
+					labels[addr] = case
+				elif addr in self.jump_targets:
+					labels[addr] = 'loc_%04X' % addr
+
+	def iter_listing(self, mcu, start=0, end=None, notes=None):
+		# yields (address, opcode, label or None, text); anything that
+		# isn't reachable code comes out as a data word. mcu is anything
+		# with a disasm(opcode, labels) method; notes optionally maps
+		# addresses to comments to put after their instructions
+		labels = self.labels
+		notes = notes or {}
+		end = self.size if end is None else min(end, self.size)
+		for addr in range(max(start, 0), end):
+			opcode = self.opcodes[addr]
+			if self.is_code[addr]:
+				text = mcu.disasm(opcode, labels)
+				if addr in notes:
+					text = '%s ; %s' % (text, notes[addr])
+			else:
+				text = 'DW %04Xh' % opcode
+			yield (addr, opcode, labels.get(addr), text)
@@ -0,0 +1,353 @@
+# Incremental listings, for ht68-disasm.py --incremental and --watch
+#
+# Keeps everything needed to bring a listing up to date after a few
+# words of the image change: the rendered lines, the words they came
+# from (hashed a chunk at a time, so finding the changes is cheap) and,
+# with analysis, the FlowGraph and BankAnalysis. An update only
+# re-renders the words that changed and whatever depends on them: words
+# that became code, labels that appeared or moved, the jumps and calls
+# naming those labels, and accesses whose bank or pointer (see
+# ht68banks.py) resolves differently. Writing the listing out again only
+# rewrites those lines, unless one of them changed length, in which case
+# everything after it has to move.
+
+import hashlib
+import locale
+import os
+import pickle
+import struct
+import time
+from array import array
+
+from ht68banks import BankAnalysis, describe_physical
+from ht68dec import *
+from ht68flow import FlowGraph
+
+# words per hashed chunk
+INCR_CHUNK_SIZE = 0x100
+
+STATE_VERSION = 3
+
+
+def chunk_hashes(data):
+	view = memoryview(data)
+	step = INCR_CHUNK_SIZE * 2
+	return [hashlib.sha1(view[i:i + step]).digest() for i in range(0, len(view), step)]
+
+
+def listing_key(mcu, analyze, names):
+	# everything besides the image that the rendered lines depend on
+	vendor = hashlib.sha1(pickle.dumps((mcu.mnemonics, mcu.mem_labels), pickle.HIGHEST_PROTOCOL)).hexdigest()
+	return (STATE_VERSION, vendor, bool(analyze), tuple(names or ()))
+
+
+class LineOffsets:
+	# where each line of a listing written to a file starts: a Fenwick
+	# tree of the lines' sizes, so one changing size doesn't mean going
+	# through every line after it
+	def __init__(self, sizes):
+		tree = array('q', [0])
+		tree.extend(sizes)
+		for i in range(1, len(tree)):
+			j = i + (i & -i)
+			if j < len(tree):
+				tree[j] += tree[i]
+		self.tree = tree
+
+	def offset(self, i):
+		# the total size of the lines before the ith one
+		tree = self.tree
+		total = 0
+		while i > 0:
+			total += tree[i]
+			i &= i - 1
+		return total
+
+	def size(self, i):
+		return self.offset(i + 1) - self.offset(i)
+
+	def resize(self, i, size):
+		delta = size - self.size(i)
+		tree = self.tree
+		i += 1
+		while i < len(tree):
+			tree[i] += delta
+			i += i & -i
+
+
+class IncrementalListing:
+	def __init__(self, mcu, analyze=False, names=None):
+		self.mcu = mcu
+		self.analyze = analyze
+		self.names = list(names or ())
+		self.key = listing_key(mcu, analyze, names)
+		self.hashes = None
+		self.opcodes = []
+		self.lines = []       # per address, including any label line
+		self.flow = None
+		self.banks = None
+		self.notes = {}       # with analysis, what banked and indirect accesses resolve to
+		self.referrers = {}   # program address -> addresses of jmp/calls to it
+		self.output = None    # (path, start, end, size, mtime) of the listing as last written
+		self.offsets = None   # LineOffsets of the lines written there
+		self.unwritten = None # addresses rendered since then, or None for everything
+
+	@classmethod
+	def load(cls, path, mcu, analyze=False, names=None):
+		# the saved state, or a fresh one if there's none to be had or
+		# it was made with different settings or vendor data
+		listing = cls(mcu, analyze, names)
+		try:
+			with open(path, 'rb') as f:
+				saved = pickle.load(f)
+		except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+			return listing
+		if not isinstance(saved, cls) or saved.key != listing.key:
+			return listing
+		saved.mcu = mcu
+		return saved
+
+	def save(self, path):
+		with open(path + '.tmp', 'wb') as f:
+			pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+		os.replace(path + '.tmp', path)
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		del state['mcu']
+		return state
+
+	def update(self, data):
+		# bring the listing up to date with data (the whole image);
+		# returns the number of words that had to be rendered again
+		hashes = chunk_hashes(data)
+		if self.hashes is None or len(data) // 2 != len(self.opcodes):
+			self.hashes = hashes
+			return self._rebuild(data)
+
+		size = len(self.opcodes)
+		changes = {}
+		for chunk, (old, new) in enumerate(zip(self.hashes, hashes)):
+			if old == new:
+				continue
+			start = chunk * INCR_CHUNK_SIZE
+			end = min(start + INCR_CHUNK_SIZE, size)
+			words = struct.unpack_from('<%dH' % (end - start), data, start * 2)
+			for addr, opcode in zip(range(start, end), words):
+				if self.opcodes[addr] != opcode:
+					changes[addr] = opcode
+		self.hashes = hashes
+		if not changes:
+			return 0
+
+		stats = self.mcu.stats
+		began = time.perf_counter()
+		for addr in changes:
+			self._unrefer(addr)
+		if self.analyze:
+			dirty = self._update_flow(changes)
+		else:
+			for addr, opcode in changes.items():
+				self.opcodes[addr] = opcode
+			dirty = set(changes)
+		for addr in changes:
+			self._refer(addr)
+		if stats is not None:
+			rendering = time.perf_counter()
+			stats.add_time('analyze', rendering - began)
+
+		if dirty is None:
+			self._render_all(data)
+			return len(self.opcodes)
+		# labels (and so the dirty set) can name call targets past the
+		# end of the image, which have no line of their own
+		size = len(self.opcodes)
+		dirty = set(addr for addr in dirty if 0 <= addr < size)
+		labels = self._labels()
+		for addr in dirty:
+			self.lines[addr] = self._render(addr, labels)
+		if self.unwritten is not None:
+			self.unwritten.update(dirty)
+		if stats is not None:
+			stats.add_time('format', time.perf_counter() - rendering)
+			stats.count_opcodes(self.mcu, [self.opcodes[addr] for addr in dirty])
+		return len(dirty)
+
+	def write_file(self, path, start=0, end=None):
+		# writes the listing to path, the same as the text write_listing
+		# produces; if path still holds what was last written there, only
+		# the lines rendered since then are written (and whatever comes
+		# after one that changed length is moved along). Returns the
+		# number of words written
+		start = max(start, 0)
+		end = len(self.lines) if end is None else max(start, min(end, len(self.lines)))
+		if not self._patch_file(path, start, end):
+			lines = self.lines[start:end]
+			text = ''.join(lines)
+			with open(path, 'wb') as f:
+				f.write(self._encode(text))
+			if os.linesep == '\n' and text.isascii():
+				sizes = map(len, lines)
+			else:
+				sizes = (len(self._encode(line)) for line in lines)
+			self.offsets = LineOffsets(sizes)
+		st = os.stat(path)
+		self.output = (path, start, end, st.st_size, st.st_mtime_ns)
+		self.unwritten = set()
+		return end - start
+
+	def _patch_file(self, path, start, end):
+		# returns False if the whole listing needs writing instead
+		if self.unwritten is None or self.output is None or self.output[:3] != (path, start, end):
+			return False
+		try:
+			st = os.stat(path)
+		except OSError:
+			return False
+		if (st.st_size, st.st_mtime_ns) != self.output[3:]:
+			return False
+
+		offsets = self.offsets
+		with open(path, 'r+b') as f:
+			moved = None   # where in the file it all starts moving along
+			shift = 0      # how far it's moved by so far
+			for addr in sorted(addr for addr in self.unwritten if start <= addr < end):
+				i = addr - start
+				data = self._encode(self.lines[addr])
+				offset = offsets.offset(i) - shift
+				size = offsets.size(i)
+				if moved is None:
+					if len(data) == size:
+						f.seek(offset)
+						f.write(data)
+						continue
+					# everything after this line moves, so read it all in
+					# and write it back out with the new lines in place
+					f.seek(offset)
+					old = f.read()
+					moved = copied = offset
+					pieces = []
+				pieces.append(old[copied - moved:offset - moved])
+				pieces.append(data)
+				copied = offset + size
+				offsets.resize(i, len(data))
+				shift += len(data) - size
+			if moved is not None:
+				pieces.append(old[copied - moved:])
+				f.seek(moved)
+				f.write(b''.join(pieces))
+				f.truncate()
+		return True
+
+	def _encode(self, text):
+		# what writing text to a file opened with open(path, 'w') puts
+		# in the file
+		if os.linesep != '\n':
+			text = text.replace('\n', os.linesep)
+		return text.encode(locale.getpreferredencoding(False))
+
+	def _update_flow(self, changes):
+		# returns the addresses that need rendering again, or None for
+		# all of them
+		flow = self.flow
+		found = set()
+		became_code = flow.update(changes, found)
+		if became_code is None:
+			flow.labels.update(self.names)
+			self.banks = BankAnalysis(flow)
+			self.notes = self.banks.notes()
+			return None
+
+		# only the labels of what flow.update found were regenerated
+		names = dict(self.names)
+		dirty = set(changes)
+		dirty.update(became_code)
+		for addr in found:
+			if addr in names:
+				flow.labels[addr] = names[addr]
+			dirty.add(addr)
+			dirty.update(self.referrers.get(addr, ()))
+		for addr in self.banks.update(found):
+			if addr in self.banks.accesses:
+				self.notes[addr] = describe_physical(self.banks.accesses[addr])
+			else:
+				self.notes.pop(addr, None)
+			dirty.add(addr)
+		return dirty
+
+	def _rebuild(self, data):
+		began = time.perf_counter()
+		count = len(data) // 2
+		self.opcodes = list(struct.unpack_from('<%dH' % count, data))
+		if self.analyze:
+			self.flow = FlowGraph(self.opcodes)
+			self.flow.labels.update(self.names)
+			self.banks = BankAnalysis(self.flow)
+			self.notes = self.banks.notes()
+		self.referrers = {}
+		for addr in range(count):
+			self._refer(addr)
+		if self.mcu.stats is not None:
+			self.mcu.stats.add_time('analyze', time.perf_counter() - began)
+		self._render_all(data)
+		return count
+
+	def _render_all(self, data):
+		# if mcu.stats is set, the words are counted like write_listing
+		# counts them: only code, with analysis
+		stats = self.mcu.stats
+		began = time.perf_counter()
+		if self.analyze:
+			labels = self.flow.labels
+			self.lines = [self._render(addr, labels) for addr in range(len(self.opcodes))]
+			if stats is not None:
+				is_code = self.flow.is_code
+				stats.count_opcodes(self.mcu, [op for addr, op in enumerate(self.opcodes) if is_code[addr]])
+		else:
+			labels = self._labels()
+			self.lines = []
+			for address, opcode, text in self.mcu.iter_disasm(data, 0, None, labels):
+				self.lines.append(self._format(address, opcode, text, labels, False))
+		self.unwritten = None
+		if stats is not None:
+			stats.add_time('format', time.perf_counter() - began)
+
+	def _labels(self):
+		if self.analyze:
+			return self.flow.labels
+		return dict(self.names) if self.names else None
+
+	def _render(self, addr, labels):
+		# the same text ht68-disasm.py's write_listing produces
+		opcode = self.opcodes[addr]
+		if self.analyze:
+			flow = self.flow
+			if flow.is_code[addr]:
+				text = self.mcu.disasm(opcode, labels)
+				if addr in self.notes:
+					text = '%s ; %s' % (text, self.notes[addr])
+			else:
+				text = 'DW %04Xh' % opcode
+			head = addr in flow.functions or addr in flow.entries
+		else:
+			text = self.mcu.disasm(opcode, labels)
+			head = False
+		return self._format(addr, opcode, text, labels, head)
+
+	def _format(self, addr, opcode, text, labels, head):
+		line = '%04x : %04x : %s\n' % (addr, opcode, text)
+		if labels and addr in labels:
+			line = '%s%s:\n%s' % ('\n' if head else '', labels[addr], line)
+		return line
+
+	def _refer(self, addr):
+		opcode = self.opcodes[addr]
+		itype = ITYPE_TABLE[opcode]
+		if itype >= 0 and OP_TYPES[itype] == HTOP_ADDR:
+			self.referrers.setdefault(OPVALUE_TABLE[opcode], set()).add(addr)
+
+	def _unrefer(self, addr):
+		opcode = self.opcodes[addr]
+		itype = ITYPE_TABLE[opcode]
+		if itype >= 0 and OP_TYPES[itype] == HTOP_ADDR:
+			self.referrers.get(OPVALUE_TABLE[opcode], set()).discard(addr)
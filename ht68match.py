@@ -0,0 +1,273 @@
+# Holtek HT68FB560 function matching
+#
+# Carries names over from one firmware release to the next. Both images
+# are run through the flow analysis, every function gets a fingerprint
+# (its instructions with call/jump targets and RAM variable addresses
+# masked out, so code that merely moved still looks the same) and the
+# fingerprints are matched up in three passes:
+#
+# - identical fingerprints that are unique in both images
+# - MinHash signatures bucketed with locality-sensitive hashing, so
+#   only functions that share a bucket are ever compared
+# - the call graph: when two matched functions make the same number of
+#   calls, their callees are paired up in order, as long as they look
+#   alike (or are identical, for ones too short to have a signature)
+#
+# None of this compares every function against every other one, so it
+# stays roughly linear in the size of the images.
+#
+# Names files are plain text, one 'ADDR NAME' per line (hex word
+# address), with ';' starting a comment. ht68-disasm.py takes them with
+# --names, and the IDA module picks up <image>.names when it creates a
+# new database.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import random
+import sys
+import time
+
+from ht68dec import *
+from ht68flow import *
+
+SHINGLE_SIZE = 3
+LSH_BANDS = 8
+LSH_ROWS = 4
+SIGNATURE_SIZE = LSH_BANDS * LSH_ROWS
+MIN_LSH_TOKENS = 4           # anything shorter is too generic to bucket
+MATCH_THRESHOLD = 0.5        # estimated similarity needed for an LSH match
+PROPAGATE_THRESHOLD = 0.25   # ...and for a callee paired through the call graph
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+def _make_minhash_params():
+	rng = random.Random(0x68FB560)
+	return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME)) for i in range(SIGNATURE_SIZE)]
+
+MINHASH_PARAMS = _make_minhash_params()
+
+
+def normalize_opcode(opcode):
+	# turn an opcode into a token that survives relinking: program
+	# addresses are dropped entirely, general purpose RAM addresses
+	# (80h and up) are dropped but a bit number is kept, and special
+	# function registers and immediates are kept as they are
+	itype = ITYPE_TABLE[opcode]
+	if itype < 0:
+		return opcode | 0x1000000
+	htop = OP_TYPES[itype]
+	value = OPVALUE_TABLE[opcode]
+	if htop == HTOP_ADDR:
+		return (itype << 16) | 0xFFFF
+	elif htop == HTOP_BIT and (value & 0xFF) >= 0x80:
+		return (itype << 16) | 0x8000 | (value & 0x700)
+	elif htop in (HTOP_DATA, HTOP_DATA_A, HTOP_A_DATA) and value >= 0x80:
+		return (itype << 16) | 0x8000
+	return (itype << 16) | value
+
+
+class FunctionPrint(object):
+	def __init__(self, flow, entry):
+		self.entry = entry
+		self.addrs = [addr for start, end, successors in flow.function_blocks(entry) for addr in range(start, end)]
+		self.tokens = tuple(normalize_opcode(flow.opcodes[addr]) for addr in self.addrs)
+		self.calls = flow.function_calls(entry)
+		self.signature = self._minhash()
+
+	def _minhash(self):
+		tokens = self.tokens
+		if len(tokens) < MIN_LSH_TOKENS:
+			return None
+		shingles = set(hash(tokens[i:i + SHINGLE_SIZE]) & MERSENNE_PRIME
+			for i in range(len(tokens) - SHINGLE_SIZE + 1))
+		return tuple(min((a * x + b) % MERSENNE_PRIME for x in shingles) for a, b in MINHASH_PARAMS)
+
+	def similarity(self, other):
+		# estimated Jaccard similarity of the two functions' shingles
+		if self.tokens == other.tokens:
+			return 1.0
+		if self.signature is None or other.signature is None:
+			return 0.0
+		same = sum(1 for a, b in zip(self.signature, other.signature) if a == b)
+		return same / float(SIGNATURE_SIZE)
+
+
+def fingerprint_functions(flow):
+	# entry address -> FunctionPrint for every function in the image
+	return dict((entry, FunctionPrint(flow, entry)) for entry in flow.function_entries())
+
+
+def match_functions(old, new, threshold=MATCH_THRESHOLD):
+	# match up two dicts from fingerprint_functions, returning
+	# old entry -> (new entry, how, score)
+	matches = {}
+	taken = set()
+
+	def accept(old_entry, new_entry, how, score):
+		matches[old_entry] = (new_entry, how, score)
+		taken.add(new_entry)
+
+	# identical and unique on both sides
+	old_by_tokens = {}
+	for entry, fp in old.items():
+		old_by_tokens.setdefault(fp.tokens, []).append(entry)
+	new_by_tokens = {}
+	for entry, fp in new.items():
+		new_by_tokens.setdefault(fp.tokens, []).append(entry)
+	for tokens, old_entries in old_by_tokens.items():
+		new_entries = new_by_tokens.get(tokens)
+		if len(old_entries) == 1 and new_entries is not None and len(new_entries) == 1:
+			accept(old_entries[0], new_entries[0], 'exact', 1.0)
+
+	# similar, via LSH buckets
+	buckets = {}
+	for entry, fp in new.items():
+		if entry in taken or fp.signature is None:
+			continue
+		for band in range(LSH_BANDS):
+			key = (band, fp.signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+			buckets.setdefault(key, []).append(entry)
+
+	pairs = []
+	for entry, fp in old.items():
+		if entry in matches or fp.signature is None:
+			continue
+		candidates = set()
+		for band in range(LSH_BANDS):
+			key = (band, fp.signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+			candidates.update(buckets.get(key, ()))
+		for candidate in candidates:
+			score = fp.similarity(new[candidate])
+			if score >= threshold:
+				pairs.append((-score, entry, candidate))
+
+	pairs.sort()
+	for score, old_entry, new_entry in pairs:
+		if old_entry not in matches and new_entry not in taken:
+			accept(old_entry, new_entry, 'similar', -score)
+
+	# and whatever the call graph tells us about the rest
+	work = list(matches.items())
+	while work:
+		old_entry, (new_entry, how, score) = work.pop()
+		old_calls = old[old_entry].calls
+		new_calls = new[new_entry].calls
+		if len(old_calls) != len(new_calls):
+			continue
+		for old_callee, new_callee in zip(old_calls, new_calls):
+			if old_callee in matches or new_callee in taken:
+				continue
+			if old_callee not in old or new_callee not in new:
+				continue
+			# functions too short to have a signature only score when
+			# their normalised instructions are identical
+			score = old[old_callee].similarity(new[new_callee])
+			if score >= PROPAGATE_THRESHOLD:
+				accept(old_callee, new_callee, 'call graph', score)
+				work.append((old_callee, matches[old_callee]))
+
+	return matches
+
+
+def carry_names(old, new, matches, names):
+	# map names from the old image onto the new one, returning a list of
+	# (new address, name, old address, how, score) sorted by address.
+	# Function entries follow their match; other addresses inside a
+	# function are carried over only when the function is unchanged, so
+	# that every instruction has an exact counterpart
+	owners = {}
+	for entry in sorted(old):
+		for index, addr in enumerate(old[entry].addrs):
+			owners.setdefault(addr, (entry, index))
+
+	carried = []
+	for addr, name in names:
+		if addr in matches:
+			new_entry, how, score = matches[addr]
+			carried.append((new_entry, name, addr, how, score))
+		elif addr in owners:
+			entry, index = owners[addr]
+			if entry not in matches:
+				continue
+			new_entry, how, score = matches[entry]
+			if old[entry].tokens == new[new_entry].tokens:
+				carried.append((new[new_entry].addrs[index], name, addr, how, score))
+	carried.sort()
+	return carried
+
+
+def parse_names_address(s):
+	s = s.lower()
+	if s.startswith('0x'):
+		s = s[2:]
+	elif s.endswith('h'):
+		s = s[:-1]
+	return int(s, 16)
+
+
+def read_names(path):
+	# returns a list of (address, name)
+	names = []
+	with open(path, 'r') as f:
+		for number, line in enumerate(f, 1):
+			line = line.split(';', 1)[0].strip()
+			if not line:
+				continue
+			parts = line.split()
+			if len(parts) != 2:
+				raise ValueError('%s:%d: expected an address and a name' % (path, number))
+			names.append((parse_names_address(parts[0]), parts[1]))
+	return names
+
+
+def write_names(out, carried):
+	for new_addr, name, old_addr, how, score in carried:
+		out.write('%04X %s ; was %04X, %s %.2f\n' % (new_addr, name, old_addr, how, score))
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Match functions between two Holtek HT68FB560 program images and carry names over.',
+		epilog='example: %(prog)s old/program.bin new/program.bin -n old/program.names -o new/program.names')
+	parser.add_argument('old_image', help='image the names belong to')
+	parser.add_argument('new_image', help='image to carry the names over to')
+	parser.add_argument('-n', '--names', default=None,
+		help='names file for the old image (default: name every function sub_<old address>)')
+	parser.add_argument('-o', '--output', default=None,
+		help='write the new names file here instead of stdout')
+	parser.add_argument('-t', '--threshold', type=float, default=MATCH_THRESHOLD,
+		help='minimum estimated similarity for matching changed functions (default: %(default)s)')
+	args = parser.parse_args()
+
+	began = time.time()
+	old_flow = FlowGraph(read_opcodes(args.old_image))
+	new_flow = FlowGraph(read_opcodes(args.new_image))
+	old = fingerprint_functions(old_flow)
+	new = fingerprint_functions(new_flow)
+	matches = match_functions(old, new, args.threshold)
+
+	if args.names is not None:
+		names = read_names(args.names)
+	else:
+		names = [(entry, 'sub_%04X' % entry) for entry in sorted(old)]
+	carried = carry_names(old, new, matches, names)
+	elapsed = time.time() - began
+
+	if args.output:
+		with open(args.output, 'w') as out:
+			write_names(out, carried)
+	else:
+		write_names(sys.stdout, carried)
+
+	hows = [how for new_entry, how, score in matches.values()]
+	sys.stderr.write('matched %d of %d functions (%d exact, %d similar, %d by call graph) in %.2fs\n' % (
+		len(matches), len(old), hows.count('exact'), hows.count('similar'), hows.count('call graph'), elapsed))
+	sys.stderr.write('carried over %d of %d names\n' % (len(carried), len(names)))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,498 @@
+# Holtek MCU definitions, loaded from the HT-IDE3000 vendor files
+# (<name>.fmt for the instruction set, <name>.inc for register names),
+# and the disassembler built on them.
+
+import contextlib
+import hashlib
+import mmap
+import os
+import pickle
+import re
+import struct
+import time
+
+from ht68dec import *
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# The vendor files are simple enough that a handful of regexes get
+# through them in one pass; these mirror the grammar the old parsec
+# parsers accepted.
+NUMBER = r'(?:[0-9][0-9a-fA-F]*[hH]|[0-9]+)'
+
+mnemonic_re = re.compile(
+	r'(' + NUMBER + r')\s*,\s*(' + NUMBER + r')\s*,\s*(' + NUMBER + r')\s*,\s*' +
+	r'([a-zA-Z0-9_]+)\s*')
+arg_re = re.compile(r'(?:&([0-9]+)|([a-zA-Z0-9_]+))\s*')
+comma_re = re.compile(r',\s*')
+inc_re = re.compile(
+	r'([a-zA-Z0-9_]+)\s*EQU\s*\[\s*(' + NUMBER + r')\s*\]\s*(?:\.\s*([0-9]+))?')
+
+def parse_number(s):
+	if s[-1] in 'hH':
+		return int(s[:-1], 16)
+	else:
+		return int(s)
+
+def parse_mnemonic_def(line):
+	m = mnemonic_re.match(line)
+	if not m:
+		return None
+	assert parse_number(m.group(1)) == 1
+	required_value = parse_number(m.group(2))
+	mask = parse_number(m.group(3))
+	mnem = m.group(4)
+
+	args = []
+	pos = m.end()
+	while True:
+		m = arg_re.match(line, pos)
+		if not m:
+			break
+		if m.group(1) is not None:
+			args.append(('operand', int(m.group(1))))
+		else:
+			args.append(m.group(2))
+		pos = m.end()
+		m = comma_re.match(line, pos)
+		if not m:
+			break
+		pos = m.end()
+
+	return (required_value, mask, mnem, args)
+
+def parse_inc_def(line):
+	m = inc_re.match(line)
+	if not m:
+		return None
+	name = m.group(1)
+	addr = parse_number(m.group(2))
+	if m.group(3) is not None:
+		return (name, addr, int(m.group(3)))
+	else:
+		return (name, addr, None)
+
+
+# number of words decoded at once when streaming through an image
+DISASM_CHUNK_SIZE = 0x4000
+
+# bump this whenever the layout of the compiled definitions changes
+CACHE_VERSION = 1
+
+class HoltekMCU:
+	def __init__(self, fmt_lines, inc_lines):
+		self.mnemonics = []
+		self.templates = []
+		self.mem_labels = {}
+
+		# set this to a DisasmStats to have disassembly timed and counted
+		self.stats = None
+
+		# maps every possible 16-bit opcode straight to the index of
+		# its mnemonic, so decoding a word is a single lookup instead
+		# of a scan
+		self.dispatch_index = [-1] * 0x10000
+		self._dispatch_array = None
+
+		mode = None
+		for line in fmt_lines:
+			line = line.strip()
+			if not line:
+				continue
+			elif line.startswith('%'):
+				mode = line[1:]
+			elif mode == 'mnemonic':
+				self.add_mnemonic_from_str(line)
+		
+		for line in inc_lines:
+			c = line.find(';')
+			if c > -1:
+				line = line[:c]
+			line = line.strip()
+			if not line:
+				continue
+			
+			inc = parse_inc_def(line)
+			if inc:
+				name, addr, bit = inc
+				key = (addr, bit)
+				if key not in self.mem_labels:
+					self.mem_labels[key] = name
+
+		self.build_operand_tables()
+
+	@classmethod
+	def load(cls, mcu_name, vendor_dir='vendor-data', use_cache=True):
+		# load vendor-data/<mcu_name>.fmt and .inc, going through a
+		# compiled cache (keyed by the hashes of both files) if we can
+		base = os.path.join(vendor_dir, mcu_name)
+		with open(base + '.fmt', 'rb') as f:
+			fmt_data = f.read()
+		with open(base + '.inc', 'rb') as f:
+			inc_data = f.read()
+
+		key = (CACHE_VERSION, hashlib.sha1(fmt_data).hexdigest(), hashlib.sha1(inc_data).hexdigest())
+		cache_name = base + '.cache'
+
+		if use_cache:
+			# anything wrong with the cache (unreadable, truncated, or left
+			# by a version that laid it out differently) just means it's
+			# rebuilt; unpickling can raise nearly anything
+			try:
+				with open(cache_name, 'rb') as f:
+					cached = pickle.load(f)
+				if isinstance(cached, dict) and cached.get('key') == key:
+					return cls.from_compiled(cached['mnemonics'], cached['mem_labels'])
+			except Exception:
+				pass
+
+		mcu = cls(fmt_data.decode('latin-1').splitlines(), inc_data.decode('latin-1').splitlines())
+
+		if use_cache:
+			cached = {'key': key, 'mnemonics': mcu.mnemonics, 'mem_labels': mcu.mem_labels}
+			try:
+				with open(cache_name + '.tmp', 'wb') as f:
+					pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+				os.replace(cache_name + '.tmp', cache_name)
+			except OSError:
+				# a read-only vendor-data folder just means no cache
+				pass
+
+		return mcu
+
+	@classmethod
+	def from_compiled(cls, mnemonics, mem_labels):
+		mcu = cls([], [])
+		for mnem in mnemonics:
+			mcu.add_mnemonic(mnem)
+		mcu.mem_labels = mem_labels
+		mcu.build_operand_tables()
+		return mcu
+
+	def __reduce__(self):
+		# the dispatch tables are cheap to rebuild but big to pickle,
+		# so only ship the definitions themselves to other processes
+		return (self.__class__.from_compiled, (self.mnemonics, self.mem_labels))
+
+	def add_mnemonic_from_str(self, s):
+		mnem = parse_mnemonic_def(s)
+		assert mnem != None
+		self.add_mnemonic(mnem)
+
+	def add_mnemonic(self, mnem):
+		self.mnemonics.append(mnem)
+		self.templates.append(make_template(mnem))
+		self._dispatch_array = None
+		fill_dispatch(self.dispatch_index, mnem[0], mnem[1], len(self.mnemonics) - 1)
+
+	def build_operand_tables(self):
+		# there are only so many operand values, so render every one of
+		# them up front; formatting an instruction is then just a few
+		# lookups. Call this again after changing mem_labels.
+		self.data_strings = [self.nice_label(addr) for addr in range(0x100)]
+		self.bit_strings = [self.nice_label(addr, bit) for addr in range(0x100) for bit in range(8)]
+		self.imm_strings = ['%02Xh' % val for val in range(0x100)]
+		self.addr_strings = ['%04Xh' % val for val in range(0x2000)]
+
+	def find_mnemonic(self, opcode):
+		index = self.dispatch_index[opcode]
+		if index < 0:
+			return None
+		return self.mnemonics[index]
+
+	def process_arg(self, arg, opcode, labels=None):
+		if isinstance(arg, tuple) and arg[0] == 'operand':
+			data, imm, addr, bit = operand_fields(opcode)
+			return self.render_operand(arg[1], data, imm, addr, bit, labels)
+		else:
+			return arg
+
+	def render_operand(self, kind, data, imm, addr, bit, labels=None):
+		# for correctness, we should be parsing the 'operand'
+		# strings in the fmt file
+		#
+		# the format for these isn't really clear, so let's just
+		# wing it for now...
+		if kind == 1:
+			# data memory
+			return self.data_strings[data]
+		elif kind == 2:
+			# immediate
+			return self.imm_strings[imm]
+		elif kind == 3:
+			# address, named if we were given code labels
+			if labels and addr in labels:
+				return labels[addr]
+			return self.addr_strings[addr]
+		elif kind == 4:
+			# bit of data memory
+			return self.bit_strings[(data << 3) | bit]
+		else:
+			return 'unknown operand type %d' % kind
+
+	def nice_label(self, addr, bit=None):
+		key = (addr, bit)
+		if key in self.mem_labels:
+			return self.mem_labels[key]
+		else:
+			if bit is None:
+				return format_data_address(addr)
+			else:
+				return '%s.%d' % (self.nice_label(addr), bit)
+
+	def render(self, index, data, imm, addr, bit, labels=None):
+		# format an instruction given its mnemonic index and operand
+		# fields, using the precomputed template and operand strings
+		template, kinds = self.templates[index]
+		if not kinds:
+			return template
+		values = []
+		for kind in kinds:
+			if kind == 1:
+				values.append(self.data_strings[data])
+			elif kind == 2:
+				values.append(self.imm_strings[imm])
+			elif kind == 3:
+				if labels and addr in labels:
+					values.append(labels[addr])
+				else:
+					values.append(self.addr_strings[addr])
+			else:
+				values.append(self.bit_strings[(data << 3) | bit])
+		return template % tuple(values)
+
+	def disasm(self, opcode, labels=None):
+		index = self.dispatch_index[opcode]
+		if index < 0:
+			return '<<UNKNOWN>>'
+		data, imm, addr, bit = operand_fields(opcode)
+		return self.render(index, data, imm, addr, bit, labels)
+
+	def decode_image(self, buffer):
+		# decode a whole image at once, returning a structured array
+		# with the mnemonic index (-1 if unknown) and every operand
+		# field for each word
+		if np is None:
+			raise RuntimeError('decode_image requires numpy')
+
+		if self._dispatch_array is None:
+			self._dispatch_array = np.array(self.dispatch_index, dtype=np.int16)
+
+		words = np.frombuffer(buffer, dtype='<u2', count=len(buffer) // 2)
+		data, imm, addr, bit = operand_fields(words)
+
+		fields = np.empty(len(words), dtype=IMAGE_DTYPE)
+		fields['opcode'] = words
+		fields['mnemonic'] = self._dispatch_array[words]
+		fields['data'] = data
+		fields['imm'] = imm
+		fields['addr'] = addr
+		fields['bit'] = bit
+		return fields
+
+	def format_image(self, fields, labels=None):
+		# turn the output of decode_image into text, one line per word
+		render = self.render
+		lines = []
+		for index, data, imm, addr, bit in zip(
+				fields['mnemonic'].tolist(), fields['data'].tolist(),
+				fields['imm'].tolist(), fields['addr'].tolist(),
+				fields['bit'].tolist()):
+			if index < 0:
+				lines.append('<<UNKNOWN>>')
+			else:
+				lines.append(render(index, data, imm, addr, bit, labels))
+		return lines
+
+	def disasm_image(self, buffer):
+		return self.format_image(self.decode_image(buffer))
+
+	def iter_disasm(self, source, start=0, end=None, labels=None):
+		# yield (address, opcode, text) for every word in [start, end)
+		#
+		# source can be a filename, an open binary file or any object
+		# supporting the buffer protocol; files are memory-mapped and
+		# decoded a chunk at a time, so memory use stays constant no
+		# matter how big the image is
+		with map_image(source) as view:
+			yield from self._iter_disasm_buffer(view, start, end, labels)
+
+	def _iter_disasm_buffer(self, view, start, end, labels):
+		view = view.cast('B')
+		count = len(view) // 2
+		start = max(start, 0)
+		end = count if end is None else min(end, count)
+
+		for chunk_start in range(start, end, DISASM_CHUNK_SIZE):
+			chunk_end = min(chunk_start + DISASM_CHUNK_SIZE, end)
+
+			# decode the whole chunk up front, and let go of the view
+			# before yielding so the mapping can always be closed
+			chunk = view[chunk_start * 2:chunk_end * 2]
+			stats = self.stats
+			if stats is not None:
+				began = time.perf_counter()
+			if np is not None:
+				fields = self.decode_image(chunk)
+				chunk.release()
+				opcodes = fields['opcode'].tolist()
+				if stats is not None:
+					stats.count_indexes(np.bincount(fields['mnemonic'] + 1, minlength=len(self.mnemonics) + 1).tolist())
+					decoded = time.perf_counter()
+				lines = self.format_image(fields, labels)
+			else:
+				opcodes = [op for (op,) in struct.iter_unpack('<H', chunk)]
+				chunk.release()
+				if stats is not None:
+					stats.count_opcodes(self, opcodes)
+					decoded = time.perf_counter()
+				lines = [self.disasm(op, labels) for op in opcodes]
+			if stats is not None:
+				stats.add_time('decode', decoded - began)
+				stats.add_time('format', time.perf_counter() - decoded)
+
+			address = chunk_start
+			for opcode, line in zip(opcodes, lines):
+				yield (address, opcode, line)
+				address += 1
+
+
+@contextlib.contextmanager
+def map_image(source):
+	# a memoryview of an image's bytes; source can be a filename, an
+	# open binary file or any object supporting the buffer protocol.
+	# Files are memory-mapped rather than read, and anything taken from
+	# the view has to be let go of before the block ends
+	if isinstance(source, (str, os.PathLike)):
+		with open(source, 'rb') as f:
+			with map_image(f) as view:
+				yield view
+	elif hasattr(source, 'fileno'):
+		if os.fstat(source.fileno()).st_size < 2:
+			# mmap refuses to map empty files
+			yield memoryview(b'')
+			return
+		mm = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			view = memoryview(mm)
+			try:
+				yield view
+			finally:
+				view.release()
+		finally:
+			mm.close()
+	else:
+		yield memoryview(source)
+
+
+class DisasmStats:
+	# Phase timings and a histogram of mnemonics, collected from a
+	# HoltekMCU while it disassembles (attach it as mcu.stats) and by
+	# the tools driving it. Counting works on whole chunks at a time,
+	# so it's cheap enough to leave turned on.
+
+	def __init__(self):
+		self.phases = {}
+		self.counts = []     # per mnemonic index + 1; [0] is unknown words
+
+	def add_time(self, phase, seconds):
+		self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+	def total(self, *phases):
+		return sum(self.phases.get(phase, 0.0) for phase in phases)
+
+	def count_indexes(self, counts):
+		# counts[i] is the number of words with mnemonic index i - 1
+		if len(self.counts) < len(counts):
+			self.counts.extend([0] * (len(counts) - len(self.counts)))
+		for i, n in enumerate(counts):
+			self.counts[i] += n
+
+	def count_opcodes(self, mcu, opcodes):
+		counts = [0] * (len(mcu.mnemonics) + 1)
+		dispatch_index = mcu.dispatch_index
+		for op in opcodes:
+			counts[dispatch_index[op] + 1] += 1
+		self.count_indexes(counts)
+
+	def merge(self, other):
+		for phase, seconds in other.phases.items():
+			self.add_time(phase, seconds)
+		self.count_indexes(other.counts)
+
+	@property
+	def words(self):
+		return sum(self.counts)
+
+	def as_dict(self, mcu):
+		decoding = self.total('analyze', 'decode', 'format')
+		histogram = {}
+		for index, n in enumerate(self.counts[1:]):
+			if n:
+				key = mnemonic_key(mcu.mnemonics[index])
+				histogram[key] = histogram.get(key, 0) + n
+		return {
+			'words': self.words,
+			'unknown': self.counts[0] if self.counts else 0,
+			'words_per_second': self.words / decoding if decoding else None,
+			'phases': dict((phase, round(seconds, 6)) for phase, seconds in self.phases.items()),
+			'mnemonics': histogram,
+		}
+
+
+def mnemonic_key(mnem):
+	# e.g. 'MOV A,&2', in the same form as the .fmt file
+	args = ['&%d' % arg[1] if isinstance(arg, tuple) else arg for arg in mnem[3]]
+	return ('%s %s' % (mnem[2], ','.join(args))).strip()
+
+
+def make_template(mnem):
+	# build a '%s'-style format string for a mnemonic, along with the
+	# operand kinds that fill in each placeholder
+	parts = []
+	kinds = []
+	for arg in mnem[3]:
+		if isinstance(arg, tuple) and arg[0] == 'operand':
+			if arg[1] in (1, 2, 3, 4):
+				parts.append('%s')
+				kinds.append(arg[1])
+			else:
+				parts.append('unknown operand type %d' % arg[1])
+		else:
+			parts.append(arg.replace('%', '%%'))
+	template = '%s %s' % (mnem[2].replace('%', '%%'), ', '.join(parts))
+	if not kinds:
+		template = template.replace('%%', '%')
+	return (template, tuple(kinds))
+
+
+if np is not None:
+	IMAGE_DTYPE = np.dtype([
+		('opcode', '<u2'),
+		('mnemonic', '<i2'),
+		('data', 'u1'),
+		('imm', 'u1'),
+		('addr', '<u2'),
+		('bit', 'u1'),
+	])
+
+	# one record per word, as written by ht68-disasm.py --format npy;
+	# label and target_label index into the label names stored
+	# alongside, or are -1
+	EXPORT_DTYPE = np.dtype([
+		('address', '<u4'),
+		('opcode', '<u2'),
+		('mnemonic', '<i2'),     # HoltekMCU mnemonic index, -1 if unknown
+		('itype', 'i1'),         # ht68dec instruction type, -1 if unknown
+		('data', 'u1'),
+		('imm', 'u1'),
+		('addr', '<u2'),
+		('bit', 'u1'),
+		('flags', '<u2'),        # FL_* features (the same bits as IDA's CF_*)
+		('code', 'u1'),          # 1 if reached as code (or decodable, without --analyze)
+		('label', '<i4'),
+		('target_label', '<i4'),
+	])
@@ -0,0 +1,412 @@
+# Holtek HT68FB560 firmware patcher
+#
+# Checks and applies the patches from patches.md (kept in machine-readable
+# form in patches.json) across any number of firmware images.
+#
+# Each hunk of a patch has a word address, the file offset it sits at in
+# the MTP file, some preceding context bytes, the original bytes and the
+# replacement. Every hunk's context+original and context+patched byte
+# strings go into one Aho-Corasick automaton, so each image is scanned
+# exactly once no matter how many patches are being checked. The patched
+# string stops at its first jmp/call, since relocation may have changed
+# the targets; the rest of an applied hunk is compared with the address
+# bits masked out.
+#
+# A hunk found at its documented place is fine as it is. One found
+# somewhere else (exactly once) is relocated: it's applied where it was
+# found, and any jmp/call in the patch that points into a moved hunk is
+# adjusted to match. Once anything has moved, a jmp/call out to the
+# firmware's own code has to be checked too, since a rebuilt firmware
+# has probably moved that code as well. A target is trusted if the
+# original bytes that were matched jump there as well. Otherwise the
+# patch can list the bytes expected at the target ("targets", word
+# address -> bytes); they're looked for at the documented address and
+# then shifted by however far the hunks moved. Anything else needs
+# checking by hand, and the image isn't written.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from ht68dec import *
+from ht68flow import find_images
+
+# the patch offsets are into the MTP file; a program.bin from
+# mtp-extractor starts straight at word 0
+RAW_IMAGE_EXTENSIONS = ('.bin',)
+
+
+class PatternSearch(object):
+	# Aho-Corasick automaton over byte strings, finding every (possibly
+	# overlapping) occurrence of every pattern in one pass
+
+	def __init__(self, patterns):
+		self.lengths = [len(pattern) for pattern in patterns]
+		self.goto = [{}]
+		self.fail = [0]
+		self.out = [[]]
+
+		for index, pattern in enumerate(patterns):
+			state = 0
+			for byte in bytearray(pattern):
+				next_state = self.goto[state].get(byte)
+				if next_state is None:
+					next_state = len(self.goto)
+					self.goto[state][byte] = next_state
+					self.goto.append({})
+					self.fail.append(0)
+					self.out.append([])
+				state = next_state
+			self.out[state].append(index)
+
+		# breadth first, so a state's failure link is always finished
+		# before its children need it
+		queue = list(self.goto[0].values())
+		while queue:
+			state = queue.pop(0)
+			for byte, child in self.goto[state].items():
+				queue.append(child)
+				fallback = self.fail[state]
+				while fallback and byte not in self.goto[fallback]:
+					fallback = self.fail[fallback]
+				target = self.goto[fallback].get(byte, 0)
+				self.fail[child] = target if target != child else 0
+				self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+	def search(self, data):
+		# returns a list of (start offset, pattern index)
+		goto = self.goto
+		fail = self.fail
+		out = self.out
+		lengths = self.lengths
+		found = []
+		state = 0
+		for offset, byte in enumerate(bytearray(data)):
+			while state and byte not in goto[state]:
+				state = fail[state]
+			state = goto[state].get(byte, 0)
+			if out[state]:
+				for index in out[state]:
+					found.append((offset + 1 - lengths[index], index))
+		return found
+
+
+def parse_bytes(s):
+	return bytes(bytearray(int(part, 16) for part in s.split()))
+
+
+class Hunk(object):
+	def __init__(self, address, offset, context, original, patched):
+		if len(original) != len(patched):
+			raise ValueError('hunk at %04X: original and patched bytes differ in length' % address)
+		if len(patched) % 2:
+			raise ValueError('hunk at %04X: patch is not a whole number of words' % address)
+		self.address = address
+		self.offset = offset
+		self.context = context
+		self.original = original
+		self.patched = patched
+
+	@property
+	def base(self):
+		# file offset of word 0, in the file the offset refers to
+		return self.offset - self.address * 2
+
+	def contains(self, address):
+		return self.address <= address < self.address + len(self.patched) // 2
+
+
+class Patch(object):
+	def __init__(self, name, hunks, targets=None):
+		self.name = name
+		self.hunks = hunks
+		self.targets = targets or {}   # word address -> expected bytes there
+
+	def external_targets(self):
+		# jmp/call targets in the patched code that lie outside the patch
+		targets = set()
+		for hunk in self.hunks:
+			for i, opcode in address_operands(hunk.patched):
+				target = OPVALUE_TABLE[opcode]
+				if not any(h.contains(target) for h in self.hunks):
+					targets.add(target)
+		return targets
+
+
+def load_patches(path):
+	with open(path, 'r') as f:
+		defs = json.load(f)
+	patches = []
+	for d in defs:
+		hunks = [Hunk(int(h['address'], 0), int(h['offset'], 0), parse_bytes(h['context']),
+			parse_bytes(h['original']), parse_bytes(h['patched'])) for h in d['hunks']]
+		targets = dict((int(address, 0), parse_bytes(code)) for address, code in d.get('targets', {}).items())
+		patches.append(Patch(d['name'], hunks, targets))
+	return patches
+
+
+# hunk states
+HUNK_OK = 'ok'                  # original bytes where documented
+HUNK_MOVED = 'moved'            # original bytes found elsewhere
+HUNK_APPLIED = 'applied'        # already patched
+HUNK_MISSING = 'missing'
+HUNK_AMBIGUOUS = 'ambiguous'    # found in several places
+HUNK_UNCHECKED = 'unchecked'    # can be moved, but jumps somewhere that can't be checked
+
+
+class PatchSet(object):
+	def __init__(self, patches):
+		self.patches = patches
+		self.keys = []
+		self.masks = {}
+		patterns = []
+		for patch_index, patch in enumerate(patches):
+			for hunk_index, hunk in enumerate(patch.hunks):
+				# a relocated hunk has different jmp/call targets, so the
+				# applied state is searched for only up to its first
+				# address operand, and the rest is checked with the
+				# address bits masked out
+				mask = address_mask(hunk.patched)
+				self.masks[(patch_index, hunk_index)] = mask
+				fixed = len(hunk.patched)
+				if 0 in bytearray(mask):
+					fixed = bytearray(mask).index(0) & ~1
+				self.keys.append((patch_index, hunk_index, False))
+				patterns.append(hunk.context + hunk.original)
+				self.keys.append((patch_index, hunk_index, True))
+				patterns.append(hunk.context + hunk.patched[:fixed])
+		self.search = PatternSearch(patterns)
+
+	def locate(self, data, base):
+		# returns, for each patch, a list of (state, file offset or None)
+		# per hunk; base is the file offset of word 0 in this image
+		positions = {}
+		for start, index in self.search.search(data):
+			key = self.keys[index]
+			hunk = self.patches[key[0]].hunks[key[1]]
+			offset = start + len(hunk.context)
+			if key[2] and not masked_equal(data[offset:offset + len(hunk.patched)], hunk.patched, self.masks[key[:2]]):
+				continue
+			if (offset - base) % 2 == 0:
+				positions.setdefault(key, []).append(offset)
+
+		results = []
+		for patch_index, patch in enumerate(self.patches):
+			states = []
+			for hunk_index, hunk in enumerate(patch.hunks):
+				expected = hunk.offset - hunk.base + base
+				original = positions.get((patch_index, hunk_index, False), [])
+				applied = positions.get((patch_index, hunk_index, True), [])
+				if expected in original:
+					states.append((HUNK_OK, expected))
+				elif expected in applied:
+					states.append((HUNK_APPLIED, expected))
+				elif len(original) == 1:
+					states.append((HUNK_MOVED, original[0]))
+				elif len(applied) == 1:
+					states.append((HUNK_APPLIED, applied[0]))
+				elif original or applied:
+					states.append((HUNK_AMBIGUOUS, None))
+				else:
+					states.append((HUNK_MISSING, None))
+			remap, unchecked = check_targets(data, base, patch, states)
+			if unchecked:
+				for hunk_index, hunk in enumerate(patch.hunks):
+					if any(OPVALUE_TABLE[opcode] in unchecked for i, opcode in address_operands(hunk.patched)):
+						states[hunk_index] = (HUNK_UNCHECKED, states[hunk_index][1])
+			results.append(states)
+		return results
+
+	def apply(self, data, base, results):
+		# returns the patched image, and the names of the patches that
+		# were applied by this call
+		data = bytearray(data)
+		applied = []
+		for patch, states in zip(self.patches, results):
+			kinds = set(state for state, offset in states)
+			if not kinds <= set((HUNK_OK, HUNK_MOVED)):
+				continue
+			deltas = hunk_deltas(patch, states, base)
+			remap, unchecked = check_targets(data, base, patch, states)
+			for hunk, (state, offset) in zip(patch.hunks, states):
+				data[offset:offset + len(hunk.patched)] = relocate(hunk.patched, patch.hunks, deltas, remap)
+			applied.append(patch.name)
+		return bytes(data), applied
+
+
+def hunk_deltas(patch, states, base):
+	# how many words each hunk has moved by
+	return [(offset - base) // 2 - hunk.address for hunk, (state, offset) in zip(patch.hunks, states)]
+
+
+def check_targets(data, base, patch, states):
+	# for a patch that can be applied with relocation, returns a dict
+	# mapping external jmp/call targets to where they are in this image,
+	# and the set of targets that couldn't be checked
+	kinds = set(state for state, offset in states)
+	if not kinds <= set((HUNK_OK, HUNK_MOVED, HUNK_UNCHECKED)) or kinds == set((HUNK_OK,)):
+		return {}, set()
+
+	# the original bytes were matched exactly, so whatever they jump to
+	# is right for this image
+	known = set(OPVALUE_TABLE[opcode] for hunk in patch.hunks for i, opcode in address_operands(hunk.original))
+	deltas = sorted(set(delta for delta in hunk_deltas(patch, states, base) if delta))
+
+	remap = {}
+	unchecked = set()
+	for target in patch.external_targets():
+		if target in known:
+			continue
+		expected = patch.targets.get(target)
+		found = None
+		if expected:
+			for candidate in [target] + [target + delta for delta in deltas]:
+				offset = base + candidate * 2
+				if data[offset:offset + len(expected)] == expected:
+					found = candidate
+					break
+		if found is None:
+			unchecked.add(target)
+		elif found != target:
+			remap[target] = found
+	return remap, unchecked
+
+
+def address_operands(code):
+	# (byte offset, opcode) for every jmp/call in code
+	for i in range(0, len(code) - 1, 2):
+		opcode = code[i] | (code[i + 1] << 8)
+		itype = ITYPE_TABLE[opcode]
+		if itype >= 0 and OP_TYPES[itype] == HTOP_ADDR:
+			yield i, opcode
+
+
+def address_mask(code):
+	# byte mask that clears the address bits of every jmp/call in code
+	mask = bytearray(b'\xFF' * len(code))
+	for i, opcode in address_operands(code):
+		mask[i] = ~0xC7FF & 0xFF
+		mask[i + 1] = (~0xC7FF >> 8) & 0xFF
+	return bytes(mask)
+
+
+def masked_equal(data, code, mask):
+	if len(data) != len(code):
+		return False
+	for a, b, m in zip(bytearray(data), bytearray(code), bytearray(mask)):
+		if (a ^ b) & m:
+			return False
+	return True
+
+
+def relocate(code, hunks, deltas, remap=None):
+	# adjust jmp/call targets in a hunk's replacement code for hunks
+	# that have moved, and for outside targets found elsewhere (remap)
+	code = bytearray(code)
+	for i, opcode in list(address_operands(code)):
+		target = OPVALUE_TABLE[opcode]
+		moved = (remap or {}).get(target, target)
+		for hunk, delta in zip(hunks, deltas):
+			if delta and hunk.contains(target):
+				moved = target + delta
+				break
+		if moved != target:
+			opcode = (opcode & ~0xC7FF) | (moved & 0x7FF) | ((moved & 0x1800) << 3)
+			code[i] = opcode & 0xFF
+			code[i + 1] = opcode >> 8
+	return bytes(code)
+
+
+def image_base(path, patches, base=None):
+	if base is not None:
+		return base
+	if os.path.splitext(path)[1].lower() in RAW_IMAGE_EXTENSIONS:
+		return 0
+	for patch in patches:
+		for hunk in patch.hunks:
+			return hunk.base
+	return 0
+
+
+def describe(hunk, state, offset, base):
+	if offset is None:
+		return '%04X %s' % (hunk.address, state)
+	address = (offset - base) // 2
+	if address != hunk.address:
+		return '%04X %s to %04X' % (hunk.address, state, address)
+	return '%04X %s' % (hunk.address, state)
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Check and apply firmware patches across Holtek HT68FB560 images.',
+		epilog='example: %(prog)s patches.json firmware-releases/ -d patched/')
+	parser.add_argument('patches', help='patch definitions (JSON, see patches.json)')
+	parser.add_argument('images', nargs='+', help='images (MTP files or program.bin) or folders of them')
+	parser.add_argument('-d', '--output-dir', default=None,
+		help='write patched copies of the images into this folder (default: only check them)')
+	parser.add_argument('--base', type=lambda s: int(s, 0), default=None,
+		help='file offset of word 0 (default: 0 for .bin files, else what the patch offsets imply)')
+	args = parser.parse_args()
+
+	patches = load_patches(args.patches)
+	patch_set = PatchSet(patches)
+	images = find_images(args.images, ('.bin', '.mtp'))
+	if not images:
+		parser.error('no images found')
+	if args.output_dir is not None:
+		root = os.path.commonpath([os.path.dirname(os.path.abspath(i)) for i in images])
+
+	began = time.time()
+	failures = 0
+	for image in images:
+		reviews = 0
+		with open(image, 'rb') as f:
+			data = f.read()
+		base = image_base(image, patches, args.base)
+		results = patch_set.locate(data, base)
+
+		print(image)
+		for patch, states in zip(patches, results):
+			kinds = set(state for state, offset in states)
+			if kinds <= set((HUNK_OK, HUNK_MOVED)):
+				verdict = 'can be applied' if kinds == set((HUNK_OK,)) else 'can be applied with relocation'
+			elif kinds == set((HUNK_APPLIED,)):
+				verdict = 'already applied'
+			elif kinds <= set((HUNK_OK, HUNK_MOVED, HUNK_UNCHECKED)):
+				remap, unchecked = check_targets(data, base, patch, states)
+				verdict = 'NEEDS MANUAL REVIEW, check %s' % ', '.join('%04X' % target for target in sorted(unchecked))
+				reviews += 1
+				failures += 1
+			else:
+				verdict = 'FAILED'
+				failures += 1
+			hunks = ', '.join(describe(hunk, state, offset, base) for hunk, (state, offset) in zip(patch.hunks, states))
+			print('  %s: %s (%s)' % (patch.name, verdict, hunks))
+
+		if args.output_dir is not None and reviews:
+			print('  -> not written (%d patches need manual review)' % reviews)
+		elif args.output_dir is not None:
+			patched, applied = patch_set.apply(data, base, results)
+			rel = os.path.relpath(os.path.abspath(image), root)
+			out_path = os.path.join(args.output_dir, rel)
+			os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+			with open(out_path, 'wb') as f:
+				f.write(patched)
+			print('  -> %s (%d patches applied)' % (out_path, len(applied)))
+	elapsed = time.time() - began
+
+	print('checked %d patches against %d images in %.2fs' % (len(patches), len(images), elapsed), file=sys.stderr)
+	if failures:
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,151 @@
+# Holtek HT68FB560 offline pre-analysis for the IDA module
+#
+# Does the work IDA's auto-analysis would otherwise do one instruction
+# at a time through the processor module's callbacks (following code,
+# jump tables, xrefs, bit enums) once, outside IDA, and saves it as a
+# compact JSON file. When the IDA module creates a new database for an
+# image with a matching pre-analysis, it applies the whole thing in bulk
+# instead. The rules are the same ones the module uses: ht68flow for
+# code and jump tables, FL_USE/FL_CHG for data xrefs (see ht68xref) and
+# ht68banks for banked and indirect accesses.
+#
+# The IDA module looks for the pre-analysis next to the image
+# (program.bin -> program.prep), then as <sha1 of the image>.prep in
+# the directory named by the HT68_PREP_CACHE environment variable, so a
+# shared cache directory works for everyone analysing the same
+# releases:
+#
+#   python ht68prep.py program.bin
+#   python ht68prep.py firmware-releases/ --cache //server/ht68-prep
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+from ht68banks import BankAnalysis
+from ht68dec import *
+from ht68flow import *
+from ht68match import read_names
+from ht68xref import ACCESS_READ, ACCESS_WRITE, collect_refs, names_path
+
+PREP_VERSION = 1
+PREP_EXTENSION = '.prep'
+
+
+def image_digest(opcodes):
+	# what the IDA module checks a pre-analysis against: the sha1 of
+	# the image as loaded
+	return hashlib.sha1(struct.pack('<%dH' % len(opcodes), *opcodes)).hexdigest()
+
+
+def code_ranges(flow):
+	# [start, end) runs of words reached as code
+	ranges = []
+	start = None
+	for addr in range(flow.size + 1):
+		is_code = addr < flow.size and flow.is_code[addr]
+		if is_code and start is None:
+			start = addr
+		elif not is_code and start is not None:
+			ranges.append([start, addr])
+			start = None
+	return ranges
+
+
+def jump_table_names(flow):
+	# the names the IDA module gives jump table entries, and the targets
+	# of entries that are jumps
+	names = []
+	opcodes = flow.opcodes
+	for addm_addr, (first, last) in sorted(flow.jump_tables.items()):
+		targets = {}
+		for entry in range(first, last + 1):
+			names.append([entry, 'jtbl_%04X_case_%02X' % (addm_addr, entry - first)])
+			if ITYPE_TABLE[opcodes[entry]] == itypes.i_jmp:
+				targets.setdefault(OPVALUE_TABLE[opcodes[entry]], []).append(entry - first)
+		for target, indexes in sorted(targets.items()):
+			index_strs = '_'.join(['%02X' % i for i in indexes])
+			names.append([target, 'jtbl_%04X_case_target_%s' % (addm_addr, index_strs)])
+	return names
+
+
+def build_prep(opcodes, names=None):
+	flow = FlowGraph(opcodes)
+	labels, data_refs, code_refs = collect_refs(opcodes, None, flow)
+	banks = BankAnalysis(flow)
+
+	bit_enums = {}
+	for addr, function, opcode, mem, bit, access in data_refs:
+		if bit is not None:
+			bit_enums.setdefault(mem, set()).add(bit)
+	bank_refs = []
+	for addr, phys in sorted(banks.accesses.items()):
+		mem, bit, reads, writes = memory_access(opcodes[addr])
+		bank_refs.append([addr, phys, (ACCESS_READ if reads else 0) | (ACCESS_WRITE if writes else 0)])
+
+	return {
+		'version': PREP_VERSION,
+		'sha1': image_digest(opcodes),
+		'words': len(opcodes),
+		'code': code_ranges(flow),
+		'functions': sorted(flow.functions),
+		'names': jump_table_names(flow) + [[addr, name] for addr, name in names or ()],
+		'jump_tables': [[addr, first, last] for addr, (first, last) in sorted(flow.jump_tables.items())],
+		'code_refs': [[addr, target, kind] for addr, function, opcode, target, kind in code_refs],
+		'data_refs': [[addr, mem, bit, access] for addr, function, opcode, mem, bit, access in data_refs],
+		'bank_refs': bank_refs,
+		'bit_enums': [[mem, sorted(bits)] for mem, bits in sorted(bit_enums.items())],
+	}
+
+
+def write_prep(prep, path):
+	with open(path + '.tmp', 'w') as f:
+		json.dump(prep, f, separators=(',', ':'))
+	os.replace(path + '.tmp', path)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Pre-analyse Holtek HT68FB560 program images for the IDA module.')
+	parser.add_argument('images', nargs='+', help='program images, or folders of them')
+	parser.add_argument('-n', '--names', help='names file (default: each image\'s .names file, if any)')
+	parser.add_argument('--cache', metavar='DIR',
+		help='write <sha1>.prep files into DIR (skipping images already there) instead of next to each image')
+	args = parser.parse_args()
+
+	images = find_images(args.images)
+	if args.names and len(images) != 1:
+		parser.error('--names only works with a single image')
+	if args.cache and not os.path.isdir(args.cache):
+		os.makedirs(args.cache)
+
+	began = time.time()
+	written = 0
+	for image in images:
+		opcodes = read_opcodes(image)
+		if args.cache:
+			output = os.path.join(args.cache, image_digest(opcodes) + PREP_EXTENSION)
+			if os.path.exists(output):
+				continue
+		else:
+			output = os.path.splitext(image)[0] + PREP_EXTENSION
+		if args.names:
+			names = read_names(args.names)
+		else:
+			extra = names_path(image)
+			names = read_names(extra) if os.path.exists(extra) else None
+		write_prep(build_prep(opcodes, names), output)
+		written += 1
+	print('pre-analysed %d of %d images in %.2fs' % (written, len(images), time.time() - began), file=sys.stderr)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,918 @@
+# Holtek HT68FB560 register definitions
+# Generated from ida-module/ht68fb560.json by gen-ht68regs.py; edit the
+# JSON file and rerun that instead of changing this file by hand.
+
+BANK_COUNT = 6
+
+# one entry per data memory address, as in the JSON file
+REG_DEFS = [
+	{'name': 'IAR0', 'comment': 'Indirect Addressing Register 0'},
+	{'name': 'MP0', 'comment': 'Memory Pointer 0'},
+	{'name': 'IAR1', 'comment': 'Indirect Addressing Register 1'},
+	{'name': 'MP1', 'comment': 'Memory Pointer 1'},
+	{'name': 'BP', 'comment': 'Bank Pointer', 'bits': ['DMBP0', 'DMBP1', 'DMBP2', None, None, 'PMBP0', None, None]},
+	{'name': 'ACC', 'comment': 'Accumulator'},
+	{'name': 'PCL', 'comment': 'Program Counter Low'},
+	{'name': 'TBLP', 'comment': 'Table Lookup Low Pointer'},
+	{'name': 'TBLH', 'comment': 'Table Lookup High Result'},
+	{'name': 'TBHP', 'comment': 'Table Lookup High Pointer'},
+	{'name': 'STATUS', 'comment': 'Status Register', 'bits': ['C', 'AC', 'Z', 'OV', 'PDF', 'TO', None, None]},
+	{'name': 'SMOD', 'comment': 'SMOD Register', 'bits': ['HLCLK', 'IDLEN', 'HTO', 'LTO', 'FSTEN', 'CKS0', 'CKS1', 'CKS2']},
+	{'name': 'LVDC', 'comment': 'Low Voltage Detector Control', 'bits': ['VLVD0', 'VLVD1', 'VLVD2', None, 'LVDEN', 'LVDO', None, None]},
+	{'name': 'INTEG', 'comment': 'Interrupt Edge Control', 'bits': ['INT0S0', 'INT0S1', 'INT1S0', 'INT1S1', None, None, None, None]},
+	{'name': 'WDTC', 'comment': 'Watchdog Timer Control', 'bits': ['WS0', 'WS1', 'WS2', 'WE0', 'WE1', 'WE2', 'WE3', 'WE4']},
+	None,
+	{'name': 'INTC0', 'comment': 'Interrupt Control 0', 'bits': ['EMI', 'INT0E', 'INT1E', 'USBE', 'INT0F', 'INT1F', 'USBF', None]},
+	{'name': 'INTC1', 'comment': 'Interrupt Control 1', 'bits': ['LVE', None, 'MF0E', 'MF1E', 'LVF', None, 'MF0F', 'MF1F']},
+	{'name': 'INTC2', 'comment': 'Interrupt Control 2', 'bits': ['MF2E', 'MF3E', 'SIME', 'SPIAE', 'MF2F', 'MF3F', 'SIMF', 'SPIAF']},
+	None,
+	{'name': 'MFI0', 'comment': 'Multi-Function Interrupt Control 0', 'bits': ['T0PE', 'T0AE', 'T1PE', 'T1AE', 'T0PF', 'T0AF', 'T1PF', 'T1AF']},
+	{'name': 'MFI1', 'comment': 'Multi-Function Interrupt Control 1', 'bits': ['T2PE', 'T2AE', 'T3PE', 'T3AE', 'T2PF', 'T2AF', 'T3PF', 'T3AF']},
+	None,
+	None,
+	{'name': 'PAWU', 'comment': 'I/O Port A Wake-Up Control', 'bits': ['PAWU0', 'PAWU1', 'PAWU2', 'PAWU3', 'PAWU4', 'PAWU5', 'PAWU6', 'PAWU7']},
+	{'name': 'PAPU', 'comment': 'I/O Port A Pull-High Control', 'bits': ['PAPU0', 'PAPU1', 'PAPU2', 'PAPU3', 'PAPU4', 'PAPU5', 'PAPU6', 'PAPU7']},
+	{'name': 'PA', 'comment': 'I/O Port A', 'bits': ['PA0', 'PA1', 'PA2', 'PA3', 'PA4', 'PA5', 'PA6', 'PA7']},
+	{'name': 'PAC', 'comment': 'I/O Port A Control', 'bits': ['PAC0', 'PAC1', 'PAC2', 'PAC3', 'PAC4', 'PAC5', 'PAC6', 'PAC7']},
+	{'name': 'PADIR', 'comment': 'I/O Port A Wake-Up Polarity Control Register'},
+	None,
+	None,
+	{'name': 'PXWU', 'comment': 'I/O Port B-E Wake-Up Control', 'bits': ['PBLWU', 'PBHWU', 'PCLWU', 'PCHWU', 'PDLWU', 'PDHWU', 'PELWU', 'PEHWU']},
+	{'name': 'PXPU', 'comment': 'I/O Port B-E Pull-High Control', 'bits': ['PBLPU', 'PBHPU', 'PCLPU', 'PCHPU', 'PDLPU', 'PDHPU', 'PELPU', 'PEHPU']},
+	None,
+	{'name': 'PB', 'comment': 'I/O Port B', 'bits': ['PB0', 'PB1', 'PB2', 'PB3', 'PB4', 'PB5', 'PB6', 'PB7']},
+	{'name': 'PBC', 'comment': 'I/O Port B Control', 'bits': ['PBC0', 'PBC1', 'PBC2', 'PBC3', 'PBC4', 'PBC5', 'PBC6', 'PBC7']},
+	{'name': 'PC', 'comment': 'I/O Port C', 'bits': ['PC0', 'PC1', 'PC2', 'PC3', 'PC4', 'PC5', 'PC6', 'PC7']},
+	{'name': 'PCC', 'comment': 'I/O Port C Control', 'bits': ['PCC0', 'PCC1', 'PCC2', 'PCC3', 'PCC4', 'PCC5', 'PCC6', 'PCC7']},
+	{'name': 'PD', 'comment': 'I/O Port D', 'bits': ['PD0', 'PD1', 'PD2', 'PD3', 'PD4', 'PD5', 'PD6', 'PD7']},
+	{'name': 'PDC', 'comment': 'I/O Port D Control', 'bits': ['PDC0', 'PDC1', 'PDC2', 'PDC3', 'PDC4', 'PDC5', 'PDC6', 'PDC7']},
+	{'name': 'PE', 'comment': 'I/O Port E', 'bits': ['PE0', 'PE1', 'PE2', 'PE3', 'PE4', 'PE5', None, None]},
+	{'name': 'PEC', 'comment': 'I/O Port E Control', 'bits': ['PEC0', 'PEC1', 'PEC2', 'PEC3', 'PEC4', 'PEC5', None, None]},
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	None,
+	{'name': 'I2CTOC', 'comment': 'I2C Timeout Control', 'bits': ['I2CTOS0', 'I2CTOS1', 'I2CTOS2', 'I2CTOS3', 'I2CTOS4', 'I2CTOS5', 'I2CTOF', 'I2CTOEN']},
+	{'name': 'SIMC0', 'comment': 'SIM Control 0', 'bits': [None, 'SIMEN', 'PCKP0', 'PCKP1', 'PCKEN', 'SIM0', 'SIM1', 'SIM2']},
+	{'name': 'SIMC1', 'comment': 'SIM Control 1', 'bits': ['RXAK', 'IAMWU', 'SRW', 'TXAK', 'HTX', 'HBB', 'HAAS', 'HCF']},
+	{'name': 'SIMD', 'comment': 'SIM Data'},
+	{'name': 'SIMC2', 'comment': 'SIM Control 2', 'bits': ['TRF', 'WCOL', 'CSEN', 'MLS', 'CKEG', 'CKPOLB', 'IICA5', 'IICA6']},
+	{'name': 'SPIAC0', 'comment': 'SPIA Control 0', 'bits': [None, 'SPIAEN', None, None, None, 'SASPI0', 'SASPI1', 'SASPI2']},
+	{'name': 'SPIAC1', 'comment': 'SPIA Control 1', 'bits': ['SATRF', 'SAWCOL', 'SACSEN', 'SAMLS', 'SACKEG', 'SACKPOL', None, None]},
+	{'name': 'SPIAD', 'comment': 'SPIA Data'},
+	{'name': 'SBSC', 'comment': 'SBSC Register', 'bits': ['SA_WCOL', None, None, None, 'I2CDB0', 'I2CDB1', None, 'SIM_WCOL']},
+	{'name': 'FRCR', 'comment': 'More Flash Control Register', 'banks': [1]},
+	{'name': 'FCR', 'comment': 'Flash Control Register', 'banks': [1]},
+	{'name': 'FARH', 'comment': 'Flash Address Register High', 'banks': [1]},
+	{'name': 'FD0H', 'comment': 'Flash Data 0 High', 'banks': [1]},
+	{'name': 'FD1H', 'comment': 'Flash Data 1 High', 'banks': [1]},
+	{'name': 'FD2H', 'comment': 'Flash Data 2 High', 'banks': [1]},
+	{'name': 'FD3H', 'comment': 'Flash Data 3 High', 'banks': [1]},
+	{'name': 'TMPC0', 'comment': 'TM I/O Pin Control Register 0', 'bits': ['T0CP0', 'T0CP1', None, None, 'T1CP0', 'T1CP1', None, None]},
+	{'name': 'TMPC1', 'comment': 'TM I/O Pin Control Register 1', 'bits': ['T2CP0', 'T2CP1', None, None, 'T3CP0', 'T3CP1', None, None]},
+	{'name': 'TM0C0', 'comment': 'TM0 Control 0', 'bits': [None, None, None, 'T0ON', 'T0CK0', 'T0CK1', 'T0CK2', 'T0PAU']},
+	{'name': 'TM0C1', 'comment': 'TM0 Control 1', 'bits': ['T0CLR', 'T0PX', 'T0POL', 'T0OC', 'T0IO0', 'T0IO1', 'T0M0', 'T0M1']},
+	None,
+	{'name': 'TM0DL', 'comment': 'TM0 Counter Low'},
+	{'name': 'TM0DH', 'comment': 'TM0 Counter High'},
+	{'name': 'TM0AL', 'comment': 'TM0 CCRA Low'},
+	{'name': 'TM0AH', 'comment': 'TM0 CCRA High'},
+	{'name': 'TM0RP', 'comment': 'TM0 CCRP'},
+	None,
+	{'name': 'TM1C0', 'comment': 'TM1 Control 0', 'bits': ['T1RP0', 'T1RP1', 'T1RP2', 'T1ON', 'T1CK0', 'T1CK1', 'T1CK2', 'T1PAU']},
+	{'name': 'TM1C1', 'comment': 'TM1 Control 1', 'bits': ['T1CCLR', 'T1DPX', 'T1POL', 'T1OC', 'T1IO0', 'T1IO1', 'T1M0', 'T1M1']},
+	{'name': 'TM1DL', 'comment': 'TM1 Counter Low'},
+	{'name': 'TM1DH', 'comment': 'TM1 Counter High'},
+	{'name': 'TM1AL', 'comment': 'TM1 CCRA Low'},
+	{'name': 'TM1AH', 'comment': 'TM1 CCRA High'},
+	{'name': 'TM2C0', 'comment': 'TM2 Control 0', 'bits': ['T2RP0', 'T2RP1', 'T2RP2', 'T2ON', 'T2CK0', 'T2CK1', 'T2CK2', 'T2PAU']},
+	{'name': 'TM2C1', 'comment': 'TM2 Control 1', 'bits': ['T2CLR', 'T2PX', 'T2POL', 'T2OC', 'T2IO0', 'T2IO1', 'T2M0', 'T2M1']},
+	{'name': 'TM2DL', 'comment': 'TM2 Counter Low'},
+	{'name': 'TM2DH', 'comment': 'TM2 Counter High'},
+	{'name': 'TM2AL', 'comment': 'TM2 CCRA Low'},
+	{'name': 'TM2AH', 'comment': 'TM2 CCRA High'},
+	{'name': 'TM3C0', 'comment': 'TM3 Control 0', 'bits': ['T3RP0', 'T3RP1', 'T3RP2', 'T3ON', 'T3CK0', 'T3CK1', 'T3CK2', 'T3PAU']},
+	{'name': 'TM3C1', 'comment': 'TM3 Control 1', 'bits': ['T3CLR', 'T3PX', 'T3POL', 'T3OC', 'T3IO0', 'T3IO1', 'T3M0', 'T3M1']},
+	{'name': 'TM3DL', 'comment': 'TM3 Counter Low'},
+	{'name': 'TM3DH', 'comment': 'TM3 Counter High'},
+	{'name': 'TM3AL', 'comment': 'TM3 CCRA Low'},
+	{'name': 'TM3AH', 'comment': 'TM3 CCRA High'},
+	{'name': 'USB_STAT', 'comment': 'USB Status', 'bits': ['ESD', 'PU', 'SE0', 'SE1', 'PS2_DAI', 'PS2_CKI', 'PS2_DAO', 'PS2_CKO']},
+	{'name': 'UINT', 'comment': 'USB Endpoint Interrupt Control', 'bits': ['EP0EN', 'EP1EN', 'EP2EN', 'EP3EN', 'EP4EN', 'EP5EN', 'EP6EN', 'EP7EN']},
+	{'name': 'USC', 'comment': 'USB Control', 'bits': ['SUSP', 'RMWK', 'URST', 'RESUME', 'SELUSB', 'PLL', 'SELPS2', 'URD']},
+	{'name': 'USR', 'comment': 'USB Endpoint Accessed Detection', 'bits': ['EP0F', 'EP1F', 'EP2F', 'EP3F', 'EP4F', 'EP5F', 'EP6F', 'EP7F']},
+	{'name': 'UCC', 'comment': 'USB Clock Control', 'bits': ['EPS0', 'EPS1', 'EPS2', 'USBCKEN', 'SUSP2', 'FSYS16MHZ', 'SYSCLK', 'RCTRL']},
+	{'name': 'AWR', 'comment': 'USB Address and Wake-Up Control', 'bits': ['WKEN', 'AD0', 'AD1', 'AD2', 'AD3', 'AD4', 'AD5', 'AD6']},
+	{'name': 'STLI', 'comment': 'FIFO In Stall Endpoints', 'bits': ['STLI0', 'STLI1', 'STLI2', 'STLI3', 'STLI4', 'STLI5', 'STLI6', 'STLI7']},
+	{'name': 'STLO', 'comment': 'FIFO Out Stall Endpoints', 'bits': ['STLO0', 'STLO1', 'STLO2', 'STLO3', 'STLO4', 'STLO5', 'STLO6', 'STLO7']},
+	{'name': 'SIES', 'comment': 'SIES Register', 'bits': ['ASET', 'ERR', 'OUT', 'IN', 'NAK', None, 'CRCF', 'NMI']},
+	{'name': 'MISC', 'comment': 'Misc Register', 'bits': ['REQUEST', 'TX', 'CLEAR', 'E3IDF', 'E4ODF', 'SETCMD', 'READY', 'LEN0']},
+	{'name': 'UFIEN', 'comment': 'USB Input FIFO Control', 'bits': ['FIFO_DEF', 'SETI1', 'SETI2', 'SETI3', 'SETI4', 'SETI5', 'SETI6', 'SETI7']},
+	{'name': 'UFOEN', 'comment': 'USB Output FIFO Control', 'bits': ['DATATG', 'SETO1', 'SETO2', 'SETO3', 'SETO4', 'SETO5', 'SETO6', 'SETO7']},
+	{'name': 'UFC0', 'comment': 'USB FIFO Control 0', 'bits': [None, None, 'E1FS0', 'E1FS1', 'E2FS0', 'E2FS1', 'E3FS0', 'E3FS1']},
+	{'name': 'UFC1', 'comment': 'USB FIFO Control 1', 'bits': ['E4FS0', 'E4FS1', 'E5FS0', 'E5FS1', 'E6FS0', 'E6FS1', 'E7FS0', 'E7FS1']},
+	{'name': 'FIFO0', 'comment': 'FIFO 0'},
+	{'name': 'FIFO1', 'comment': 'FIFO 1'},
+	{'name': 'FIFO2', 'comment': 'FIFO 2'},
+	{'name': 'FIFO3', 'comment': 'FIFO 3'},
+	{'name': 'FIFO4', 'comment': 'FIFO 4'},
+	{'name': 'FIFO5', 'comment': 'FIFO 5'},
+	{'name': 'FIFO6', 'comment': 'FIFO 6'},
+	{'name': 'FIFO7', 'comment': 'FIFO 7'},
+	{'name': 'CTRL', 'comment': 'CTRL Register', 'bits': ['WRF', 'LRF', 'LVRF', None, None, None, None, 'FSYSON']},
+	{'name': 'LVRC', 'comment': 'Low Voltage Reset Control', 'bits': ['LVS0', 'LVS1', 'LVS2', 'LVS3', 'LVS4', 'LVS5', 'LVS6', 'LVS7']},
+	{'name': 'PDPS', 'comment': 'PD Power Supply Control', 'bits': ['PD4S0', 'PD4S1', 'PD5S0', 'PD5S1', 'PD6S0', 'PD6S1', 'PD7S0', 'PD7S1']},
+	{'name': 'PAPS0', 'comment': 'PA Power Supply Control 0', 'bits': ['PA0S0', 'PA0S1', 'PA1S0', 'PA1S1', 'PA2S0', 'PA2S1', 'PA3S0', 'PA3S1']},
+	{'name': 'PAPS1', 'comment': 'PA Power Supply Control 1', 'bits': ['PA4S0', 'PA4S1', 'PA5S0', 'PA5S1', 'PA6S0', 'PA6S1', 'PA7S0', 'PA7S1']},
+	{'name': 'SYSC', 'comment': 'USB SYSC Register', 'bits': [None, None, 'HFV', None, None, 'RUBUS', 'USBDIS', 'CLK_ADJ']},
+]
+
+# register name -> address
+REG_ADDRS = {
+	'IAR0': 0x00,
+	'MP0': 0x01,
+	'IAR1': 0x02,
+	'MP1': 0x03,
+	'BP': 0x04,
+	'ACC': 0x05,
+	'PCL': 0x06,
+	'TBLP': 0x07,
+	'TBLH': 0x08,
+	'TBHP': 0x09,
+	'STATUS': 0x0A,
+	'SMOD': 0x0B,
+	'LVDC': 0x0C,
+	'INTEG': 0x0D,
+	'WDTC': 0x0E,
+	'INTC0': 0x10,
+	'INTC1': 0x11,
+	'INTC2': 0x12,
+	'MFI0': 0x14,
+	'MFI1': 0x15,
+	'PAWU': 0x18,
+	'PAPU': 0x19,
+	'PA': 0x1A,
+	'PAC': 0x1B,
+	'PADIR': 0x1C,
+	'PXWU': 0x1F,
+	'PXPU': 0x20,
+	'PB': 0x22,
+	'PBC': 0x23,
+	'PC': 0x24,
+	'PCC': 0x25,
+	'PD': 0x26,
+	'PDC': 0x27,
+	'PE': 0x28,
+	'PEC': 0x29,
+	'I2CTOC': 0x37,
+	'SIMC0': 0x38,
+	'SIMC1': 0x39,
+	'SIMD': 0x3A,
+	'SIMC2': 0x3B,
+	'SPIAC0': 0x3C,
+	'SPIAC1': 0x3D,
+	'SPIAD': 0x3E,
+	'SBSC': 0x3F,
+	'FRCR': 0x40,
+	'FCR': 0x41,
+	'FARH': 0x42,
+	'FD0H': 0x43,
+	'FD1H': 0x44,
+	'FD2H': 0x45,
+	'FD3H': 0x46,
+	'TMPC0': 0x47,
+	'TMPC1': 0x48,
+	'TM0C0': 0x49,
+	'TM0C1': 0x4A,
+	'TM0DL': 0x4C,
+	'TM0DH': 0x4D,
+	'TM0AL': 0x4E,
+	'TM0AH': 0x4F,
+	'TM0RP': 0x50,
+	'TM1C0': 0x52,
+	'TM1C1': 0x53,
+	'TM1DL': 0x54,
+	'TM1DH': 0x55,
+	'TM1AL': 0x56,
+	'TM1AH': 0x57,
+	'TM2C0': 0x58,
+	'TM2C1': 0x59,
+	'TM2DL': 0x5A,
+	'TM2DH': 0x5B,
+	'TM2AL': 0x5C,
+	'TM2AH': 0x5D,
+	'TM3C0': 0x5E,
+	'TM3C1': 0x5F,
+	'TM3DL': 0x60,
+	'TM3DH': 0x61,
+	'TM3AL': 0x62,
+	'TM3AH': 0x63,
+	'USB_STAT': 0x64,
+	'UINT': 0x65,
+	'USC': 0x66,
+	'USR': 0x67,
+	'UCC': 0x68,
+	'AWR': 0x69,
+	'STLI': 0x6A,
+	'STLO': 0x6B,
+	'SIES': 0x6C,
+	'MISC': 0x6D,
+	'UFIEN': 0x6E,
+	'UFOEN': 0x6F,
+	'UFC0': 0x70,
+	'UFC1': 0x71,
+	'FIFO0': 0x72,
+	'FIFO1': 0x73,
+	'FIFO2': 0x74,
+	'FIFO3': 0x75,
+	'FIFO4': 0x76,
+	'FIFO5': 0x77,
+	'FIFO6': 0x78,
+	'FIFO7': 0x79,
+	'CTRL': 0x7A,
+	'LVRC': 0x7B,
+	'PDPS': 0x7C,
+	'PAPS0': 0x7D,
+	'PAPS1': 0x7E,
+	'SYSC': 0x7F,
+}
+
+# (offset into RAM, name, comment) for every register in every bank
+BANK_NAMES = [
+	(0x000, 'B0:IAR0', 'Indirect Addressing Register 0'),
+	(0x001, 'B0:MP0', 'Memory Pointer 0'),
+	(0x002, 'B0:IAR1', 'Indirect Addressing Register 1'),
+	(0x003, 'B0:MP1', 'Memory Pointer 1'),
+	(0x004, 'B0:BP', 'Bank Pointer'),
+	(0x005, 'B0:ACC', 'Accumulator'),
+	(0x006, 'B0:PCL', 'Program Counter Low'),
+	(0x007, 'B0:TBLP', 'Table Lookup Low Pointer'),
+	(0x008, 'B0:TBLH', 'Table Lookup High Result'),
+	(0x009, 'B0:TBHP', 'Table Lookup High Pointer'),
+	(0x00A, 'B0:STATUS', 'Status Register'),
+	(0x00B, 'B0:SMOD', 'SMOD Register'),
+	(0x00C, 'B0:LVDC', 'Low Voltage Detector Control'),
+	(0x00D, 'B0:INTEG', 'Interrupt Edge Control'),
+	(0x00E, 'B0:WDTC', 'Watchdog Timer Control'),
+	(0x010, 'B0:INTC0', 'Interrupt Control 0'),
+	(0x011, 'B0:INTC1', 'Interrupt Control 1'),
+	(0x012, 'B0:INTC2', 'Interrupt Control 2'),
+	(0x014, 'B0:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x015, 'B0:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x018, 'B0:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x019, 'B0:PAPU', 'I/O Port A Pull-High Control'),
+	(0x01A, 'B0:PA', 'I/O Port A'),
+	(0x01B, 'B0:PAC', 'I/O Port A Control'),
+	(0x01C, 'B0:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x01F, 'B0:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x020, 'B0:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x022, 'B0:PB', 'I/O Port B'),
+	(0x023, 'B0:PBC', 'I/O Port B Control'),
+	(0x024, 'B0:PC', 'I/O Port C'),
+	(0x025, 'B0:PCC', 'I/O Port C Control'),
+	(0x026, 'B0:PD', 'I/O Port D'),
+	(0x027, 'B0:PDC', 'I/O Port D Control'),
+	(0x028, 'B0:PE', 'I/O Port E'),
+	(0x029, 'B0:PEC', 'I/O Port E Control'),
+	(0x037, 'B0:I2CTOC', 'I2C Timeout Control'),
+	(0x038, 'B0:SIMC0', 'SIM Control 0'),
+	(0x039, 'B0:SIMC1', 'SIM Control 1'),
+	(0x03A, 'B0:SIMD', 'SIM Data'),
+	(0x03B, 'B0:SIMC2', 'SIM Control 2'),
+	(0x03C, 'B0:SPIAC0', 'SPIA Control 0'),
+	(0x03D, 'B0:SPIAC1', 'SPIA Control 1'),
+	(0x03E, 'B0:SPIAD', 'SPIA Data'),
+	(0x03F, 'B0:SBSC', 'SBSC Register'),
+	(0x047, 'B0:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x048, 'B0:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x049, 'B0:TM0C0', 'TM0 Control 0'),
+	(0x04A, 'B0:TM0C1', 'TM0 Control 1'),
+	(0x04C, 'B0:TM0DL', 'TM0 Counter Low'),
+	(0x04D, 'B0:TM0DH', 'TM0 Counter High'),
+	(0x04E, 'B0:TM0AL', 'TM0 CCRA Low'),
+	(0x04F, 'B0:TM0AH', 'TM0 CCRA High'),
+	(0x050, 'B0:TM0RP', 'TM0 CCRP'),
+	(0x052, 'B0:TM1C0', 'TM1 Control 0'),
+	(0x053, 'B0:TM1C1', 'TM1 Control 1'),
+	(0x054, 'B0:TM1DL', 'TM1 Counter Low'),
+	(0x055, 'B0:TM1DH', 'TM1 Counter High'),
+	(0x056, 'B0:TM1AL', 'TM1 CCRA Low'),
+	(0x057, 'B0:TM1AH', 'TM1 CCRA High'),
+	(0x058, 'B0:TM2C0', 'TM2 Control 0'),
+	(0x059, 'B0:TM2C1', 'TM2 Control 1'),
+	(0x05A, 'B0:TM2DL', 'TM2 Counter Low'),
+	(0x05B, 'B0:TM2DH', 'TM2 Counter High'),
+	(0x05C, 'B0:TM2AL', 'TM2 CCRA Low'),
+	(0x05D, 'B0:TM2AH', 'TM2 CCRA High'),
+	(0x05E, 'B0:TM3C0', 'TM3 Control 0'),
+	(0x05F, 'B0:TM3C1', 'TM3 Control 1'),
+	(0x060, 'B0:TM3DL', 'TM3 Counter Low'),
+	(0x061, 'B0:TM3DH', 'TM3 Counter High'),
+	(0x062, 'B0:TM3AL', 'TM3 CCRA Low'),
+	(0x063, 'B0:TM3AH', 'TM3 CCRA High'),
+	(0x064, 'B0:USB_STAT', 'USB Status'),
+	(0x065, 'B0:UINT', 'USB Endpoint Interrupt Control'),
+	(0x066, 'B0:USC', 'USB Control'),
+	(0x067, 'B0:USR', 'USB Endpoint Accessed Detection'),
+	(0x068, 'B0:UCC', 'USB Clock Control'),
+	(0x069, 'B0:AWR', 'USB Address and Wake-Up Control'),
+	(0x06A, 'B0:STLI', 'FIFO In Stall Endpoints'),
+	(0x06B, 'B0:STLO', 'FIFO Out Stall Endpoints'),
+	(0x06C, 'B0:SIES', 'SIES Register'),
+	(0x06D, 'B0:MISC', 'Misc Register'),
+	(0x06E, 'B0:UFIEN', 'USB Input FIFO Control'),
+	(0x06F, 'B0:UFOEN', 'USB Output FIFO Control'),
+	(0x070, 'B0:UFC0', 'USB FIFO Control 0'),
+	(0x071, 'B0:UFC1', 'USB FIFO Control 1'),
+	(0x072, 'B0:FIFO0', 'FIFO 0'),
+	(0x073, 'B0:FIFO1', 'FIFO 1'),
+	(0x074, 'B0:FIFO2', 'FIFO 2'),
+	(0x075, 'B0:FIFO3', 'FIFO 3'),
+	(0x076, 'B0:FIFO4', 'FIFO 4'),
+	(0x077, 'B0:FIFO5', 'FIFO 5'),
+	(0x078, 'B0:FIFO6', 'FIFO 6'),
+	(0x079, 'B0:FIFO7', 'FIFO 7'),
+	(0x07A, 'B0:CTRL', 'CTRL Register'),
+	(0x07B, 'B0:LVRC', 'Low Voltage Reset Control'),
+	(0x07C, 'B0:PDPS', 'PD Power Supply Control'),
+	(0x07D, 'B0:PAPS0', 'PA Power Supply Control 0'),
+	(0x07E, 'B0:PAPS1', 'PA Power Supply Control 1'),
+	(0x07F, 'B0:SYSC', 'USB SYSC Register'),
+	(0x100, 'B1:IAR0', 'Indirect Addressing Register 0'),
+	(0x101, 'B1:MP0', 'Memory Pointer 0'),
+	(0x102, 'B1:IAR1', 'Indirect Addressing Register 1'),
+	(0x103, 'B1:MP1', 'Memory Pointer 1'),
+	(0x104, 'B1:BP', 'Bank Pointer'),
+	(0x105, 'B1:ACC', 'Accumulator'),
+	(0x106, 'B1:PCL', 'Program Counter Low'),
+	(0x107, 'B1:TBLP', 'Table Lookup Low Pointer'),
+	(0x108, 'B1:TBLH', 'Table Lookup High Result'),
+	(0x109, 'B1:TBHP', 'Table Lookup High Pointer'),
+	(0x10A, 'B1:STATUS', 'Status Register'),
+	(0x10B, 'B1:SMOD', 'SMOD Register'),
+	(0x10C, 'B1:LVDC', 'Low Voltage Detector Control'),
+	(0x10D, 'B1:INTEG', 'Interrupt Edge Control'),
+	(0x10E, 'B1:WDTC', 'Watchdog Timer Control'),
+	(0x110, 'B1:INTC0', 'Interrupt Control 0'),
+	(0x111, 'B1:INTC1', 'Interrupt Control 1'),
+	(0x112, 'B1:INTC2', 'Interrupt Control 2'),
+	(0x114, 'B1:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x115, 'B1:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x118, 'B1:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x119, 'B1:PAPU', 'I/O Port A Pull-High Control'),
+	(0x11A, 'B1:PA', 'I/O Port A'),
+	(0x11B, 'B1:PAC', 'I/O Port A Control'),
+	(0x11C, 'B1:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x11F, 'B1:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x120, 'B1:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x122, 'B1:PB', 'I/O Port B'),
+	(0x123, 'B1:PBC', 'I/O Port B Control'),
+	(0x124, 'B1:PC', 'I/O Port C'),
+	(0x125, 'B1:PCC', 'I/O Port C Control'),
+	(0x126, 'B1:PD', 'I/O Port D'),
+	(0x127, 'B1:PDC', 'I/O Port D Control'),
+	(0x128, 'B1:PE', 'I/O Port E'),
+	(0x129, 'B1:PEC', 'I/O Port E Control'),
+	(0x137, 'B1:I2CTOC', 'I2C Timeout Control'),
+	(0x138, 'B1:SIMC0', 'SIM Control 0'),
+	(0x139, 'B1:SIMC1', 'SIM Control 1'),
+	(0x13A, 'B1:SIMD', 'SIM Data'),
+	(0x13B, 'B1:SIMC2', 'SIM Control 2'),
+	(0x13C, 'B1:SPIAC0', 'SPIA Control 0'),
+	(0x13D, 'B1:SPIAC1', 'SPIA Control 1'),
+	(0x13E, 'B1:SPIAD', 'SPIA Data'),
+	(0x13F, 'B1:SBSC', 'SBSC Register'),
+	(0x140, 'B1:FRCR', 'More Flash Control Register'),
+	(0x141, 'B1:FCR', 'Flash Control Register'),
+	(0x142, 'B1:FARH', 'Flash Address Register High'),
+	(0x143, 'B1:FD0H', 'Flash Data 0 High'),
+	(0x144, 'B1:FD1H', 'Flash Data 1 High'),
+	(0x145, 'B1:FD2H', 'Flash Data 2 High'),
+	(0x146, 'B1:FD3H', 'Flash Data 3 High'),
+	(0x147, 'B1:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x148, 'B1:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x149, 'B1:TM0C0', 'TM0 Control 0'),
+	(0x14A, 'B1:TM0C1', 'TM0 Control 1'),
+	(0x14C, 'B1:TM0DL', 'TM0 Counter Low'),
+	(0x14D, 'B1:TM0DH', 'TM0 Counter High'),
+	(0x14E, 'B1:TM0AL', 'TM0 CCRA Low'),
+	(0x14F, 'B1:TM0AH', 'TM0 CCRA High'),
+	(0x150, 'B1:TM0RP', 'TM0 CCRP'),
+	(0x152, 'B1:TM1C0', 'TM1 Control 0'),
+	(0x153, 'B1:TM1C1', 'TM1 Control 1'),
+	(0x154, 'B1:TM1DL', 'TM1 Counter Low'),
+	(0x155, 'B1:TM1DH', 'TM1 Counter High'),
+	(0x156, 'B1:TM1AL', 'TM1 CCRA Low'),
+	(0x157, 'B1:TM1AH', 'TM1 CCRA High'),
+	(0x158, 'B1:TM2C0', 'TM2 Control 0'),
+	(0x159, 'B1:TM2C1', 'TM2 Control 1'),
+	(0x15A, 'B1:TM2DL', 'TM2 Counter Low'),
+	(0x15B, 'B1:TM2DH', 'TM2 Counter High'),
+	(0x15C, 'B1:TM2AL', 'TM2 CCRA Low'),
+	(0x15D, 'B1:TM2AH', 'TM2 CCRA High'),
+	(0x15E, 'B1:TM3C0', 'TM3 Control 0'),
+	(0x15F, 'B1:TM3C1', 'TM3 Control 1'),
+	(0x160, 'B1:TM3DL', 'TM3 Counter Low'),
+	(0x161, 'B1:TM3DH', 'TM3 Counter High'),
+	(0x162, 'B1:TM3AL', 'TM3 CCRA Low'),
+	(0x163, 'B1:TM3AH', 'TM3 CCRA High'),
+	(0x164, 'B1:USB_STAT', 'USB Status'),
+	(0x165, 'B1:UINT', 'USB Endpoint Interrupt Control'),
+	(0x166, 'B1:USC', 'USB Control'),
+	(0x167, 'B1:USR', 'USB Endpoint Accessed Detection'),
+	(0x168, 'B1:UCC', 'USB Clock Control'),
+	(0x169, 'B1:AWR', 'USB Address and Wake-Up Control'),
+	(0x16A, 'B1:STLI', 'FIFO In Stall Endpoints'),
+	(0x16B, 'B1:STLO', 'FIFO Out Stall Endpoints'),
+	(0x16C, 'B1:SIES', 'SIES Register'),
+	(0x16D, 'B1:MISC', 'Misc Register'),
+	(0x16E, 'B1:UFIEN', 'USB Input FIFO Control'),
+	(0x16F, 'B1:UFOEN', 'USB Output FIFO Control'),
+	(0x170, 'B1:UFC0', 'USB FIFO Control 0'),
+	(0x171, 'B1:UFC1', 'USB FIFO Control 1'),
+	(0x172, 'B1:FIFO0', 'FIFO 0'),
+	(0x173, 'B1:FIFO1', 'FIFO 1'),
+	(0x174, 'B1:FIFO2', 'FIFO 2'),
+	(0x175, 'B1:FIFO3', 'FIFO 3'),
+	(0x176, 'B1:FIFO4', 'FIFO 4'),
+	(0x177, 'B1:FIFO5', 'FIFO 5'),
+	(0x178, 'B1:FIFO6', 'FIFO 6'),
+	(0x179, 'B1:FIFO7', 'FIFO 7'),
+	(0x17A, 'B1:CTRL', 'CTRL Register'),
+	(0x17B, 'B1:LVRC', 'Low Voltage Reset Control'),
+	(0x17C, 'B1:PDPS', 'PD Power Supply Control'),
+	(0x17D, 'B1:PAPS0', 'PA Power Supply Control 0'),
+	(0x17E, 'B1:PAPS1', 'PA Power Supply Control 1'),
+	(0x17F, 'B1:SYSC', 'USB SYSC Register'),
+	(0x200, 'B2:IAR0', 'Indirect Addressing Register 0'),
+	(0x201, 'B2:MP0', 'Memory Pointer 0'),
+	(0x202, 'B2:IAR1', 'Indirect Addressing Register 1'),
+	(0x203, 'B2:MP1', 'Memory Pointer 1'),
+	(0x204, 'B2:BP', 'Bank Pointer'),
+	(0x205, 'B2:ACC', 'Accumulator'),
+	(0x206, 'B2:PCL', 'Program Counter Low'),
+	(0x207, 'B2:TBLP', 'Table Lookup Low Pointer'),
+	(0x208, 'B2:TBLH', 'Table Lookup High Result'),
+	(0x209, 'B2:TBHP', 'Table Lookup High Pointer'),
+	(0x20A, 'B2:STATUS', 'Status Register'),
+	(0x20B, 'B2:SMOD', 'SMOD Register'),
+	(0x20C, 'B2:LVDC', 'Low Voltage Detector Control'),
+	(0x20D, 'B2:INTEG', 'Interrupt Edge Control'),
+	(0x20E, 'B2:WDTC', 'Watchdog Timer Control'),
+	(0x210, 'B2:INTC0', 'Interrupt Control 0'),
+	(0x211, 'B2:INTC1', 'Interrupt Control 1'),
+	(0x212, 'B2:INTC2', 'Interrupt Control 2'),
+	(0x214, 'B2:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x215, 'B2:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x218, 'B2:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x219, 'B2:PAPU', 'I/O Port A Pull-High Control'),
+	(0x21A, 'B2:PA', 'I/O Port A'),
+	(0x21B, 'B2:PAC', 'I/O Port A Control'),
+	(0x21C, 'B2:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x21F, 'B2:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x220, 'B2:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x222, 'B2:PB', 'I/O Port B'),
+	(0x223, 'B2:PBC', 'I/O Port B Control'),
+	(0x224, 'B2:PC', 'I/O Port C'),
+	(0x225, 'B2:PCC', 'I/O Port C Control'),
+	(0x226, 'B2:PD', 'I/O Port D'),
+	(0x227, 'B2:PDC', 'I/O Port D Control'),
+	(0x228, 'B2:PE', 'I/O Port E'),
+	(0x229, 'B2:PEC', 'I/O Port E Control'),
+	(0x237, 'B2:I2CTOC', 'I2C Timeout Control'),
+	(0x238, 'B2:SIMC0', 'SIM Control 0'),
+	(0x239, 'B2:SIMC1', 'SIM Control 1'),
+	(0x23A, 'B2:SIMD', 'SIM Data'),
+	(0x23B, 'B2:SIMC2', 'SIM Control 2'),
+	(0x23C, 'B2:SPIAC0', 'SPIA Control 0'),
+	(0x23D, 'B2:SPIAC1', 'SPIA Control 1'),
+	(0x23E, 'B2:SPIAD', 'SPIA Data'),
+	(0x23F, 'B2:SBSC', 'SBSC Register'),
+	(0x247, 'B2:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x248, 'B2:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x249, 'B2:TM0C0', 'TM0 Control 0'),
+	(0x24A, 'B2:TM0C1', 'TM0 Control 1'),
+	(0x24C, 'B2:TM0DL', 'TM0 Counter Low'),
+	(0x24D, 'B2:TM0DH', 'TM0 Counter High'),
+	(0x24E, 'B2:TM0AL', 'TM0 CCRA Low'),
+	(0x24F, 'B2:TM0AH', 'TM0 CCRA High'),
+	(0x250, 'B2:TM0RP', 'TM0 CCRP'),
+	(0x252, 'B2:TM1C0', 'TM1 Control 0'),
+	(0x253, 'B2:TM1C1', 'TM1 Control 1'),
+	(0x254, 'B2:TM1DL', 'TM1 Counter Low'),
+	(0x255, 'B2:TM1DH', 'TM1 Counter High'),
+	(0x256, 'B2:TM1AL', 'TM1 CCRA Low'),
+	(0x257, 'B2:TM1AH', 'TM1 CCRA High'),
+	(0x258, 'B2:TM2C0', 'TM2 Control 0'),
+	(0x259, 'B2:TM2C1', 'TM2 Control 1'),
+	(0x25A, 'B2:TM2DL', 'TM2 Counter Low'),
+	(0x25B, 'B2:TM2DH', 'TM2 Counter High'),
+	(0x25C, 'B2:TM2AL', 'TM2 CCRA Low'),
+	(0x25D, 'B2:TM2AH', 'TM2 CCRA High'),
+	(0x25E, 'B2:TM3C0', 'TM3 Control 0'),
+	(0x25F, 'B2:TM3C1', 'TM3 Control 1'),
+	(0x260, 'B2:TM3DL', 'TM3 Counter Low'),
+	(0x261, 'B2:TM3DH', 'TM3 Counter High'),
+	(0x262, 'B2:TM3AL', 'TM3 CCRA Low'),
+	(0x263, 'B2:TM3AH', 'TM3 CCRA High'),
+	(0x264, 'B2:USB_STAT', 'USB Status'),
+	(0x265, 'B2:UINT', 'USB Endpoint Interrupt Control'),
+	(0x266, 'B2:USC', 'USB Control'),
+	(0x267, 'B2:USR', 'USB Endpoint Accessed Detection'),
+	(0x268, 'B2:UCC', 'USB Clock Control'),
+	(0x269, 'B2:AWR', 'USB Address and Wake-Up Control'),
+	(0x26A, 'B2:STLI', 'FIFO In Stall Endpoints'),
+	(0x26B, 'B2:STLO', 'FIFO Out Stall Endpoints'),
+	(0x26C, 'B2:SIES', 'SIES Register'),
+	(0x26D, 'B2:MISC', 'Misc Register'),
+	(0x26E, 'B2:UFIEN', 'USB Input FIFO Control'),
+	(0x26F, 'B2:UFOEN', 'USB Output FIFO Control'),
+	(0x270, 'B2:UFC0', 'USB FIFO Control 0'),
+	(0x271, 'B2:UFC1', 'USB FIFO Control 1'),
+	(0x272, 'B2:FIFO0', 'FIFO 0'),
+	(0x273, 'B2:FIFO1', 'FIFO 1'),
+	(0x274, 'B2:FIFO2', 'FIFO 2'),
+	(0x275, 'B2:FIFO3', 'FIFO 3'),
+	(0x276, 'B2:FIFO4', 'FIFO 4'),
+	(0x277, 'B2:FIFO5', 'FIFO 5'),
+	(0x278, 'B2:FIFO6', 'FIFO 6'),
+	(0x279, 'B2:FIFO7', 'FIFO 7'),
+	(0x27A, 'B2:CTRL', 'CTRL Register'),
+	(0x27B, 'B2:LVRC', 'Low Voltage Reset Control'),
+	(0x27C, 'B2:PDPS', 'PD Power Supply Control'),
+	(0x27D, 'B2:PAPS0', 'PA Power Supply Control 0'),
+	(0x27E, 'B2:PAPS1', 'PA Power Supply Control 1'),
+	(0x27F, 'B2:SYSC', 'USB SYSC Register'),
+	(0x300, 'B3:IAR0', 'Indirect Addressing Register 0'),
+	(0x301, 'B3:MP0', 'Memory Pointer 0'),
+	(0x302, 'B3:IAR1', 'Indirect Addressing Register 1'),
+	(0x303, 'B3:MP1', 'Memory Pointer 1'),
+	(0x304, 'B3:BP', 'Bank Pointer'),
+	(0x305, 'B3:ACC', 'Accumulator'),
+	(0x306, 'B3:PCL', 'Program Counter Low'),
+	(0x307, 'B3:TBLP', 'Table Lookup Low Pointer'),
+	(0x308, 'B3:TBLH', 'Table Lookup High Result'),
+	(0x309, 'B3:TBHP', 'Table Lookup High Pointer'),
+	(0x30A, 'B3:STATUS', 'Status Register'),
+	(0x30B, 'B3:SMOD', 'SMOD Register'),
+	(0x30C, 'B3:LVDC', 'Low Voltage Detector Control'),
+	(0x30D, 'B3:INTEG', 'Interrupt Edge Control'),
+	(0x30E, 'B3:WDTC', 'Watchdog Timer Control'),
+	(0x310, 'B3:INTC0', 'Interrupt Control 0'),
+	(0x311, 'B3:INTC1', 'Interrupt Control 1'),
+	(0x312, 'B3:INTC2', 'Interrupt Control 2'),
+	(0x314, 'B3:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x315, 'B3:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x318, 'B3:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x319, 'B3:PAPU', 'I/O Port A Pull-High Control'),
+	(0x31A, 'B3:PA', 'I/O Port A'),
+	(0x31B, 'B3:PAC', 'I/O Port A Control'),
+	(0x31C, 'B3:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x31F, 'B3:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x320, 'B3:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x322, 'B3:PB', 'I/O Port B'),
+	(0x323, 'B3:PBC', 'I/O Port B Control'),
+	(0x324, 'B3:PC', 'I/O Port C'),
+	(0x325, 'B3:PCC', 'I/O Port C Control'),
+	(0x326, 'B3:PD', 'I/O Port D'),
+	(0x327, 'B3:PDC', 'I/O Port D Control'),
+	(0x328, 'B3:PE', 'I/O Port E'),
+	(0x329, 'B3:PEC', 'I/O Port E Control'),
+	(0x337, 'B3:I2CTOC', 'I2C Timeout Control'),
+	(0x338, 'B3:SIMC0', 'SIM Control 0'),
+	(0x339, 'B3:SIMC1', 'SIM Control 1'),
+	(0x33A, 'B3:SIMD', 'SIM Data'),
+	(0x33B, 'B3:SIMC2', 'SIM Control 2'),
+	(0x33C, 'B3:SPIAC0', 'SPIA Control 0'),
+	(0x33D, 'B3:SPIAC1', 'SPIA Control 1'),
+	(0x33E, 'B3:SPIAD', 'SPIA Data'),
+	(0x33F, 'B3:SBSC', 'SBSC Register'),
+	(0x347, 'B3:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x348, 'B3:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x349, 'B3:TM0C0', 'TM0 Control 0'),
+	(0x34A, 'B3:TM0C1', 'TM0 Control 1'),
+	(0x34C, 'B3:TM0DL', 'TM0 Counter Low'),
+	(0x34D, 'B3:TM0DH', 'TM0 Counter High'),
+	(0x34E, 'B3:TM0AL', 'TM0 CCRA Low'),
+	(0x34F, 'B3:TM0AH', 'TM0 CCRA High'),
+	(0x350, 'B3:TM0RP', 'TM0 CCRP'),
+	(0x352, 'B3:TM1C0', 'TM1 Control 0'),
+	(0x353, 'B3:TM1C1', 'TM1 Control 1'),
+	(0x354, 'B3:TM1DL', 'TM1 Counter Low'),
+	(0x355, 'B3:TM1DH', 'TM1 Counter High'),
+	(0x356, 'B3:TM1AL', 'TM1 CCRA Low'),
+	(0x357, 'B3:TM1AH', 'TM1 CCRA High'),
+	(0x358, 'B3:TM2C0', 'TM2 Control 0'),
+	(0x359, 'B3:TM2C1', 'TM2 Control 1'),
+	(0x35A, 'B3:TM2DL', 'TM2 Counter Low'),
+	(0x35B, 'B3:TM2DH', 'TM2 Counter High'),
+	(0x35C, 'B3:TM2AL', 'TM2 CCRA Low'),
+	(0x35D, 'B3:TM2AH', 'TM2 CCRA High'),
+	(0x35E, 'B3:TM3C0', 'TM3 Control 0'),
+	(0x35F, 'B3:TM3C1', 'TM3 Control 1'),
+	(0x360, 'B3:TM3DL', 'TM3 Counter Low'),
+	(0x361, 'B3:TM3DH', 'TM3 Counter High'),
+	(0x362, 'B3:TM3AL', 'TM3 CCRA Low'),
+	(0x363, 'B3:TM3AH', 'TM3 CCRA High'),
+	(0x364, 'B3:USB_STAT', 'USB Status'),
+	(0x365, 'B3:UINT', 'USB Endpoint Interrupt Control'),
+	(0x366, 'B3:USC', 'USB Control'),
+	(0x367, 'B3:USR', 'USB Endpoint Accessed Detection'),
+	(0x368, 'B3:UCC', 'USB Clock Control'),
+	(0x369, 'B3:AWR', 'USB Address and Wake-Up Control'),
+	(0x36A, 'B3:STLI', 'FIFO In Stall Endpoints'),
+	(0x36B, 'B3:STLO', 'FIFO Out Stall Endpoints'),
+	(0x36C, 'B3:SIES', 'SIES Register'),
+	(0x36D, 'B3:MISC', 'Misc Register'),
+	(0x36E, 'B3:UFIEN', 'USB Input FIFO Control'),
+	(0x36F, 'B3:UFOEN', 'USB Output FIFO Control'),
+	(0x370, 'B3:UFC0', 'USB FIFO Control 0'),
+	(0x371, 'B3:UFC1', 'USB FIFO Control 1'),
+	(0x372, 'B3:FIFO0', 'FIFO 0'),
+	(0x373, 'B3:FIFO1', 'FIFO 1'),
+	(0x374, 'B3:FIFO2', 'FIFO 2'),
+	(0x375, 'B3:FIFO3', 'FIFO 3'),
+	(0x376, 'B3:FIFO4', 'FIFO 4'),
+	(0x377, 'B3:FIFO5', 'FIFO 5'),
+	(0x378, 'B3:FIFO6', 'FIFO 6'),
+	(0x379, 'B3:FIFO7', 'FIFO 7'),
+	(0x37A, 'B3:CTRL', 'CTRL Register'),
+	(0x37B, 'B3:LVRC', 'Low Voltage Reset Control'),
+	(0x37C, 'B3:PDPS', 'PD Power Supply Control'),
+	(0x37D, 'B3:PAPS0', 'PA Power Supply Control 0'),
+	(0x37E, 'B3:PAPS1', 'PA Power Supply Control 1'),
+	(0x37F, 'B3:SYSC', 'USB SYSC Register'),
+	(0x400, 'B4:IAR0', 'Indirect Addressing Register 0'),
+	(0x401, 'B4:MP0', 'Memory Pointer 0'),
+	(0x402, 'B4:IAR1', 'Indirect Addressing Register 1'),
+	(0x403, 'B4:MP1', 'Memory Pointer 1'),
+	(0x404, 'B4:BP', 'Bank Pointer'),
+	(0x405, 'B4:ACC', 'Accumulator'),
+	(0x406, 'B4:PCL', 'Program Counter Low'),
+	(0x407, 'B4:TBLP', 'Table Lookup Low Pointer'),
+	(0x408, 'B4:TBLH', 'Table Lookup High Result'),
+	(0x409, 'B4:TBHP', 'Table Lookup High Pointer'),
+	(0x40A, 'B4:STATUS', 'Status Register'),
+	(0x40B, 'B4:SMOD', 'SMOD Register'),
+	(0x40C, 'B4:LVDC', 'Low Voltage Detector Control'),
+	(0x40D, 'B4:INTEG', 'Interrupt Edge Control'),
+	(0x40E, 'B4:WDTC', 'Watchdog Timer Control'),
+	(0x410, 'B4:INTC0', 'Interrupt Control 0'),
+	(0x411, 'B4:INTC1', 'Interrupt Control 1'),
+	(0x412, 'B4:INTC2', 'Interrupt Control 2'),
+	(0x414, 'B4:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x415, 'B4:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x418, 'B4:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x419, 'B4:PAPU', 'I/O Port A Pull-High Control'),
+	(0x41A, 'B4:PA', 'I/O Port A'),
+	(0x41B, 'B4:PAC', 'I/O Port A Control'),
+	(0x41C, 'B4:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x41F, 'B4:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x420, 'B4:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x422, 'B4:PB', 'I/O Port B'),
+	(0x423, 'B4:PBC', 'I/O Port B Control'),
+	(0x424, 'B4:PC', 'I/O Port C'),
+	(0x425, 'B4:PCC', 'I/O Port C Control'),
+	(0x426, 'B4:PD', 'I/O Port D'),
+	(0x427, 'B4:PDC', 'I/O Port D Control'),
+	(0x428, 'B4:PE', 'I/O Port E'),
+	(0x429, 'B4:PEC', 'I/O Port E Control'),
+	(0x437, 'B4:I2CTOC', 'I2C Timeout Control'),
+	(0x438, 'B4:SIMC0', 'SIM Control 0'),
+	(0x439, 'B4:SIMC1', 'SIM Control 1'),
+	(0x43A, 'B4:SIMD', 'SIM Data'),
+	(0x43B, 'B4:SIMC2', 'SIM Control 2'),
+	(0x43C, 'B4:SPIAC0', 'SPIA Control 0'),
+	(0x43D, 'B4:SPIAC1', 'SPIA Control 1'),
+	(0x43E, 'B4:SPIAD', 'SPIA Data'),
+	(0x43F, 'B4:SBSC', 'SBSC Register'),
+	(0x447, 'B4:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x448, 'B4:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x449, 'B4:TM0C0', 'TM0 Control 0'),
+	(0x44A, 'B4:TM0C1', 'TM0 Control 1'),
+	(0x44C, 'B4:TM0DL', 'TM0 Counter Low'),
+	(0x44D, 'B4:TM0DH', 'TM0 Counter High'),
+	(0x44E, 'B4:TM0AL', 'TM0 CCRA Low'),
+	(0x44F, 'B4:TM0AH', 'TM0 CCRA High'),
+	(0x450, 'B4:TM0RP', 'TM0 CCRP'),
+	(0x452, 'B4:TM1C0', 'TM1 Control 0'),
+	(0x453, 'B4:TM1C1', 'TM1 Control 1'),
+	(0x454, 'B4:TM1DL', 'TM1 Counter Low'),
+	(0x455, 'B4:TM1DH', 'TM1 Counter High'),
+	(0x456, 'B4:TM1AL', 'TM1 CCRA Low'),
+	(0x457, 'B4:TM1AH', 'TM1 CCRA High'),
+	(0x458, 'B4:TM2C0', 'TM2 Control 0'),
+	(0x459, 'B4:TM2C1', 'TM2 Control 1'),
+	(0x45A, 'B4:TM2DL', 'TM2 Counter Low'),
+	(0x45B, 'B4:TM2DH', 'TM2 Counter High'),
+	(0x45C, 'B4:TM2AL', 'TM2 CCRA Low'),
+	(0x45D, 'B4:TM2AH', 'TM2 CCRA High'),
+	(0x45E, 'B4:TM3C0', 'TM3 Control 0'),
+	(0x45F, 'B4:TM3C1', 'TM3 Control 1'),
+	(0x460, 'B4:TM3DL', 'TM3 Counter Low'),
+	(0x461, 'B4:TM3DH', 'TM3 Counter High'),
+	(0x462, 'B4:TM3AL', 'TM3 CCRA Low'),
+	(0x463, 'B4:TM3AH', 'TM3 CCRA High'),
+	(0x464, 'B4:USB_STAT', 'USB Status'),
+	(0x465, 'B4:UINT', 'USB Endpoint Interrupt Control'),
+	(0x466, 'B4:USC', 'USB Control'),
+	(0x467, 'B4:USR', 'USB Endpoint Accessed Detection'),
+	(0x468, 'B4:UCC', 'USB Clock Control'),
+	(0x469, 'B4:AWR', 'USB Address and Wake-Up Control'),
+	(0x46A, 'B4:STLI', 'FIFO In Stall Endpoints'),
+	(0x46B, 'B4:STLO', 'FIFO Out Stall Endpoints'),
+	(0x46C, 'B4:SIES', 'SIES Register'),
+	(0x46D, 'B4:MISC', 'Misc Register'),
+	(0x46E, 'B4:UFIEN', 'USB Input FIFO Control'),
+	(0x46F, 'B4:UFOEN', 'USB Output FIFO Control'),
+	(0x470, 'B4:UFC0', 'USB FIFO Control 0'),
+	(0x471, 'B4:UFC1', 'USB FIFO Control 1'),
+	(0x472, 'B4:FIFO0', 'FIFO 0'),
+	(0x473, 'B4:FIFO1', 'FIFO 1'),
+	(0x474, 'B4:FIFO2', 'FIFO 2'),
+	(0x475, 'B4:FIFO3', 'FIFO 3'),
+	(0x476, 'B4:FIFO4', 'FIFO 4'),
+	(0x477, 'B4:FIFO5', 'FIFO 5'),
+	(0x478, 'B4:FIFO6', 'FIFO 6'),
+	(0x479, 'B4:FIFO7', 'FIFO 7'),
+	(0x47A, 'B4:CTRL', 'CTRL Register'),
+	(0x47B, 'B4:LVRC', 'Low Voltage Reset Control'),
+	(0x47C, 'B4:PDPS', 'PD Power Supply Control'),
+	(0x47D, 'B4:PAPS0', 'PA Power Supply Control 0'),
+	(0x47E, 'B4:PAPS1', 'PA Power Supply Control 1'),
+	(0x47F, 'B4:SYSC', 'USB SYSC Register'),
+	(0x500, 'B5:IAR0', 'Indirect Addressing Register 0'),
+	(0x501, 'B5:MP0', 'Memory Pointer 0'),
+	(0x502, 'B5:IAR1', 'Indirect Addressing Register 1'),
+	(0x503, 'B5:MP1', 'Memory Pointer 1'),
+	(0x504, 'B5:BP', 'Bank Pointer'),
+	(0x505, 'B5:ACC', 'Accumulator'),
+	(0x506, 'B5:PCL', 'Program Counter Low'),
+	(0x507, 'B5:TBLP', 'Table Lookup Low Pointer'),
+	(0x508, 'B5:TBLH', 'Table Lookup High Result'),
+	(0x509, 'B5:TBHP', 'Table Lookup High Pointer'),
+	(0x50A, 'B5:STATUS', 'Status Register'),
+	(0x50B, 'B5:SMOD', 'SMOD Register'),
+	(0x50C, 'B5:LVDC', 'Low Voltage Detector Control'),
+	(0x50D, 'B5:INTEG', 'Interrupt Edge Control'),
+	(0x50E, 'B5:WDTC', 'Watchdog Timer Control'),
+	(0x510, 'B5:INTC0', 'Interrupt Control 0'),
+	(0x511, 'B5:INTC1', 'Interrupt Control 1'),
+	(0x512, 'B5:INTC2', 'Interrupt Control 2'),
+	(0x514, 'B5:MFI0', 'Multi-Function Interrupt Control 0'),
+	(0x515, 'B5:MFI1', 'Multi-Function Interrupt Control 1'),
+	(0x518, 'B5:PAWU', 'I/O Port A Wake-Up Control'),
+	(0x519, 'B5:PAPU', 'I/O Port A Pull-High Control'),
+	(0x51A, 'B5:PA', 'I/O Port A'),
+	(0x51B, 'B5:PAC', 'I/O Port A Control'),
+	(0x51C, 'B5:PADIR', 'I/O Port A Wake-Up Polarity Control Register'),
+	(0x51F, 'B5:PXWU', 'I/O Port B-E Wake-Up Control'),
+	(0x520, 'B5:PXPU', 'I/O Port B-E Pull-High Control'),
+	(0x522, 'B5:PB', 'I/O Port B'),
+	(0x523, 'B5:PBC', 'I/O Port B Control'),
+	(0x524, 'B5:PC', 'I/O Port C'),
+	(0x525, 'B5:PCC', 'I/O Port C Control'),
+	(0x526, 'B5:PD', 'I/O Port D'),
+	(0x527, 'B5:PDC', 'I/O Port D Control'),
+	(0x528, 'B5:PE', 'I/O Port E'),
+	(0x529, 'B5:PEC', 'I/O Port E Control'),
+	(0x537, 'B5:I2CTOC', 'I2C Timeout Control'),
+	(0x538, 'B5:SIMC0', 'SIM Control 0'),
+	(0x539, 'B5:SIMC1', 'SIM Control 1'),
+	(0x53A, 'B5:SIMD', 'SIM Data'),
+	(0x53B, 'B5:SIMC2', 'SIM Control 2'),
+	(0x53C, 'B5:SPIAC0', 'SPIA Control 0'),
+	(0x53D, 'B5:SPIAC1', 'SPIA Control 1'),
+	(0x53E, 'B5:SPIAD', 'SPIA Data'),
+	(0x53F, 'B5:SBSC', 'SBSC Register'),
+	(0x547, 'B5:TMPC0', 'TM I/O Pin Control Register 0'),
+	(0x548, 'B5:TMPC1', 'TM I/O Pin Control Register 1'),
+	(0x549, 'B5:TM0C0', 'TM0 Control 0'),
+	(0x54A, 'B5:TM0C1', 'TM0 Control 1'),
+	(0x54C, 'B5:TM0DL', 'TM0 Counter Low'),
+	(0x54D, 'B5:TM0DH', 'TM0 Counter High'),
+	(0x54E, 'B5:TM0AL', 'TM0 CCRA Low'),
+	(0x54F, 'B5:TM0AH', 'TM0 CCRA High'),
+	(0x550, 'B5:TM0RP', 'TM0 CCRP'),
+	(0x552, 'B5:TM1C0', 'TM1 Control 0'),
+	(0x553, 'B5:TM1C1', 'TM1 Control 1'),
+	(0x554, 'B5:TM1DL', 'TM1 Counter Low'),
+	(0x555, 'B5:TM1DH', 'TM1 Counter High'),
+	(0x556, 'B5:TM1AL', 'TM1 CCRA Low'),
+	(0x557, 'B5:TM1AH', 'TM1 CCRA High'),
+	(0x558, 'B5:TM2C0', 'TM2 Control 0'),
+	(0x559, 'B5:TM2C1', 'TM2 Control 1'),
+	(0x55A, 'B5:TM2DL', 'TM2 Counter Low'),
+	(0x55B, 'B5:TM2DH', 'TM2 Counter High'),
+	(0x55C, 'B5:TM2AL', 'TM2 CCRA Low'),
+	(0x55D, 'B5:TM2AH', 'TM2 CCRA High'),
+	(0x55E, 'B5:TM3C0', 'TM3 Control 0'),
+	(0x55F, 'B5:TM3C1', 'TM3 Control 1'),
+	(0x560, 'B5:TM3DL', 'TM3 Counter Low'),
+	(0x561, 'B5:TM3DH', 'TM3 Counter High'),
+	(0x562, 'B5:TM3AL', 'TM3 CCRA Low'),
+	(0x563, 'B5:TM3AH', 'TM3 CCRA High'),
+	(0x564, 'B5:USB_STAT', 'USB Status'),
+	(0x565, 'B5:UINT', 'USB Endpoint Interrupt Control'),
+	(0x566, 'B5:USC', 'USB Control'),
+	(0x567, 'B5:USR', 'USB Endpoint Accessed Detection'),
+	(0x568, 'B5:UCC', 'USB Clock Control'),
+	(0x569, 'B5:AWR', 'USB Address and Wake-Up Control'),
+	(0x56A, 'B5:STLI', 'FIFO In Stall Endpoints'),
+	(0x56B, 'B5:STLO', 'FIFO Out Stall Endpoints'),
+	(0x56C, 'B5:SIES', 'SIES Register'),
+	(0x56D, 'B5:MISC', 'Misc Register'),
+	(0x56E, 'B5:UFIEN', 'USB Input FIFO Control'),
+	(0x56F, 'B5:UFOEN', 'USB Output FIFO Control'),
+	(0x570, 'B5:UFC0', 'USB FIFO Control 0'),
+	(0x571, 'B5:UFC1', 'USB FIFO Control 1'),
+	(0x572, 'B5:FIFO0', 'FIFO 0'),
+	(0x573, 'B5:FIFO1', 'FIFO 1'),
+	(0x574, 'B5:FIFO2', 'FIFO 2'),
+	(0x575, 'B5:FIFO3', 'FIFO 3'),
+	(0x576, 'B5:FIFO4', 'FIFO 4'),
+	(0x577, 'B5:FIFO5', 'FIFO 5'),
+	(0x578, 'B5:FIFO6', 'FIFO 6'),
+	(0x579, 'B5:FIFO7', 'FIFO 7'),
+	(0x57A, 'B5:CTRL', 'CTRL Register'),
+	(0x57B, 'B5:LVRC', 'Low Voltage Reset Control'),
+	(0x57C, 'B5:PDPS', 'PD Power Supply Control'),
+	(0x57D, 'B5:PAPS0', 'PA Power Supply Control 0'),
+	(0x57E, 'B5:PAPS1', 'PA Power Supply Control 1'),
+	(0x57F, 'B5:SYSC', 'USB SYSC Register'),
+]
+
+# (address, enum name, [(bit, member name), ...]) for registers with named bits
+BIT_ENUMS = [
+	(0x04, 'bit_BP', [(0, 'BP:DMBP0'), (1, 'BP:DMBP1'), (2, 'BP:DMBP2'), (5, 'BP:PMBP0')]),
+	(0x0A, 'bit_STATUS', [(0, 'STATUS:C'), (1, 'STATUS:AC'), (2, 'STATUS:Z'), (3, 'STATUS:OV'), (4, 'STATUS:PDF'), (5, 'STATUS:TO')]),
+	(0x0B, 'bit_SMOD', [(0, 'SMOD:HLCLK'), (1, 'SMOD:IDLEN'), (2, 'SMOD:HTO'), (3, 'SMOD:LTO'), (4, 'SMOD:FSTEN'), (5, 'SMOD:CKS0'), (6, 'SMOD:CKS1'), (7, 'SMOD:CKS2')]),
+	(0x0C, 'bit_LVDC', [(0, 'LVDC:VLVD0'), (1, 'LVDC:VLVD1'), (2, 'LVDC:VLVD2'), (4, 'LVDC:LVDEN'), (5, 'LVDC:LVDO')]),
+	(0x0D, 'bit_INTEG', [(0, 'INTEG:INT0S0'), (1, 'INTEG:INT0S1'), (2, 'INTEG:INT1S0'), (3, 'INTEG:INT1S1')]),
+	(0x0E, 'bit_WDTC', [(0, 'WDTC:WS0'), (1, 'WDTC:WS1'), (2, 'WDTC:WS2'), (3, 'WDTC:WE0'), (4, 'WDTC:WE1'), (5, 'WDTC:WE2'), (6, 'WDTC:WE3'), (7, 'WDTC:WE4')]),
+	(0x10, 'bit_INTC0', [(0, 'INTC0:EMI'), (1, 'INTC0:INT0E'), (2, 'INTC0:INT1E'), (3, 'INTC0:USBE'), (4, 'INTC0:INT0F'), (5, 'INTC0:INT1F'), (6, 'INTC0:USBF')]),
+	(0x11, 'bit_INTC1', [(0, 'INTC1:LVE'), (2, 'INTC1:MF0E'), (3, 'INTC1:MF1E'), (4, 'INTC1:LVF'), (6, 'INTC1:MF0F'), (7, 'INTC1:MF1F')]),
+	(0x12, 'bit_INTC2', [(0, 'INTC2:MF2E'), (1, 'INTC2:MF3E'), (2, 'INTC2:SIME'), (3, 'INTC2:SPIAE'), (4, 'INTC2:MF2F'), (5, 'INTC2:MF3F'), (6, 'INTC2:SIMF'), (7, 'INTC2:SPIAF')]),
+	(0x14, 'bit_MFI0', [(0, 'MFI0:T0PE'), (1, 'MFI0:T0AE'), (2, 'MFI0:T1PE'), (3, 'MFI0:T1AE'), (4, 'MFI0:T0PF'), (5, 'MFI0:T0AF'), (6, 'MFI0:T1PF'), (7, 'MFI0:T1AF')]),
+	(0x15, 'bit_MFI1', [(0, 'MFI1:T2PE'), (1, 'MFI1:T2AE'), (2, 'MFI1:T3PE'), (3, 'MFI1:T3AE'), (4, 'MFI1:T2PF'), (5, 'MFI1:T2AF'), (6, 'MFI1:T3PF'), (7, 'MFI1:T3AF')]),
+	(0x18, 'bit_PAWU', [(0, 'PAWU:PAWU0'), (1, 'PAWU:PAWU1'), (2, 'PAWU:PAWU2'), (3, 'PAWU:PAWU3'), (4, 'PAWU:PAWU4'), (5, 'PAWU:PAWU5'), (6, 'PAWU:PAWU6'), (7, 'PAWU:PAWU7')]),
+	(0x19, 'bit_PAPU', [(0, 'PAPU:PAPU0'), (1, 'PAPU:PAPU1'), (2, 'PAPU:PAPU2'), (3, 'PAPU:PAPU3'), (4, 'PAPU:PAPU4'), (5, 'PAPU:PAPU5'), (6, 'PAPU:PAPU6'), (7, 'PAPU:PAPU7')]),
+	(0x1A, 'bit_PA', [(0, 'PA:PA0'), (1, 'PA:PA1'), (2, 'PA:PA2'), (3, 'PA:PA3'), (4, 'PA:PA4'), (5, 'PA:PA5'), (6, 'PA:PA6'), (7, 'PA:PA7')]),
+	(0x1B, 'bit_PAC', [(0, 'PAC:PAC0'), (1, 'PAC:PAC1'), (2, 'PAC:PAC2'), (3, 'PAC:PAC3'), (4, 'PAC:PAC4'), (5, 'PAC:PAC5'), (6, 'PAC:PAC6'), (7, 'PAC:PAC7')]),
+	(0x1F, 'bit_PXWU', [(0, 'PXWU:PBLWU'), (1, 'PXWU:PBHWU'), (2, 'PXWU:PCLWU'), (3, 'PXWU:PCHWU'), (4, 'PXWU:PDLWU'), (5, 'PXWU:PDHWU'), (6, 'PXWU:PELWU'), (7, 'PXWU:PEHWU')]),
+	(0x20, 'bit_PXPU', [(0, 'PXPU:PBLPU'), (1, 'PXPU:PBHPU'), (2, 'PXPU:PCLPU'), (3, 'PXPU:PCHPU'), (4, 'PXPU:PDLPU'), (5, 'PXPU:PDHPU'), (6, 'PXPU:PELPU'), (7, 'PXPU:PEHPU')]),
+	(0x22, 'bit_PB', [(0, 'PB:PB0'), (1, 'PB:PB1'), (2, 'PB:PB2'), (3, 'PB:PB3'), (4, 'PB:PB4'), (5, 'PB:PB5'), (6, 'PB:PB6'), (7, 'PB:PB7')]),
+	(0x23, 'bit_PBC', [(0, 'PBC:PBC0'), (1, 'PBC:PBC1'), (2, 'PBC:PBC2'), (3, 'PBC:PBC3'), (4, 'PBC:PBC4'), (5, 'PBC:PBC5'), (6, 'PBC:PBC6'), (7, 'PBC:PBC7')]),
+	(0x24, 'bit_PC', [(0, 'PC:PC0'), (1, 'PC:PC1'), (2, 'PC:PC2'), (3, 'PC:PC3'), (4, 'PC:PC4'), (5, 'PC:PC5'), (6, 'PC:PC6'), (7, 'PC:PC7')]),
+	(0x25, 'bit_PCC', [(0, 'PCC:PCC0'), (1, 'PCC:PCC1'), (2, 'PCC:PCC2'), (3, 'PCC:PCC3'), (4, 'PCC:PCC4'), (5, 'PCC:PCC5'), (6, 'PCC:PCC6'), (7, 'PCC:PCC7')]),
+	(0x26, 'bit_PD', [(0, 'PD:PD0'), (1, 'PD:PD1'), (2, 'PD:PD2'), (3, 'PD:PD3'), (4, 'PD:PD4'), (5, 'PD:PD5'), (6, 'PD:PD6'), (7, 'PD:PD7')]),
+	(0x27, 'bit_PDC', [(0, 'PDC:PDC0'), (1, 'PDC:PDC1'), (2, 'PDC:PDC2'), (3, 'PDC:PDC3'), (4, 'PDC:PDC4'), (5, 'PDC:PDC5'), (6, 'PDC:PDC6'), (7, 'PDC:PDC7')]),
+	(0x28, 'bit_PE', [(0, 'PE:PE0'), (1, 'PE:PE1'), (2, 'PE:PE2'), (3, 'PE:PE3'), (4, 'PE:PE4'), (5, 'PE:PE5')]),
+	(0x29, 'bit_PEC', [(0, 'PEC:PEC0'), (1, 'PEC:PEC1'), (2, 'PEC:PEC2'), (3, 'PEC:PEC3'), (4, 'PEC:PEC4'), (5, 'PEC:PEC5')]),
+	(0x37, 'bit_I2CTOC', [(0, 'I2CTOC:I2CTOS0'), (1, 'I2CTOC:I2CTOS1'), (2, 'I2CTOC:I2CTOS2'), (3, 'I2CTOC:I2CTOS3'), (4, 'I2CTOC:I2CTOS4'), (5, 'I2CTOC:I2CTOS5'), (6, 'I2CTOC:I2CTOF'), (7, 'I2CTOC:I2CTOEN')]),
+	(0x38, 'bit_SIMC0', [(1, 'SIMC0:SIMEN'), (2, 'SIMC0:PCKP0'), (3, 'SIMC0:PCKP1'), (4, 'SIMC0:PCKEN'), (5, 'SIMC0:SIM0'), (6, 'SIMC0:SIM1'), (7, 'SIMC0:SIM2')]),
+	(0x39, 'bit_SIMC1', [(0, 'SIMC1:RXAK'), (1, 'SIMC1:IAMWU'), (2, 'SIMC1:SRW'), (3, 'SIMC1:TXAK'), (4, 'SIMC1:HTX'), (5, 'SIMC1:HBB'), (6, 'SIMC1:HAAS'), (7, 'SIMC1:HCF')]),
+	(0x3B, 'bit_SIMC2', [(0, 'SIMC2:TRF'), (1, 'SIMC2:WCOL'), (2, 'SIMC2:CSEN'), (3, 'SIMC2:MLS'), (4, 'SIMC2:CKEG'), (5, 'SIMC2:CKPOLB'), (6, 'SIMC2:IICA5'), (7, 'SIMC2:IICA6')]),
+	(0x3C, 'bit_SPIAC0', [(1, 'SPIAC0:SPIAEN'), (5, 'SPIAC0:SASPI0'), (6, 'SPIAC0:SASPI1'), (7, 'SPIAC0:SASPI2')]),
+	(0x3D, 'bit_SPIAC1', [(0, 'SPIAC1:SATRF'), (1, 'SPIAC1:SAWCOL'), (2, 'SPIAC1:SACSEN'), (3, 'SPIAC1:SAMLS'), (4, 'SPIAC1:SACKEG'), (5, 'SPIAC1:SACKPOL')]),
+	(0x3F, 'bit_SBSC', [(0, 'SBSC:SA_WCOL'), (4, 'SBSC:I2CDB0'), (5, 'SBSC:I2CDB1'), (7, 'SBSC:SIM_WCOL')]),
+	(0x47, 'bit_TMPC0', [(0, 'TMPC0:T0CP0'), (1, 'TMPC0:T0CP1'), (4, 'TMPC0:T1CP0'), (5, 'TMPC0:T1CP1')]),
+	(0x48, 'bit_TMPC1', [(0, 'TMPC1:T2CP0'), (1, 'TMPC1:T2CP1'), (4, 'TMPC1:T3CP0'), (5, 'TMPC1:T3CP1')]),
+	(0x49, 'bit_TM0C0', [(3, 'TM0C0:T0ON'), (4, 'TM0C0:T0CK0'), (5, 'TM0C0:T0CK1'), (6, 'TM0C0:T0CK2'), (7, 'TM0C0:T0PAU')]),
+	(0x4A, 'bit_TM0C1', [(0, 'TM0C1:T0CLR'), (1, 'TM0C1:T0PX'), (2, 'TM0C1:T0POL'), (3, 'TM0C1:T0OC'), (4, 'TM0C1:T0IO0'), (5, 'TM0C1:T0IO1'), (6, 'TM0C1:T0M0'), (7, 'TM0C1:T0M1')]),
+	(0x52, 'bit_TM1C0', [(0, 'TM1C0:T1RP0'), (1, 'TM1C0:T1RP1'), (2, 'TM1C0:T1RP2'), (3, 'TM1C0:T1ON'), (4, 'TM1C0:T1CK0'), (5, 'TM1C0:T1CK1'), (6, 'TM1C0:T1CK2'), (7, 'TM1C0:T1PAU')]),
+	(0x53, 'bit_TM1C1', [(0, 'TM1C1:T1CCLR'), (1, 'TM1C1:T1DPX'), (2, 'TM1C1:T1POL'), (3, 'TM1C1:T1OC'), (4, 'TM1C1:T1IO0'), (5, 'TM1C1:T1IO1'), (6, 'TM1C1:T1M0'), (7, 'TM1C1:T1M1')]),
+	(0x58, 'bit_TM2C0', [(0, 'TM2C0:T2RP0'), (1, 'TM2C0:T2RP1'), (2, 'TM2C0:T2RP2'), (3, 'TM2C0:T2ON'), (4, 'TM2C0:T2CK0'), (5, 'TM2C0:T2CK1'), (6, 'TM2C0:T2CK2'), (7, 'TM2C0:T2PAU')]),
+	(0x59, 'bit_TM2C1', [(0, 'TM2C1:T2CLR'), (1, 'TM2C1:T2PX'), (2, 'TM2C1:T2POL'), (3, 'TM2C1:T2OC'), (4, 'TM2C1:T2IO0'), (5, 'TM2C1:T2IO1'), (6, 'TM2C1:T2M0'), (7, 'TM2C1:T2M1')]),
+	(0x5E, 'bit_TM3C0', [(0, 'TM3C0:T3RP0'), (1, 'TM3C0:T3RP1'), (2, 'TM3C0:T3RP2'), (3, 'TM3C0:T3ON'), (4, 'TM3C0:T3CK0'), (5, 'TM3C0:T3CK1'), (6, 'TM3C0:T3CK2'), (7, 'TM3C0:T3PAU')]),
+	(0x5F, 'bit_TM3C1', [(0, 'TM3C1:T3CLR'), (1, 'TM3C1:T3PX'), (2, 'TM3C1:T3POL'), (3, 'TM3C1:T3OC'), (4, 'TM3C1:T3IO0'), (5, 'TM3C1:T3IO1'), (6, 'TM3C1:T3M0'), (7, 'TM3C1:T3M1')]),
+	(0x64, 'bit_USB_STAT', [(0, 'USB_STAT:ESD'), (1, 'USB_STAT:PU'), (2, 'USB_STAT:SE0'), (3, 'USB_STAT:SE1'), (4, 'USB_STAT:PS2_DAI'), (5, 'USB_STAT:PS2_CKI'), (6, 'USB_STAT:PS2_DAO'), (7, 'USB_STAT:PS2_CKO')]),
+	(0x65, 'bit_UINT', [(0, 'UINT:EP0EN'), (1, 'UINT:EP1EN'), (2, 'UINT:EP2EN'), (3, 'UINT:EP3EN'), (4, 'UINT:EP4EN'), (5, 'UINT:EP5EN'), (6, 'UINT:EP6EN'), (7, 'UINT:EP7EN')]),
+	(0x66, 'bit_USC', [(0, 'USC:SUSP'), (1, 'USC:RMWK'), (2, 'USC:URST'), (3, 'USC:RESUME'), (4, 'USC:SELUSB'), (5, 'USC:PLL'), (6, 'USC:SELPS2'), (7, 'USC:URD')]),
+	(0x67, 'bit_USR', [(0, 'USR:EP0F'), (1, 'USR:EP1F'), (2, 'USR:EP2F'), (3, 'USR:EP3F'), (4, 'USR:EP4F'), (5, 'USR:EP5F'), (6, 'USR:EP6F'), (7, 'USR:EP7F')]),
+	(0x68, 'bit_UCC', [(0, 'UCC:EPS0'), (1, 'UCC:EPS1'), (2, 'UCC:EPS2'), (3, 'UCC:USBCKEN'), (4, 'UCC:SUSP2'), (5, 'UCC:FSYS16MHZ'), (6, 'UCC:SYSCLK'), (7, 'UCC:RCTRL')]),
+	(0x69, 'bit_AWR', [(0, 'AWR:WKEN'), (1, 'AWR:AD0'), (2, 'AWR:AD1'), (3, 'AWR:AD2'), (4, 'AWR:AD3'), (5, 'AWR:AD4'), (6, 'AWR:AD5'), (7, 'AWR:AD6')]),
+	(0x6A, 'bit_STLI', [(0, 'STLI:STLI0'), (1, 'STLI:STLI1'), (2, 'STLI:STLI2'), (3, 'STLI:STLI3'), (4, 'STLI:STLI4'), (5, 'STLI:STLI5'), (6, 'STLI:STLI6'), (7, 'STLI:STLI7')]),
+	(0x6B, 'bit_STLO', [(0, 'STLO:STLO0'), (1, 'STLO:STLO1'), (2, 'STLO:STLO2'), (3, 'STLO:STLO3'), (4, 'STLO:STLO4'), (5, 'STLO:STLO5'), (6, 'STLO:STLO6'), (7, 'STLO:STLO7')]),
+	(0x6C, 'bit_SIES', [(0, 'SIES:ASET'), (1, 'SIES:ERR'), (2, 'SIES:OUT'), (3, 'SIES:IN'), (4, 'SIES:NAK'), (6, 'SIES:CRCF'), (7, 'SIES:NMI')]),
+	(0x6D, 'bit_MISC', [(0, 'MISC:REQUEST'), (1, 'MISC:TX'), (2, 'MISC:CLEAR'), (3, 'MISC:E3IDF'), (4, 'MISC:E4ODF'), (5, 'MISC:SETCMD'), (6, 'MISC:READY'), (7, 'MISC:LEN0')]),
+	(0x6E, 'bit_UFIEN', [(0, 'UFIEN:FIFO_DEF'), (1, 'UFIEN:SETI1'), (2, 'UFIEN:SETI2'), (3, 'UFIEN:SETI3'), (4, 'UFIEN:SETI4'), (5, 'UFIEN:SETI5'), (6, 'UFIEN:SETI6'), (7, 'UFIEN:SETI7')]),
+	(0x6F, 'bit_UFOEN', [(0, 'UFOEN:DATATG'), (1, 'UFOEN:SETO1'), (2, 'UFOEN:SETO2'), (3, 'UFOEN:SETO3'), (4, 'UFOEN:SETO4'), (5, 'UFOEN:SETO5'), (6, 'UFOEN:SETO6'), (7, 'UFOEN:SETO7')]),
+	(0x70, 'bit_UFC0', [(2, 'UFC0:E1FS0'), (3, 'UFC0:E1FS1'), (4, 'UFC0:E2FS0'), (5, 'UFC0:E2FS1'), (6, 'UFC0:E3FS0'), (7, 'UFC0:E3FS1')]),
+	(0x71, 'bit_UFC1', [(0, 'UFC1:E4FS0'), (1, 'UFC1:E4FS1'), (2, 'UFC1:E5FS0'), (3, 'UFC1:E5FS1'), (4, 'UFC1:E6FS0'), (5, 'UFC1:E6FS1'), (6, 'UFC1:E7FS0'), (7, 'UFC1:E7FS1')]),
+	(0x7A, 'bit_CTRL', [(0, 'CTRL:WRF'), (1, 'CTRL:LRF'), (2, 'CTRL:LVRF'), (7, 'CTRL:FSYSON')]),
+	(0x7B, 'bit_LVRC', [(0, 'LVRC:LVS0'), (1, 'LVRC:LVS1'), (2, 'LVRC:LVS2'), (3, 'LVRC:LVS3'), (4, 'LVRC:LVS4'), (5, 'LVRC:LVS5'), (6, 'LVRC:LVS6'), (7, 'LVRC:LVS7')]),
+	(0x7C, 'bit_PDPS', [(0, 'PDPS:PD4S0'), (1, 'PDPS:PD4S1'), (2, 'PDPS:PD5S0'), (3, 'PDPS:PD5S1'), (4, 'PDPS:PD6S0'), (5, 'PDPS:PD6S1'), (6, 'PDPS:PD7S0'), (7, 'PDPS:PD7S1')]),
+	(0x7D, 'bit_PAPS0', [(0, 'PAPS0:PA0S0'), (1, 'PAPS0:PA0S1'), (2, 'PAPS0:PA1S0'), (3, 'PAPS0:PA1S1'), (4, 'PAPS0:PA2S0'), (5, 'PAPS0:PA2S1'), (6, 'PAPS0:PA3S0'), (7, 'PAPS0:PA3S1')]),
+	(0x7E, 'bit_PAPS1', [(0, 'PAPS1:PA4S0'), (1, 'PAPS1:PA4S1'), (2, 'PAPS1:PA5S0'), (3, 'PAPS1:PA5S1'), (4, 'PAPS1:PA6S0'), (5, 'PAPS1:PA6S1'), (6, 'PAPS1:PA7S0'), (7, 'PAPS1:PA7S1')]),
+	(0x7F, 'bit_SYSC', [(2, 'SYSC:HFV'), (5, 'SYSC:RUBUS'), (6, 'SYSC:USBDIS'), (7, 'SYSC:CLK_ADJ')]),
+]
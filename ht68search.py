@@ -0,0 +1,475 @@
+# Holtek HT68FB560 instruction pattern search
+#
+# Finds instruction sequences across a corpus of firmware images, e.g.
+#
+#   mov A, 89h; call ReadFromBank2     (names from a names file)
+#   set [*].3                          every bit 3 being set, anywhere
+#   sz STATUS.Z; jmp *
+#   mov A, [80h]/80h                   any RAM variable (value/mask)
+#   * ; ret                            anything, followed by a ret
+#
+# Patterns use the same mnemonics and operand syntax as the listings
+# ht68-disasm.py produces, with '*' as a wildcard for a whole
+# instruction, its mnemonic or any operand, and 'value/mask' for a
+# partially specified operand.
+#
+# Queries are answered from an index built once per corpus: every word's
+# instruction type (its mnemonic and form, ignoring operands) goes into
+# unigram and trigram posting lists. A query looks up the rarest run of
+# instruction types in it and only checks those candidates against the
+# full pattern, instead of disassembling anything.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import os
+import pickle
+import sys
+import time
+from array import array
+
+from ht68dec import *
+from ht68flow import find_images, read_opcodes
+from ht68regs import *
+
+INDEX_VERSION = 1
+GRAM_SIZE = 3
+MAX_WINDOW_COMBINATIONS = 16
+
+# one more than the number of itypes; used for undecodable words
+TYPE_COUNT = len(INSN_DEFS) + 1
+UNKNOWN_TYPE = len(INSN_DEFS)
+
+# (addr, bit) for every uniquely named bit, e.g. 'Z' -> STATUS.2
+def _build_bit_names():
+	names = {}
+	for addr, reg in enumerate(REG_DEFS):
+		for bit, name in enumerate((reg or {}).get('bits') or ()):
+			if name:
+				names.setdefault(name.upper(), []).append((addr, bit))
+	return dict((name, places[0]) for name, places in names.items() if len(places) == 1)
+
+BIT_NAMES = _build_bit_names()
+REG_NAMES = dict((name.upper(), addr) for name, addr in REG_ADDRS.items())
+
+
+class PatternError(Exception):
+	pass
+
+
+def type_of(opcode):
+	itype = ITYPE_TABLE[opcode]
+	return UNKNOWN_TYPE if itype < 0 else itype
+
+
+# operand encoders: place an operand value (or mask) into opcode bits
+def encode_data(v):
+	return (v & 0x7F) | ((v & 0x80) << 7)
+
+def encode_imm(v):
+	return v & 0xFF
+
+def encode_addr(v):
+	return (v & 0x7FF) | ((v & 0x1800) << 3)
+
+def encode_bit(v):
+	return (v & 7) << 7
+
+
+def parse_number(s):
+	s = s.strip().lower()
+	if s.endswith('h'):
+		return int(s[:-1], 16)
+	return int(s, 0)
+
+
+def parse_masked(s, names=None, full=0xFF):
+	# returns (value, mask) for '*', 'value' or 'value/mask'; names
+	# resolves symbols (and gets to reject them)
+	s = s.strip()
+	if s == '*':
+		return (0, 0)
+	mask = full
+	if '/' in s:
+		s, mask_text = s.split('/', 1)
+		mask = parse_number(mask_text) & full
+		s = s.strip()
+	if names is not None and s.upper() in names:
+		value = names[s.upper()]
+	else:
+		try:
+			value = parse_number(s)
+		except ValueError:
+			raise PatternError('unknown operand %r' % s)
+	return (value & mask, mask)
+
+
+def parse_data_operand(s):
+	# '[80h]', '[80h]/80h', a register name or '*'
+	s = s.strip()
+	mask = ''
+	if '/' in s:
+		s, mask = s.split('/', 1)
+		s = s.strip()
+		mask = '/' + mask
+	if s.startswith('[') and s.endswith(']'):
+		s = s[1:-1]
+	elif s != '*' and s.upper() not in REG_NAMES:
+		return None
+	return parse_masked(s + mask, REG_NAMES)
+
+
+def parse_bit_operand(s):
+	s = s.strip()
+	if s.upper() in BIT_NAMES:
+		addr, bit = BIT_NAMES[s.upper()]
+		return ((addr, 0xFF), (bit, 7))
+	if '.' not in s:
+		return None
+	data_text, bit_text = s.rsplit('.', 1)
+	data = parse_data_operand(data_text)
+	if data is None:
+		return None
+	bit_text = bit_text.strip()
+	if bit_text == '*':
+		bit = (0, 0)
+	else:
+		reg = REG_DEFS[data[0]] if data[1] == 0xFF and data[0] < len(REG_DEFS) else None
+		bits = [(b or '').upper() for b in ((reg or {}).get('bits') or ())]
+		if bit_text.upper() in bits:
+			bit = (bits.index(bit_text.upper()), 7)
+		else:
+			bit = (parse_number(bit_text) & 7, 7)
+	return (data, bit)
+
+
+def split_operands(s):
+	s = s.strip()
+	if not s:
+		return []
+	return [part.strip() for part in s.split(',')]
+
+
+def compile_instruction(text, names=None):
+	# returns a list of alternatives (itype, value, mask), or None for
+	# a bare '*' that matches any word at all
+	text = text.strip()
+	if text == '*':
+		return None
+	parts = text.split(None, 1)
+	mnem = parts[0].lower()
+	operands = split_operands(parts[1] if len(parts) > 1 else '')
+
+	alternatives = []
+	for itype, d in enumerate(INSN_DEFS):
+		if mnem != '*' and d[IDEF_MNEMONIC] != mnem:
+			continue
+		value = d[IDEF_MAGIC_VALUE]
+		mask = d[IDEF_MASK]
+		htop = d[IDEF_OP_TYPE]
+		ops = [op.upper() for op in operands]
+
+		if htop == HTOP_NONE:
+			if ops:
+				continue
+		elif htop == HTOP_DATA:
+			if len(ops) != 1 or '.' in ops[0]:
+				continue
+			data = parse_data_operand(operands[0])
+			if data is None:
+				continue
+			value |= encode_data(data[0])
+			mask |= encode_data(data[1])
+		elif htop in (HTOP_DATA_A, HTOP_A_DATA):
+			if len(ops) != 2:
+				continue
+			data_text = operands[0] if htop == HTOP_DATA_A else operands[1]
+			if (ops[1] if htop == HTOP_DATA_A else ops[0]) not in ('A', '*'):
+				continue
+			data = parse_data_operand(data_text)
+			if data is None:
+				continue
+			value |= encode_data(data[0])
+			mask |= encode_data(data[1])
+		elif htop == HTOP_A_IMM:
+			if len(ops) != 2 or ops[0] not in ('A', '*'):
+				continue
+			if operands[1].startswith('[') or operands[1].upper() in REG_NAMES:
+				continue
+			imm = parse_masked(operands[1])
+			value |= encode_imm(imm[0])
+			mask |= encode_imm(imm[1])
+		elif htop == HTOP_ADDR:
+			if len(ops) != 1:
+				continue
+			addr = parse_masked(operands[0], names, 0x1FFF)
+			value |= encode_addr(addr[0])
+			mask |= encode_addr(addr[1])
+		elif htop == HTOP_BIT:
+			if len(ops) != 1:
+				continue
+			bit = parse_bit_operand(operands[0])
+			if bit is None:
+				continue
+			(data, data_mask), (bit_value, bit_mask) = bit
+			value |= encode_data(data) | encode_bit(bit_value)
+			mask |= encode_data(data_mask) | encode_bit(bit_mask)
+
+		alternatives.append((itype, value & mask, mask))
+
+	if not alternatives:
+		raise PatternError('no instruction matches %r' % text)
+	return alternatives
+
+
+def compile_pattern(text, names=None):
+	# names maps upper case names to program addresses
+	return [compile_instruction(part, names) for part in text.split(';')]
+
+
+class CorpusIndex(object):
+	def __init__(self):
+		self.images = []     # (path, size, mtime)
+		self.opcodes = []    # array('H') per image
+		self.grams = {}      # (n, key) -> array('I') of (image << 16) | address
+
+	@classmethod
+	def build(cls, paths, previous=None):
+		# reuses the words of any image that hasn't changed since
+		# previous was built
+		index = cls()
+		known = {}
+		if previous is not None:
+			for info, opcodes in zip(previous.images, previous.opcodes):
+				known[info] = opcodes
+
+		for path in paths:
+			st = os.stat(path)
+			info = (path, st.st_size, st.st_mtime)
+			opcodes = known.get(info)
+			if opcodes is None:
+				opcodes = array('H', read_opcodes(path))
+			if len(opcodes) > 0x10000:
+				raise ValueError('%s is too big to index' % path)
+			index.images.append(info)
+			index.opcodes.append(opcodes)
+
+		for image, opcodes in enumerate(index.opcodes):
+			index._add_grams(image, opcodes)
+		return index
+
+	def _add_grams(self, image, opcodes):
+		grams = self.grams
+		types = [type_of(opcode) for opcode in opcodes]
+		base = image << 16
+		for addr, t in enumerate(types):
+			key = (1, t)
+			postings = grams.get(key)
+			if postings is None:
+				postings = grams[key] = array('I')
+			postings.append(base | addr)
+		for addr in range(len(types) - GRAM_SIZE + 1):
+			key = (GRAM_SIZE, (types[addr] * TYPE_COUNT + types[addr + 1]) * TYPE_COUNT + types[addr + 2])
+			postings = grams.get(key)
+			if postings is None:
+				postings = grams[key] = array('I')
+			postings.append(base | addr)
+
+	@classmethod
+	def load(cls, path):
+		with open(path, 'rb') as f:
+			data = pickle.load(f)
+		if data.get('version') != INDEX_VERSION:
+			raise ValueError('%s was built by a different version of this tool' % path)
+		index = cls()
+		index.images = data['images']
+		index.opcodes = data['opcodes']
+		index.grams = data['grams']
+		return index
+
+	def save(self, path):
+		data = {'version': INDEX_VERSION, 'images': self.images, 'opcodes': self.opcodes, 'grams': self.grams}
+		with open(path + '.tmp', 'wb') as f:
+			pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+		os.replace(path + '.tmp', path)
+
+	def _candidates(self, pattern):
+		# pick the cheapest posting lists that every match must be in,
+		# returning (postings, offset into the pattern), or None if the
+		# pattern has no instruction types to go on
+		grams = self.grams
+		types = [None if alts is None else sorted(set(itype for itype, value, mask in alts)) for alts in pattern]
+		best = None
+
+		for i, ts in enumerate(types):
+			if ts is None:
+				continue
+			lists = [grams.get((1, t), ()) for t in ts]
+			cost = sum(len(l) for l in lists)
+			if best is None or cost < best[0]:
+				best = (cost, lists, i)
+
+		for i in range(len(types) - GRAM_SIZE + 1):
+			window = types[i:i + GRAM_SIZE]
+			if None in window:
+				continue
+			if len(window[0]) * len(window[1]) * len(window[2]) > MAX_WINDOW_COMBINATIONS:
+				continue
+			lists = [grams.get((GRAM_SIZE, (a * TYPE_COUNT + b) * TYPE_COUNT + c), ())
+				for a in window[0] for b in window[1] for c in window[2]]
+			cost = sum(len(l) for l in lists)
+			if cost < best[0]:
+				best = (cost, lists, i)
+
+		if best is None:
+			return None
+		return best[1], best[2]
+
+	def search(self, pattern):
+		# yields (image number, address) for every match of a compiled
+		# pattern, in index order
+		length = len(pattern)
+		found = self._candidates(pattern)
+		if found is None:
+			# nothing but wildcards: every position matches
+			for image, opcodes in enumerate(self.opcodes):
+				for addr in range(len(opcodes) - length + 1):
+					yield (image, addr)
+			return
+
+		lists, offset = found
+		candidates = []
+		for l in lists:
+			candidates.extend(l)
+		if len(lists) > 1:
+			candidates.sort()
+
+		for packed in candidates:
+			image = packed >> 16
+			start = (packed & 0xFFFF) - offset
+			opcodes = self.opcodes[image]
+			if start < 0 or start + length > len(opcodes):
+				continue
+			if self._matches(pattern, opcodes, start):
+				yield (image, start)
+
+	def _matches(self, pattern, opcodes, start):
+		for i, alts in enumerate(pattern):
+			if alts is None:
+				continue
+			opcode = opcodes[start + i]
+			itype = ITYPE_TABLE[opcode]
+			for alt_itype, value, mask in alts:
+				if itype == alt_itype and (opcode & mask) == value:
+					break
+			else:
+				return False
+		return True
+
+
+def format_opcode(opcode, labels=None):
+	# a plain rendering for search results, spelling operands the same
+	# way as the listings so they can be pasted back in as patterns; the
+	# full one needs the vendor data, see ht68-disasm.py
+	itype = ITYPE_TABLE[opcode]
+	if itype < 0:
+		return 'DW %04Xh' % opcode
+	d = INSN_DEFS[itype]
+	mnem = d[IDEF_MNEMONIC].upper()
+	htop = d[IDEF_OP_TYPE]
+	value = OPVALUE_TABLE[opcode]
+
+	def data(addr):
+		reg = REG_DEFS[addr] if addr < len(REG_DEFS) else None
+		return reg['name'] if reg else format_data_address(addr)
+
+	def bit(addr, index):
+		reg = REG_DEFS[addr] if addr < len(REG_DEFS) else None
+		name = ((reg or {}).get('bits') or [None] * 8)[index]
+		return name or '%s.%d' % (data(addr), index)
+
+	if htop == HTOP_NONE:
+		return mnem
+	elif htop == HTOP_DATA:
+		return '%s %s' % (mnem, data(value))
+	elif htop == HTOP_DATA_A:
+		return '%s %s, A' % (mnem, data(value))
+	elif htop == HTOP_A_DATA:
+		return '%s A, %s' % (mnem, data(value))
+	elif htop == HTOP_A_IMM:
+		return '%s A, %02Xh' % (mnem, value)
+	elif htop == HTOP_ADDR:
+		if labels and value in labels:
+			return '%s %s' % (mnem, labels[value])
+		return '%s %04Xh' % (mnem, value)
+	else:
+		return '%s %s' % (mnem, bit(value & 0xFF, value >> 8))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Search Holtek HT68FB560 program images for instruction patterns.')
+	commands = parser.add_subparsers(dest='command')
+	commands.required = True
+
+	index_parser = commands.add_parser('index', help='build or update an index',
+		epilog='example: %(prog)s corpus.idx firmware-releases/')
+	index_parser.add_argument('index', help='index file to write')
+	index_parser.add_argument('images', nargs='+', help='program images, or folders of them')
+
+	query_parser = commands.add_parser('query', help='search an index',
+		epilog='example: %(prog)s corpus.idx "mov A, 89h; call *"')
+	query_parser.add_argument('index', help='index file to search')
+	query_parser.add_argument('patterns', nargs='+', help="patterns, with instructions separated by ';'")
+	query_parser.add_argument('-n', '--names', default=None,
+		help='names file (as written by ht68match.py) for call and jmp targets')
+	query_parser.add_argument('-l', '--limit', type=int, default=None,
+		help='stop after this many matches per pattern')
+	args = parser.parse_args()
+
+	if args.command == 'index':
+		images = find_images(args.images)
+		previous = None
+		if os.path.exists(args.index):
+			try:
+				previous = CorpusIndex.load(args.index)
+			except (ValueError, KeyError, pickle.UnpicklingError):
+				previous = None
+		began = time.time()
+		index = CorpusIndex.build(images, previous)
+		index.save(args.index)
+		words = sum(len(opcodes) for opcodes in index.opcodes)
+		print('indexed %d images, %d words in %.2fs' % (len(images), words, time.time() - began), file=sys.stderr)
+		return
+
+	labels = {}
+	names = {}
+	if args.names:
+		from ht68match import read_names
+		for addr, name in read_names(args.names):
+			labels[addr] = name
+			names[name.upper()] = addr
+
+	index = CorpusIndex.load(args.index)
+	for text in args.patterns:
+		try:
+			pattern = compile_pattern(text, names)
+		except (PatternError, ValueError) as e:
+			parser.error(str(e))
+
+		began = time.time()
+		count = 0
+		for image, addr in index.search(pattern):
+			opcodes = index.opcodes[image][addr:addr + len(pattern)]
+			code = '; '.join(format_opcode(op, labels) for op in opcodes)
+			print('%s:%04X: %s' % (index.images[image][0], addr, code))
+			count += 1
+			if args.limit is not None and count >= args.limit:
+				break
+		print('%s: %d matches in %.1fms' % (text, count, (time.time() - began) * 1000), file=sys.stderr)
+
+
+if __name__ == '__main__':
+	main()
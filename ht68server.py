@@ -0,0 +1,410 @@
+# Holtek HT68 disassembly server
+#
+# Keeps the vendor data and recently used images loaded, so tools that
+# disassemble a few addresses at a time (editor integrations, scripts)
+# don't pay for starting Python, loading HT68FB560.fmt/.inc and decoding
+# the whole image on every call:
+#
+#   $ python ht68server.py serve HT68FB560 &
+#   $ python ht68server.py disasm program.bin -a -s 0x19F0 -e 0x1A10
+#   $ python ht68server.py xrefs program.bin calls 0F07h
+#
+# The server speaks JSON, one request and one reply per line, over a
+# Unix socket (or a localhost TCP port where there aren't any). Requests
+# run in worker threads, so a client waiting on a cold image doesn't hold
+# up the others. Images are cached by the hash of their contents, least
+# recently used first out; when an image on disk changes, its listings
+# are brought up to date incrementally (see ht68incr.py) rather than
+# redone.
+#
+# The client side only imports the standard library and ht68args, so it
+# starts up quickly; everything else is imported by the server.
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+
+from ht68args import parse_address
+
+# images kept in memory at once
+DEFAULT_CACHE_SIZE = 16
+
+# used when there's no Unix socket support
+DEFAULT_PORT = 6868
+
+
+def default_socket_path():
+	uid = os.getuid() if hasattr(os, 'getuid') else 0
+	return os.path.join(tempfile.gettempdir(), 'ht68server-%d.sock' % uid)
+
+
+class ImageState:
+	# everything cached for one image's contents
+	def __init__(self, data):
+		self.lock = threading.Lock()   # held while building, updating or reading listings
+		self.data = data
+		self.listings = {}    # (mcu name, analyze, names) -> IncrementalListing
+		self.refs = {}        # names -> (labels, data refs, code refs) from ht68xref
+		# newer contents from an edit, not applied to the listings yet
+		self.pending = None
+		self.pending_lock = threading.Lock()
+
+	def queue_update(self, data):
+		# cheap; the next holder of lock does the work, in sync()
+		with self.pending_lock:
+			self.pending = data
+
+	def sync(self):
+		# call with lock held, before using data, listings or refs
+		with self.pending_lock:
+			data, self.pending = self.pending, None
+		if data is not None:
+			self.data = data
+			self.refs = {}
+			for listing in self.listings.values():
+				listing.update(data)
+
+
+class DisasmServer:
+	def __init__(self, mcu_names, cache_size=DEFAULT_CACHE_SIZE):
+		from collections import OrderedDict
+		from ht68mcu import HoltekMCU
+
+		self.HoltekMCU = HoltekMCU
+		self.mcus = {}
+		for name in mcu_names:
+			self.mcus[name] = HoltekMCU.load(name)
+		self.default_mcu = mcu_names[0]
+		self.cache_size = cache_size
+		self.images = OrderedDict()   # content hash -> ImageState, oldest first
+		self.paths = {}               # path -> ((mtime, size), content hash)
+		# guards mcus, images and paths; nothing waits on an image's own
+		# lock while holding this one, so slow listing work on one image
+		# never holds up requests for the others
+		self.lock = threading.Lock()
+		self.server = None
+		self.loop = None
+
+	def get_mcu(self, name):
+		name = name or self.default_mcu
+		with self.lock:
+			mcu = self.mcus.get(name)
+		if mcu is None:
+			mcu = self.HoltekMCU.load(name)
+			with self.lock:
+				mcu = self.mcus.setdefault(name, mcu)
+		return mcu
+
+	def get_image(self, path):
+		# the ImageState for what's in the file at path now
+		import hashlib
+
+		st = os.stat(path)
+		stamp = (st.st_mtime_ns, st.st_size)
+		with self.lock:
+			known = self.paths.get(path)
+			if known is not None and known[0] == stamp and known[1] in self.images:
+				self.images.move_to_end(known[1])
+				return self.images[known[1]]
+
+		with open(path, 'rb') as f:
+			data = f.read()
+		digest = hashlib.sha1(data).hexdigest()
+
+		with self.lock:
+			known = self.paths.get(path)
+			self.paths[path] = (stamp, digest)
+			image = self.images.get(digest)
+			if image is None:
+				old = known[1] if known is not None else None
+				if old in self.images and not any(d == old for p, (s, d) in self.paths.items() if p != path):
+					# this file has been edited; carry its listings over and
+					# update them, instead of starting from scratch. Anyone
+					# who finds it under the new hash syncs before reading
+					image = self.images.pop(old)
+					image.queue_update(data)
+				else:
+					image = ImageState(data)
+				self.images[digest] = image
+				while len(self.images) > self.cache_size:
+					self.images.popitem(last=False)
+			self.images.move_to_end(digest)
+		return image
+
+	def get_listing(self, request):
+		# returns the image and its listing; read the listing with the
+		# image's lock held, as another request may be updating it
+		from ht68incr import IncrementalListing
+
+		image = self.get_image(request['image'])
+		names = read_names_file(request.get('names'))
+		key = (request.get('mcu') or self.default_mcu, bool(request.get('analyze')), names)
+		mcu = self.get_mcu(key[0])
+		with image.lock:
+			image.sync()
+			listing = image.listings.get(key)
+			if listing is None:
+				listing = IncrementalListing(mcu, key[1], names)
+				listing.update(image.data)
+				image.listings[key] = listing
+		return image, listing
+
+	def get_refs(self, request):
+		from ht68flow import read_opcodes
+		from ht68xref import collect_refs
+		import io
+
+		image = self.get_image(request['image'])
+		names = read_names_file(request.get('names'))
+		with image.lock:
+			image.sync()
+			refs = image.refs.get(names)
+			if refs is None:
+				refs = collect_refs(read_opcodes(io.BytesIO(image.data)), names)
+				image.refs[names] = refs
+		return refs
+
+	def handle(self, request):
+		# returns the reply for one request; runs in a worker thread
+		op = request.get('op')
+		if op == 'disasm':
+			image, listing = self.get_listing(request)
+			with image.lock:
+				lines = listing.lines[max(request.get('start') or 0, 0):request.get('end')]
+			return {'listing': ''.join(lines)}
+		elif op == 'labels':
+			request = dict(request, analyze=True)
+			image, listing = self.get_listing(request)
+			with image.lock:
+				labels = sorted(listing.flow.labels.items())
+			return {'labels': labels}
+		elif op == 'xrefs':
+			return {'refs': self.find_refs(request)}
+		elif op == 'status':
+			with self.lock:
+				return {
+					'mcus': sorted(self.mcus),
+					'images': len(self.images),
+					'cache_size': self.cache_size,
+					'paths': sorted(path for path, (stamp, digest) in self.paths.items() if digest in self.images),
+				}
+		elif op == 'stop':
+			self.loop.call_soon_threadsafe(self.server.close)
+			return {}
+		raise ValueError('unknown request %r' % op)
+
+	def find_refs(self, request):
+		from ht68search import parse_number
+		from ht68xref import QUERY_KINDS, parse_memory
+
+		labels, data_refs, code_refs = self.get_refs(request)
+		table, what = QUERY_KINDS[request['kind']]
+		target = request['target']
+		found = []
+		if table == 'data':
+			defines = dict((name.upper(), value) for name, value in (request.get('defines') or {}).items())
+			mem, bit = parse_memory(target, defines)
+			for addr, function, opcode, ref_mem, ref_bit, access in data_refs:
+				if ref_mem == mem and access & what and (bit is None or ref_bit is None or ref_bit == bit):
+					found.append((addr, function, opcode))
+		else:
+			try:
+				address = parse_number(target)
+			except ValueError:
+				matches = [addr for addr, name in labels if name == target]
+				if not matches:
+					raise ValueError('no code is called %s' % target)
+				address = matches[0]
+			for addr, function, opcode, ref_target, kind in code_refs:
+				if ref_target == address and kind in what:
+					found.append((addr, function, opcode))
+
+		# rendered by the MCU definitions, just like the listings
+		mcu = self.get_mcu(request.get('mcu'))
+		label_names = dict(labels)
+		return [{
+			'address': addr,
+			'text': mcu.disasm(opcode, label_names),
+			'function': label_names.get(function),
+		} for addr, function, opcode in found]
+
+	async def serve_client(self, reader, writer):
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				try:
+					request = json.loads(line.decode('utf-8'))
+					reply = await self.loop.run_in_executor(None, self.handle, request)
+					reply['ok'] = True
+				except Exception as e:
+					reply = {'ok': False, 'error': '%s: %s' % (type(e).__name__, e)}
+				writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+				await writer.drain()
+		except ConnectionError:
+			pass
+		finally:
+			writer.close()
+
+	async def run(self, socket_path=None, port=None):
+		import asyncio
+
+		self.loop = asyncio.get_running_loop()
+		if socket_path is not None:
+			if os.path.exists(socket_path):
+				os.unlink(socket_path)
+			self.server = await asyncio.start_unix_server(self.serve_client, socket_path)
+			where = socket_path
+		else:
+			self.server = await asyncio.start_server(self.serve_client, '127.0.0.1', port)
+			where = '127.0.0.1:%d' % port
+		print('listening on %s' % where, file=sys.stderr)
+		try:
+			await self.server.wait_closed()
+		finally:
+			if socket_path is not None and os.path.exists(socket_path):
+				os.unlink(socket_path)
+
+
+def read_names_file(path):
+	# names files go into cache keys, so they come back as a tuple
+	if not path:
+		return ()
+	from ht68match import read_names
+	return tuple(read_names(path))
+
+
+def connect(socket_path=None, port=None):
+	if socket_path is not None:
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		sock.connect(socket_path)
+	else:
+		sock = socket.create_connection(('127.0.0.1', port))
+	return sock
+
+
+def send_request(sock, request):
+	# returns the reply, raising RuntimeError if the server refused
+	sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+	reply = b''
+	while not reply.endswith(b'\n'):
+		data = sock.recv(1 << 16)
+		if not data:
+			raise RuntimeError('the server hung up')
+		reply += data
+	reply = json.loads(reply.decode('utf-8'))
+	if not reply.pop('ok'):
+		raise RuntimeError(reply['error'])
+	return reply
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Serve Holtek HT68 disassembly from memory, and query the server.')
+	where = parser.add_mutually_exclusive_group()
+	where.add_argument('--socket', default=None,
+		help='Unix socket to use (default: %s)' % default_socket_path())
+	where.add_argument('--port', type=int, default=None,
+		help='use this localhost TCP port instead of a Unix socket')
+	commands = parser.add_subparsers(dest='command')
+	commands.required = True
+
+	serve_parser = commands.add_parser('serve', help='run the server',
+		epilog='example: %(prog)s HT68FB560')
+	serve_parser.add_argument('mcu_names', nargs='+', help='MCUs to load up front; the first is the default')
+	serve_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+		help='number of images to keep in memory (default: %d)' % DEFAULT_CACHE_SIZE)
+
+	disasm_parser = commands.add_parser('disasm', help='disassemble (part of) an image',
+		epilog='example: %(prog)s program.bin -a -s 0x19F0 -e 0x1A10')
+	disasm_parser.add_argument('image', help='program image')
+	disasm_parser.add_argument('-s', '--start', type=parse_address, default=0,
+		help='first word address to disassemble')
+	disasm_parser.add_argument('-e', '--end', type=parse_address, default=None,
+		help='word address to stop at (exclusive)')
+	disasm_parser.add_argument('-a', '--analyze', action='store_true',
+		help='follow control flow from the vectors (see ht68-disasm.py)')
+
+	labels_parser = commands.add_parser('labels', help='list the code labels in an image')
+	labels_parser.add_argument('image', help='program image')
+
+	xrefs_parser = commands.add_parser('xrefs', help='find references in an image (see ht68xref.py)',
+		epilog='example: %(prog)s program.bin writes intLMVar1 -D intLMVar1=[0C8h].1')
+	xrefs_parser.add_argument('image', help='program image')
+	xrefs_parser.add_argument('kind', choices=('reads', 'writes', 'refs', 'calls', 'jumps', 'xrefs'))
+	xrefs_parser.add_argument('target', help='data memory operand, or code address or name')
+	xrefs_parser.add_argument('-D', '--define', action='append', default=[], metavar='NAME=OPERAND',
+		help='name a data memory operand, e.g. intLMVar1=[0C8h].1')
+
+	commands.add_parser('status', help='show what the server has loaded')
+	commands.add_parser('stop', help='stop the server')
+
+	for sub in (disasm_parser, labels_parser, xrefs_parser):
+		sub.add_argument('-m', '--mcu', default=None, help="MCU name (default: the server's first)")
+		sub.add_argument('-n', '--names', default=None,
+			help='names file (as written by ht68match.py) to label code addresses with')
+	args = parser.parse_args()
+
+	socket_path = args.socket
+	if socket_path is None and args.port is None:
+		if hasattr(socket, 'AF_UNIX'):
+			socket_path = default_socket_path()
+		else:
+			args.port = DEFAULT_PORT
+
+	if args.command == 'serve':
+		import asyncio
+		server = DisasmServer(args.mcu_names, args.cache_size)
+		try:
+			asyncio.run(server.run(socket_path, args.port))
+		except KeyboardInterrupt:
+			pass
+		return
+
+	request = {'op': args.command}
+	if args.command in ('disasm', 'labels', 'xrefs'):
+		# the server has its own working directory
+		request['image'] = os.path.abspath(args.image)
+		request['mcu'] = args.mcu
+		if args.names:
+			request['names'] = os.path.abspath(args.names)
+	if args.command == 'disasm':
+		request.update(start=args.start, end=args.end, analyze=args.analyze)
+	elif args.command == 'xrefs':
+		defines = {}
+		for define in args.define:
+			if '=' not in define:
+				parser.error('expected NAME=OPERAND, not %r' % define)
+			name, value = define.split('=', 1)
+			defines[name.strip()] = value.strip()
+		request.update(kind=args.kind, target=args.target, defines=defines)
+
+	try:
+		sock = connect(socket_path, args.port)
+	except OSError as e:
+		sys.exit('cannot reach the server (%s); start it with: %s serve <mcu>' % (e, sys.argv[0]))
+	with sock:
+		try:
+			reply = send_request(sock, request)
+		except RuntimeError as e:
+			sys.exit('error: %s' % e)
+
+	if args.command == 'disasm':
+		sys.stdout.write(reply['listing'])
+	elif args.command == 'labels':
+		for addr, name in reply['labels']:
+			print('%04X %s' % (addr, name))
+	elif args.command == 'xrefs':
+		for ref in reply['refs']:
+			where = ' (in %s)' % ref['function'] if ref['function'] else ''
+			print('%04X: %s%s' % (ref['address'], ref['text'], where))
+	elif args.command == 'status':
+		print(json.dumps(reply, indent=1, sort_keys=True))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,444 @@
+# Holtek HT68FB560 instruction set simulator
+#
+# Runs a program.bin image without a real mouse, for checking firmware
+# patches. Every distinct opcode is compiled once (lazily, the first
+# time it runs) into a small Python function specialised for its
+# operands, so stepping is just 'pc = code[pc](pc)'.
+#
+# Memory model, as far as the datasheet and the firmware let us tell:
+# - data memory offsets 00h-7Fh are the special function registers,
+#   shared between banks except for the few marked with 'banks' in
+#   ht68fb560.json, which live in the bank selected by BP
+# - direct [m] accesses to 80h-FFh always hit bank 0; the other banks
+#   are only reachable through MP1/IAR1, using the bank in BP
+# - ACC and STATUS are ordinary data memory, at 05h and 0Ah
+#
+# Addresses given to hooks are "physical": bank * 100h + offset, or
+# just the offset for a shared register.
+
+import argparse
+import struct
+import sys
+import time
+
+from ht68args import parse_address
+from ht68banks import BANKED_SFRS, physical_address
+from ht68dec import *
+from ht68regs import *
+
+STACK_DEPTH = 8
+PROGRAM_SIZE = 0x2000
+
+IAR0 = REG_ADDRS['IAR0']
+MP0 = REG_ADDRS['MP0']
+IAR1 = REG_ADDRS['IAR1']
+MP1 = REG_ADDRS['MP1']
+BP = REG_ADDRS['BP']
+ACC = REG_ADDRS['ACC']
+PCL = REG_ADDRS['PCL']
+TBLP = REG_ADDRS['TBLP']
+TBLH = REG_ADDRS['TBLH']
+TBHP = REG_ADDRS['TBHP']
+STATUS = REG_ADDRS['STATUS']
+INTC0 = REG_ADDRS['INTC0']
+
+# STATUS bits
+FLAG_C = 0x01
+FLAG_AC = 0x02
+FLAG_Z = 0x04
+FLAG_OV = 0x08
+FLAG_PDF = 0x10
+FLAG_TO = 0x20
+
+# INTC0 bits
+INT_EMI = 0x01
+
+# registers the compiled code touches directly; hooking them isn't
+# supported
+UNHOOKABLE = frozenset((ACC, STATUS, PCL))
+
+
+class SimulatorError(Exception):
+	pass
+
+class StackOverflow(SimulatorError):
+	pass
+
+
+# source for the flag updates, in terms of a (the A input), b (the
+# other input), c (carry in) and r (the unmasked result)
+ADD_FLAGS = ('ram[%d] = (ram[%d] & 0xF0) | (r >> 8) | ((((a & 15) + (b & 15) + c) >> 3) & 2)'
+	' | (((r & 255) == 0) << 2) | (((~(a ^ b) & (a ^ r)) >> 4) & 8)') % (STATUS, STATUS)
+Z_FLAG = 'ram[%d] = (ram[%d] & 0xFB) | ((r == 0) << 2)' % (STATUS, STATUS)
+C_FLAG = 'ram[%d] = (ram[%d] & 0xFE) | c' % (STATUS, STATUS)
+
+
+class Simulator(object):
+	def __init__(self, program, stack_depth=STACK_DEPTH):
+		self.program = list(program)
+		self.stack_depth = stack_depth
+		self.ram = bytearray(8 * 0x100)
+		self.read_hooks = {}
+		self.write_hooks = {}
+		self.breakpoints = set()
+		self._compiled = {}
+		self.code = [None] * PROGRAM_SIZE
+		self.reset()
+
+	@classmethod
+	def from_file(cls, path, **kwargs):
+		with open(path, 'rb') as f:
+			code = f.read()
+		count = len(code) // 2
+		return cls(struct.unpack_from('<%dH' % count, code), **kwargs)
+
+	def reset(self):
+		self.pc = 0
+		self.stack = []
+		self.cycles = 0
+		self.steps = 0
+		self.halted = False
+
+	# hooks are called as read_hook(sim, address) -> value and
+	# write_hook(sim, address, value), after the value is stored
+	def add_read_hook(self, address, hook):
+		self._check_hookable(address)
+		self.read_hooks[address] = hook
+		self._invalidate()
+
+	def add_write_hook(self, address, hook):
+		self._check_hookable(address)
+		self.write_hooks[address] = hook
+		self._invalidate()
+
+	def _check_hookable(self, address):
+		if address in UNHOOKABLE:
+			raise ValueError('cannot hook register at %02Xh' % address)
+
+	def _invalidate(self):
+		self._compiled = {}
+		self.code = [None] * PROGRAM_SIZE
+
+	# data memory access, for everything the compiled code can't do
+	# with a plain ram[] index
+	def resolve(self, addr):
+		if addr == IAR0:
+			return physical_address(0, self.ram[MP0])
+		elif addr == IAR1:
+			return physical_address(self.ram[BP] & 7, self.ram[MP1])
+		elif addr in BANKED_SFRS:
+			return physical_address(self.ram[BP] & 7, addr)
+		else:
+			return addr
+
+	def read(self, addr, pc):
+		if addr == PCL:
+			return (pc + 1) & 0xFF
+		phys = self.resolve(addr)
+		if phys == IAR0 or phys == IAR1:
+			# indirectly addressing the indirect registers reads 0
+			return 0
+		hook = self.read_hooks.get(phys)
+		if hook is not None:
+			return hook(self, phys) & 0xFF
+		return self.ram[phys]
+
+	def write(self, addr, value, pc):
+		phys = self.resolve(addr)
+		if phys == IAR0 or phys == IAR1:
+			return
+		self.ram[phys] = value
+		hook = self.write_hooks.get(phys)
+		if hook is not None:
+			hook(self, phys, value)
+
+	def push(self, addr):
+		if len(self.stack) >= self.stack_depth:
+			raise StackOverflow('stack overflow calling from %04X' % (addr - 1))
+		self.stack.append(addr)
+
+	def pop(self, pc):
+		if not self.stack:
+			raise SimulatorError('stack underflow returning from %04X' % pc)
+		return self.stack.pop()
+
+	def interrupt(self, vector):
+		# take an interrupt if they're enabled; returns whether it was
+		if not (self.ram[INTC0] & INT_EMI):
+			return False
+		self.push(self.pc)
+		self.ram[INTC0] &= ~INT_EMI & 0xFF
+		self.pc = vector
+		self.halted = False
+		return True
+
+	def _is_plain(self, addr):
+		phys = addr
+		return (addr != IAR0 and addr != IAR1 and addr != PCL and
+			addr not in BANKED_SFRS and
+			phys not in self.read_hooks and phys not in self.write_hooks)
+
+	def _compile(self, pc):
+		if pc >= len(self.program):
+			raise SimulatorError('executing outside the program at %04X' % pc)
+		opcode = self.program[pc]
+		func = self._compiled.get(opcode)
+		if func is None:
+			func = self._compile_opcode(opcode, pc)
+			self._compiled[opcode] = func
+		self.code[pc] = func
+		return func
+
+	def _compile_opcode(self, opcode, pc):
+		itype, value = decode(opcode)
+		if itype is None:
+			raise SimulatorError('invalid opcode %04X at %04X' % (opcode, pc))
+		lines = self._generate(itype, value)
+		source = 'def insn(pc, ram=ram, program=program, sim=sim, read=read, write=write):\n'
+		source += ''.join('\t%s\n' % line for line in lines)
+		namespace = {
+			'ram': self.ram, 'program': self.program, 'sim': self,
+			'read': self.read, 'write': self.write,
+		}
+		exec(compile(source, '<opcode %04X>' % opcode, 'exec'), namespace)
+		return namespace['insn']
+
+	def _generate(self, itype, value):
+		# produce the body of the function that runs one instruction,
+		# given the pc it's at and returning the next pc
+		d = INSN_DEFS[itype]
+		mnem = d[IDEF_MNEMONIC]
+		htop = d[IDEF_OP_TYPE]
+
+		if htop == HTOP_BIT:
+			m, bit = value
+		elif htop in (HTOP_DATA, HTOP_DATA_A, HTOP_A_DATA):
+			m = value
+		else:
+			m = None
+
+		if m is not None and self._is_plain(m):
+			load = 'ram[%d]' % m
+			def store(expr):
+				return ['ram[%d] = %s' % (m, expr)]
+		elif m is not None:
+			load = 'read(%d, pc)' % m
+			def store(expr):
+				if m == PCL:
+					# writing PCL jumps within the current page
+					return ['v = %s' % expr, 'write(%d, v, pc)' % m,
+						'sim.cycles += 1', 'return ((pc + 1) & 0x1F00) | v']
+				return ['write(%d, %s, pc)' % (m, expr)]
+
+		a = 'ram[%d]' % ACC
+		next_pc = ['return pc + 1']
+		skip = ['if r == 0:', '\tsim.cycles += 1', '\treturn pc + 2', 'return pc + 1']
+
+		if htop == HTOP_NONE:
+			if mnem == 'nop':
+				return next_pc
+			elif mnem in ('clrwdt', 'clrwdt2'):
+				return ['ram[%d] &= 0x%02X' % (STATUS, ~(FLAG_TO | FLAG_PDF) & 0xFF)] + next_pc
+			elif mnem == 'halt':
+				return ['ram[%d] = (ram[%d] & 0x%02X) | 0x%02X' % (STATUS, STATUS, ~FLAG_TO & 0xFF, FLAG_PDF),
+					'sim.halted = True'] + next_pc
+			elif mnem == 'ret':
+				return ['sim.cycles += 1', 'return sim.pop(pc)']
+			elif mnem == 'reti':
+				return ['ram[%d] |= %d' % (INTC0, INT_EMI), 'sim.cycles += 1', 'return sim.pop(pc)']
+
+		elif htop == HTOP_ADDR:
+			if mnem == 'call':
+				return ['sim.push(pc + 1)', 'sim.cycles += 1', 'return %d' % value]
+			else:
+				return ['sim.cycles += 1', 'return %d' % value]
+
+		elif htop == HTOP_A_IMM:
+			body = ['a = %s' % a, 'b = %d' % value]
+			if mnem == 'ret':
+				return ['%s = %d' % (a, value), 'sim.cycles += 1', 'return sim.pop(pc)']
+			elif mnem == 'mov':
+				return ['%s = %d' % (a, value)] + next_pc
+			return body + self._alu(mnem, a, lambda expr: ['%s = %s' % (a, expr)]) + next_pc
+
+		elif htop == HTOP_DATA_A:
+			# mov [m],A
+			lines = store(a)
+			if lines[-1].startswith('return'):
+				return lines
+			return lines + next_pc
+
+		elif htop == HTOP_A_DATA:
+			if mnem == 'mov':
+				return ['%s = %s' % (a, load)] + next_pc
+			to_memory = mnem.endswith('m')
+			body = ['a = %s' % a, 'b = %s' % load]
+			if to_memory:
+				lines = body + self._alu(mnem[:-1], a, store)
+			else:
+				lines = body + self._alu(mnem, a, lambda expr: ['%s = %s' % (a, expr)])
+			if lines[-1].startswith('return'):
+				return lines
+			return lines + next_pc
+
+		elif htop == HTOP_BIT:
+			mask = 1 << bit
+			if mnem == 'set':
+				lines = store('%s | %d' % (load, mask))
+			elif mnem == 'clr':
+				lines = store('%s & %d' % (load, ~mask & 0xFF))
+			elif mnem == 'snz':
+				return ['r = not (%s & %d)' % (load, mask)] + skip
+			else:
+				return ['r = %s & %d' % (load, mask)] + skip
+			if lines[-1].startswith('return'):
+				return lines
+			return lines + next_pc
+
+		elif htop == HTOP_DATA:
+			to_a = lambda expr: ['%s = %s' % (a, expr)]
+			c_in = '(ram[%d] & 1)' % STATUS
+			ops = {
+				'cpl':  ('r = ~b & 255', [Z_FLAG]),
+				'inc':  ('r = (b + 1) & 255', [Z_FLAG]),
+				'dec':  ('r = (b - 1) & 255', [Z_FLAG]),
+				'swap': ('r = ((b << 4) | (b >> 4)) & 255', []),
+				'rl':   ('r = ((b << 1) | (b >> 7)) & 255', []),
+				'rr':   ('r = ((b >> 1) | (b << 7)) & 255', []),
+				'rlc':  ('c = b >> 7; r = ((b << 1) | %s) & 255' % c_in, [C_FLAG]),
+				'rrc':  ('c = b & 1; r = (b >> 1) | (%s << 7)' % c_in, [C_FLAG]),
+			}
+			base = mnem[:-1] if mnem.endswith('a') else mnem
+			if mnem == 'sz':
+				return ['r = %s' % load] + skip
+			elif mnem == 'sza':
+				return ['r = %s' % load, '%s = r' % a] + skip
+			elif mnem in ('siz', 'sdz', 'siza', 'sdza'):
+				delta = '+ 1' if mnem.startswith('si') else '- 1'
+				lines = ['r = (%s %s) & 255' % (load, delta)]
+				if mnem.endswith('a'):
+					lines += ['%s = r' % a]
+				else:
+					lines += [line for line in store('r') if not line.startswith('return')]
+				return lines + skip
+			elif mnem == 'clr':
+				lines = store('0')
+			elif mnem == 'set':
+				lines = store('255')
+			elif mnem == 'tabrd':
+				lines = ['w = program[((ram[%d] << 8) | ram[%d]) %% len(program)]' % (TBHP, TBLP),
+					'ram[%d] = w >> 8' % TBLH, 'sim.cycles += 1'] + store('w & 255')
+			elif mnem == 'daa':
+				lines = ['a = %s' % a,
+					'c = ram[%d] & 1' % STATUS,
+					'if (a & 15) > 9 or (ram[%d] & %d):' % (STATUS, FLAG_AC),
+					'\ta += 6',
+					'if a > 0x9F or c:',
+					'\ta += 0x60',
+					'c = c | (a > 255)',
+					C_FLAG] + store('a & 255')
+			elif base in ops:
+				expr, flags = ops[base]
+				lines = ['b = %s' % load, expr] + flags
+				lines += to_a('r') if mnem.endswith('a') and base != mnem else store('r')
+			else:
+				raise SimulatorError('no semantics for %s' % mnem)
+			if lines[-1].startswith('return'):
+				return lines
+			return lines + next_pc
+
+		raise SimulatorError('no semantics for %s' % mnem)
+
+	def _alu(self, mnem, a, dest):
+		# two-operand arithmetic on a and b, stored with dest(expr)
+		c_in = '(ram[%d] & 1)' % STATUS
+		if mnem == 'add':
+			return ['c = 0', 'r = a + b', ADD_FLAGS] + dest('r & 255')
+		elif mnem == 'adc':
+			return ['c = %s' % c_in, 'r = a + b + c', ADD_FLAGS] + dest('r & 255')
+		elif mnem == 'sub':
+			# subtraction is addition of the complement, with carry
+			# meaning 'no borrow'
+			return ['c = 1', 'b = ~b & 255', 'r = a + b + 1', ADD_FLAGS] + dest('r & 255')
+		elif mnem == 'sbc':
+			return ['c = %s' % c_in, 'b = ~b & 255', 'r = a + b + c', ADD_FLAGS] + dest('r & 255')
+		elif mnem == 'and':
+			return ['r = a & b', Z_FLAG] + dest('r')
+		elif mnem == 'or':
+			return ['r = a | b', Z_FLAG] + dest('r')
+		elif mnem == 'xor':
+			return ['r = a ^ b', Z_FLAG] + dest('r')
+		raise SimulatorError('no semantics for %s' % mnem)
+
+	def step(self):
+		func = self.code[self.pc] or self._compile(self.pc)
+		self.pc = func(self.pc) & 0x1FFF
+		self.steps += 1
+		self.cycles += 1
+
+	def run(self, max_steps=None):
+		# run until we hit a breakpoint, halt or have run max_steps
+		# instructions; returns which of those it was
+		code = self.code
+		compile_at = self._compile
+		breakpoints = self.breakpoints
+		limit = max_steps if max_steps is not None else -1
+		if self.halted:
+			return 'halt'
+		pc = self.pc
+		steps = 0
+		reason = 'limit'
+		try:
+			while steps != limit:
+				if steps and pc in breakpoints:
+					reason = 'breakpoint'
+					break
+				func = code[pc] or compile_at(pc)
+				pc = func(pc) & 0x1FFF
+				steps += 1
+				if self.halted:
+					reason = 'halt'
+					break
+		finally:
+			self.pc = pc
+			self.steps += steps
+			self.cycles += steps
+		return reason
+
+	def dump(self, out=sys.stdout):
+		ram = self.ram
+		out.write('PC=%04X A=%02X STATUS=%02X BP=%02X MP0=%02X MP1=%02X TBLP=%02X TBHP=%02X TBLH=%02X\n' % (
+			self.pc, ram[ACC], ram[STATUS], ram[BP], ram[MP0], ram[MP1], ram[TBLP], ram[TBHP], ram[TBLH]))
+		out.write('stack: %s\n' % ' '.join('%04X' % a for a in self.stack))
+		out.write('%d instructions, %d cycles\n' % (self.steps, self.cycles))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Run a Holtek HT68FB560 program image in a simulator.')
+	parser.add_argument('prog_name', help='program image to run')
+	parser.add_argument('-n', '--steps', type=int, default=1000000,
+		help='maximum number of instructions to run (default: 1000000)')
+	parser.add_argument('-b', '--break', dest='breakpoints', type=parse_address, action='append', default=[],
+		help='stop when execution reaches this address (may be repeated)')
+	parser.add_argument('--start', type=parse_address, default=0,
+		help='address to start executing at (default: the reset vector)')
+	args = parser.parse_args()
+
+	sim = Simulator.from_file(args.prog_name)
+	sim.pc = args.start
+	sim.breakpoints.update(args.breakpoints)
+
+	began = time.perf_counter()
+	try:
+		reason = sim.run(args.steps)
+	except SimulatorError as e:
+		reason = 'error: %s' % e
+	elapsed = time.perf_counter() - began
+
+	print('stopped: %s' % reason)
+	sim.dump()
+	print('%.2fs (%.0f instructions/s)' % (elapsed, sim.steps / elapsed if elapsed else 0))
+
+
+if __name__ == '__main__':
+	main()
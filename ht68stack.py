@@ -0,0 +1,245 @@
+# Holtek HT68FB560 hardware stack depth analysis
+#
+# The return address stack only has STACK_DEPTH levels, and overflowing
+# it just loses the oldest return address, so a patch that adds a call
+# (like the 'call 19F1' redirect in patches.md) can break the firmware
+# in ways that only show up much later. This works out how deep each
+# function can take the stack:
+#
+# - a call costs a level on top of whatever the called function needs
+# - a jump into another function (directly or from a jump table found
+#   by guess_jump_table_end) costs nothing, as it returns on our behalf
+#
+# over the call graph, with a depth-first search that handles each
+# strongly connected component once (Tarjan's algorithm), so it stays
+# linear in the size of the call graph. Functions that jump into each
+# other in a cycle share a depth; a cycle with a call in it is recursion,
+# which gets flagged, and whose depth is only a lower bound.
+#
+# The worst case for an image is the depth reachable from ResetVector,
+# plus an interrupt arriving at the deepest point (a level for its
+# return address, plus its handler's depth). Handlers don't nest, as
+# taking an interrupt clears EMI, unless the handler sets EMI again; any
+# that do are assumed to be able to stack up underneath whichever
+# handler ends up deepest.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import sys
+import time
+
+from ht68dec import *
+from ht68flow import *
+from ht68regs import REG_ADDRS
+from ht68sim import STACK_DEPTH, INT_EMI
+
+INTC0 = REG_ADDRS['INTC0']
+EMI_BIT = INT_EMI.bit_length() - 1
+
+EDGE_CALL = 'call'
+EDGE_JUMP = 'jump'
+
+
+def sets_emi(opcode):
+	# whether an instruction might set EMI: 'set INTC0.0', or any write
+	# of the whole register
+	access = memory_access(opcode)
+	if access is None or access[0] != INTC0 or not access[3]:
+		return False
+	itype = ITYPE_TABLE[opcode]
+	if OP_TYPES[itype] == HTOP_BIT:
+		return itype == itypes.i_set_bit and access[1] == EMI_BIT
+	return True
+
+
+class StackAnalysis(object):
+	def __init__(self, flow):
+		self.flow = flow
+		self.edges = {}       # function -> [(EDGE_CALL or EDGE_JUMP, target)]
+		self.depth = {}       # function -> most stack levels it uses
+		self.via = {}         # function -> the edge leading to that depth, or None
+		self.recursive = set()
+		self.bounded = {}     # function -> False if recursion is involved
+		for entry in flow.function_entries():
+			self.edges[entry] = ([(EDGE_CALL, target) for target in sorted(set(flow.function_calls(entry)))] +
+				[(EDGE_JUMP, target) for target in flow.function_tail_calls(entry)])
+		self._analyze()
+
+	def _analyze(self):
+		# iterative Tarjan: each component is finished once everything
+		# it leads to has been
+		edges = self.edges
+		index = {}
+		low = {}
+		on_stack = set()
+		component = []
+		for root in sorted(edges):
+			if root in index:
+				continue
+			index[root] = low[root] = len(index)
+			component.append(root)
+			on_stack.add(root)
+			work = [(root, iter(edges[root]))]
+			while work:
+				node, targets = work[-1]
+				for kind, target in targets:
+					if target not in edges:
+						continue
+					if target not in index:
+						index[target] = low[target] = len(index)
+						component.append(target)
+						on_stack.add(target)
+						work.append((target, iter(edges[target])))
+						break
+					elif target in on_stack:
+						low[node] = min(low[node], index[target])
+				else:
+					work.pop()
+					if work:
+						parent = work[-1][0]
+						low[parent] = min(low[parent], low[node])
+					if low[node] == index[node]:
+						members = []
+						while True:
+							member = component.pop()
+							on_stack.discard(member)
+							members.append(member)
+							if member == node:
+								break
+						self._finish(members)
+
+	def _finish(self, members):
+		# everything in a component can reach everything else in it, so
+		# they all get the deepest way out of it
+		inside = set(members)
+		recursive = False
+		bounded = True
+		best = (0, None, None)
+		for member in sorted(members):
+			for kind, target in self.edges[member]:
+				if target in inside:
+					if kind == EDGE_CALL:
+						recursive = True
+					continue
+				depth = self.depth[target] + (1 if kind == EDGE_CALL else 0)
+				bounded = bounded and self.bounded[target]
+				if depth > best[0]:
+					best = (depth, member, (kind, target))
+
+		depth, owner, edge = best
+		for member in members:
+			self.depth[member] = depth
+			self.bounded[member] = bounded and not recursive
+			if member == owner:
+				self.via[member] = edge
+			elif owner is not None:
+				self.via[member] = (EDGE_JUMP, owner)
+			else:
+				self.via[member] = None
+		if recursive:
+			self.recursive.update(members)
+
+	def path(self, entry):
+		# the chain of (kind, function) edges from entry down to the
+		# deepest point it reaches
+		path = []
+		seen = set([entry])
+		edge = self.via.get(entry)
+		while edge is not None and edge[1] not in seen:
+			path.append(edge)
+			seen.add(edge[1])
+			edge = self.via.get(edge[1])
+		return path
+
+	def enables_interrupts(self, entry):
+		# whether a handler, or anything it calls, might set EMI again
+		opcodes = self.flow.opcodes
+		seen = set([entry])
+		work = [entry]
+		while work:
+			function = work.pop()
+			for start, end, successors in self.flow.function_blocks(function):
+				for addr in range(start, end):
+					if sets_emi(opcodes[addr]):
+						return True
+			for kind, target in self.edges.get(function, ()):
+				if target not in seen:
+					seen.add(target)
+					work.append(target)
+		return False
+
+	def worst_case(self):
+		# returns (main depth, interrupt depth, [handlers stacked up to
+		# reach it]); an interrupt costs a level for its return address
+		main = self.depth.get(VECTORS[0][0], 0)
+		handlers = [addr for addr, name in VECTORS[1:] if addr in self.depth]
+		if not handlers:
+			return (main, 0, [])
+		nesting = [addr for addr in handlers if self.enables_interrupts(addr)]
+		others = [addr for addr in handlers if addr not in nesting] or nesting
+		innermost = max(others, key=lambda addr: self.depth[addr])
+		chain = [addr for addr in nesting if addr != innermost] + [innermost]
+		return (main, sum(1 + self.depth[addr] for addr in chain), chain)
+
+	def is_bounded(self):
+		return all(self.bounded.get(addr, True) for addr, name in VECTORS)
+
+
+def format_path(analysis, entry):
+	labels = analysis.flow.labels
+	text = labels.get(entry, 'sub_%04X' % entry)
+	for kind, target in analysis.path(entry):
+		text += (' -> ' if kind == EDGE_CALL else ' ~> ') + labels.get(target, 'sub_%04X' % target)
+	return text
+
+
+def write_report(path, analysis, limit, out, verbose=True):
+	# returns whether the image could overflow the stack
+	main, interrupts, chain = analysis.worst_case()
+	total = main + interrupts
+	bound = '' if analysis.is_bounded() else '+'
+	overflow = total > limit
+	labels = analysis.flow.labels
+	out.write('%s: %d%s of %d levels (main %d, interrupts %d)%s\n' % (path, total, bound, limit,
+		main, interrupts, ' - OVERFLOW' if overflow else ''))
+	if not verbose:
+		return overflow
+
+	out.write('  %d: %s\n' % (main, format_path(analysis, VECTORS[0][0])))
+	for addr in chain:
+		out.write('  1 + %d: %s\n' % (analysis.depth[addr], format_path(analysis, addr)))
+	if analysis.recursive:
+		out.write('  recursive: %s\n' % ', '.join(labels.get(addr, 'sub_%04X' % addr) for addr in sorted(analysis.recursive)))
+	return overflow
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Find how deep Holtek HT68FB560 program images can take the hardware stack.',
+		epilog="'->' is a call and '~>' a jump into another function.")
+	parser.add_argument('images', nargs='+', help='program images, or folders of them')
+	parser.add_argument('-n', '--names', help='names file, for a single image (default: the image\'s .names file, if any)')
+	parser.add_argument('--stack-depth', type=int, default=STACK_DEPTH,
+		help='hardware stack levels (default: %(default)s)')
+	parser.add_argument('-q', '--quiet', action='store_true', help='one line per image, without the paths')
+	args = parser.parse_args()
+
+	images = find_images(args.images)
+	if args.names and len(images) != 1:
+		parser.error('--names only works with a single image')
+
+	began = time.time()
+	overflows = 0
+	for image in images:
+		analysis = StackAnalysis(load_flow(image, args.names))
+		if write_report(image, analysis, args.stack_depth, sys.stdout, not args.quiet):
+			overflows += 1
+	print('%d of %d images could overflow, in %.2fs' % (overflows, len(images), time.time() - began), file=sys.stderr)
+	sys.exit(1 if overflows else 0)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,277 @@
+# Holtek HT68FB560 static timing analysis
+#
+# Estimates how many instruction cycles each function and interrupt
+# handler can take, from entry to return, using the cycle costs in
+# ht68dec (the same ones ht68sim counts). For every function it works
+# out:
+#
+# - worst: the longest path through it, calls included
+# - typical: the average over its paths, taking each branch of a skip
+#   (and each entry of a jump table) equally often
+#
+# Loops can't be bounded without knowing what they count, so each loop
+# is counted as running once and the function is flagged; its worst
+# case is then only a lower bound, as is that of anything calling it.
+# Recursion gets the same treatment.
+#
+# Functions are visited callees first with a depth-first search over
+# the call graph (calls and tail jumps), so every function is costed
+# once and reused by all its callers. The report comes out sorted by
+# address, one line per function, so reports for two releases can be
+# diffed; the 'diff' command lines functions up by name instead, which
+# works across releases when both images have names files.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import sys
+
+from ht68dec import *
+from ht68flow import *
+
+
+class FunctionTiming(object):
+	def __init__(self, entry):
+		self.entry = entry
+		self.worst = 0
+		self.typical = 0.0
+		self.loops = []         # loop header addresses
+		self.recursive = False  # part of a cycle in the call graph
+		self.bounded = True     # False if it or anything it calls has loops or recursion
+		self.callees = []       # functions it calls or tail jumps to
+
+
+def instruction_cycles(opcode):
+	itype = ITYPE_TABLE[opcode]
+	if itype < 0:
+		return 0
+	cycles = CYCLE_COSTS[itype]
+	access = memory_access(opcode)
+	if access is not None and access[0] == PCL_ADDR and access[3]:
+		cycles += PCL_WRITE_CYCLES
+	return cycles
+
+
+class TimingAnalysis(object):
+	def __init__(self, flow):
+		self.flow = flow
+		self.stops = flow.functions | flow.entries
+		self.functions = {}    # entry -> FunctionTiming
+		self._blocks = {}      # entry -> the function's blocks
+		self._analyze()
+
+	def _function_blocks(self, entry):
+		blocks = self._blocks.get(entry)
+		if blocks is None:
+			blocks = self._blocks[entry] = self.flow.function_blocks(entry)
+		return blocks
+
+	def _callees(self, entry):
+		return sorted(set(self.flow.function_calls(entry)) | set(self.flow.function_tail_calls(entry)))
+
+	def _analyze(self):
+		# depth-first over the call graph, costing each function once
+		# all of its callees are done; a callee still on the stack
+		# means recursion
+		functions = self.functions
+		for root in self.flow.function_entries():
+			if root in functions:
+				continue
+			timing = functions[root] = FunctionTiming(root)
+			timing.callees = self._callees(root)
+			active = set([root])
+			stack = [(timing, iter(timing.callees))]
+			while stack:
+				timing, callees = stack[-1]
+				for callee in callees:
+					if callee in active:
+						functions[callee].recursive = True
+						timing.recursive = True
+					elif callee not in functions and callee in self.stops:
+						child = functions[callee] = FunctionTiming(callee)
+						child.callees = self._callees(callee)
+						active.add(callee)
+						stack.append((child, iter(child.callees)))
+						break
+				else:
+					stack.pop()
+					active.discard(timing.entry)
+					self._cost(timing)
+
+	def _cost(self, timing):
+		# longest and average paths through the function's blocks, with
+		# back edges cut; calls and tail jumps add what the callee takes
+		entry = timing.entry
+		opcodes = self.flow.opcodes
+		functions = self.functions
+		blocks = dict((block[0], block) for block in self._function_blocks(entry))
+		if entry not in blocks:
+			return
+
+		def callee_cost(target):
+			callee = functions.get(target)
+			if callee is None:
+				return (0, 0.0)
+			# a callee that's still being worked out (recursion) has
+			# nothing to contribute yet
+			if not callee.bounded or callee.recursive:
+				timing.bounded = False
+			return (callee.worst, callee.typical)
+
+		# post-order, so every block comes after the blocks it leads to
+		# (back edges aside)
+		order = []
+		back_edges = set()
+		state = {entry: 1}
+		stack = [(entry, iter(blocks[entry][2]))]
+		while stack:
+			start, successors = stack[-1]
+			for successor in successors:
+				if successor not in blocks:
+					continue
+				if successor == entry or state.get(successor) == 1:
+					back_edges.add((start, successor))
+				elif successor not in state:
+					state[successor] = 1
+					stack.append((successor, iter(blocks[successor][2])))
+					break
+			else:
+				stack.pop()
+				state[start] = 2
+				order.append(start)
+
+		worst = {}
+		typical = {}
+		for start in order:
+			start, end, successors = blocks[start]
+			block_worst = 0
+			block_typical = 0.0
+			for addr in range(start, end):
+				opcode = opcodes[addr]
+				cycles = instruction_cycles(opcode)
+				block_worst += cycles
+				block_typical += cycles
+				if self.flow.flow_kind(opcode) == FLOW_CALL:
+					callee_worst, callee_typical = callee_cost(OPVALUE_TABLE[opcode])
+					block_worst += callee_worst
+					block_typical += callee_typical
+
+			skip = self.flow.flow_kind(opcodes[end - 1]) == FLOW_SKIP
+			paths = []
+			for successor in successors:
+				extra = SKIP_TAKEN_CYCLES if skip and successor == end + 1 else 0
+				if (start, successor) in back_edges:
+					paths.append((extra, extra))
+				elif successor in blocks:
+					paths.append((extra + worst[successor], extra + typical[successor]))
+				elif successor in self.stops:
+					callee_worst, callee_typical = callee_cost(successor)
+					paths.append((extra + callee_worst, extra + callee_typical))
+				else:
+					paths.append((extra, extra))
+			if paths:
+				block_worst += max(path[0] for path in paths)
+				block_typical += sum(path[1] for path in paths) / len(paths)
+			worst[start] = block_worst
+			typical[start] = block_typical
+
+		timing.worst = worst[entry]
+		timing.typical = typical[entry]
+		timing.loops = sorted(set(target for source, target in back_edges))
+		if timing.loops or timing.recursive:
+			timing.bounded = False
+
+	def report(self, labels=None):
+		# yields (entry, name, worst, typical, notes), by address
+		labels = self.flow.labels if labels is None else labels
+		for entry in sorted(self.functions):
+			timing = self.functions[entry]
+			notes = []
+			if timing.loops:
+				notes.append('loops at %s' % ', '.join('%04Xh' % addr for addr in timing.loops))
+			if timing.recursive:
+				notes.append('recursive')
+			if not timing.bounded and not timing.loops and not timing.recursive:
+				notes.append('unbounded callee')
+			yield (entry, labels.get(entry, 'sub_%04X' % entry), timing.worst, timing.typical, '; '.join(notes))
+
+
+def format_worst(worst, bounded):
+	# a worst case that's only a lower bound gets a '+'
+	return '%d%s' % (worst, '' if bounded else '+')
+
+
+def write_report(analysis, out):
+	out.write('%-6s %-32s %8s %9s  %s\n' % ('addr', 'function', 'worst', 'typical', 'notes'))
+	for entry, name, worst, typical, notes in analysis.report():
+		bounded = analysis.functions[entry].bounded
+		out.write(('%04X   %-32s %8s %9.1f  %s' % (entry, name, format_worst(worst, bounded), typical, notes)).rstrip() + '\n')
+
+
+def write_diff(old, new, out, show_all=False):
+	# functions matched up by name; returns the number that changed
+	def by_name(analysis):
+		return dict((name, (worst, typical, analysis.functions[entry].bounded))
+			for entry, name, worst, typical, notes in analysis.report())
+
+	old_timings = by_name(old)
+	new_timings = by_name(new)
+	changed = 0
+	out.write('%-32s %8s %8s %8s %9s %9s\n' % ('function', 'old', 'new', 'delta', 'old typ', 'new typ'))
+	for name in sorted(set(old_timings) | set(new_timings)):
+		before = old_timings.get(name)
+		after = new_timings.get(name)
+		if before is not None and after is not None and before == after and not show_all:
+			continue
+		if before != after:
+			changed += 1
+		if before is None or after is None:
+			delta = 'new' if before is None else 'gone'
+		else:
+			delta = '%+d' % (after[0] - before[0])
+		out.write('%-32s %8s %8s %8s %9s %9s\n' % (name,
+			format_worst(before[0], before[2]) if before else '-',
+			format_worst(after[0], after[2]) if after else '-',
+			delta,
+			'%.1f' % before[1] if before else '-',
+			'%.1f' % after[1] if after else '-'))
+	return changed
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Estimate the cycle counts of the functions and interrupt handlers in a Holtek HT68FB560 program image.')
+	commands = parser.add_subparsers(dest='command')
+	commands.required = True
+
+	report_parser = commands.add_parser('report', help='cycle counts for every function in an image')
+	report_parser.add_argument('image', help='program image')
+	report_parser.add_argument('-n', '--names', help='names file (default: the image\'s .names file, if any)')
+	report_parser.add_argument('-o', '--output', help='file to write the report to (default: stdout)')
+
+	diff_parser = commands.add_parser('diff', help='compare cycle counts between two images, by function name',
+		epilog='example: %(prog)s program.bin program-patched.bin')
+	diff_parser.add_argument('old_image', help='program image to compare against')
+	diff_parser.add_argument('new_image', help='program image to compare')
+	diff_parser.add_argument('-a', '--all', action='store_true', help='list functions that didn\'t change too')
+	args = parser.parse_args()
+
+	if args.command == 'report':
+		analysis = TimingAnalysis(load_flow(args.image, args.names))
+		if args.output:
+			with open(args.output, 'w') as out:
+				write_report(analysis, out)
+		else:
+			write_report(analysis, sys.stdout)
+		return
+
+	old = TimingAnalysis(load_flow(args.old_image))
+	new = TimingAnalysis(load_flow(args.new_image))
+	changed = write_diff(old, new, sys.stdout, args.all)
+	print('%d functions changed' % changed, file=sys.stderr)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,333 @@
+# Holtek HT68FB560 cross-reference database
+#
+# Builds the xrefs the IDA module makes (data memory reads and writes,
+# calls and jumps) for whole collections of firmware images, without
+# IDA, and keeps them in an SQLite database so they can be looked up
+# across every version at once:
+#
+#   who writes [0C8h].1?              query xref.db writes [0C8h].1
+#   who calls 0F07h?                  query xref.db calls 0F07h
+#   ...or updateDPIStageIndicator?    query xref.db calls updateDPIStageIndicator
+#
+# Each image gets one pass of control flow analysis (see ht68flow.py) so
+# only words reached as code are counted. Reads and writes follow the
+# FL_USE/FL_CHG features in INSN_DEFS. Names for code come from a names
+# file next to each image (program.bin -> program.names, as ht68match.py
+# writes them), on top of the labels the analysis generates.
+
+# Copyright (c) Ash Wolf, 2018
+# Licensed under the MIT License
+
+# Project Home: https://github.com/Treeki/TM155-tools
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from ht68dec import *
+from ht68flow import *
+from ht68match import read_names
+from ht68search import format_opcode, parse_bit_operand, parse_data_operand, parse_number
+
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE images (
+	id INTEGER PRIMARY KEY,
+	path TEXT UNIQUE NOT NULL,
+	size INTEGER NOT NULL,
+	mtime REAL NOT NULL
+);
+CREATE TABLE names (
+	image INTEGER NOT NULL,
+	address INTEGER NOT NULL,
+	name TEXT NOT NULL
+);
+CREATE TABLE data_refs (
+	image INTEGER NOT NULL,
+	address INTEGER NOT NULL,
+	function INTEGER,
+	opcode INTEGER NOT NULL,
+	mem INTEGER NOT NULL,
+	bit INTEGER,
+	access INTEGER NOT NULL
+);
+CREATE TABLE code_refs (
+	image INTEGER NOT NULL,
+	address INTEGER NOT NULL,
+	function INTEGER,
+	opcode INTEGER NOT NULL,
+	target INTEGER NOT NULL,
+	kind TEXT NOT NULL
+);
+CREATE INDEX names_by_name ON names (name);
+CREATE INDEX names_by_address ON names (image, address);
+CREATE INDEX data_refs_by_mem ON data_refs (mem, bit);
+CREATE INDEX data_refs_by_image ON data_refs (image);
+CREATE INDEX code_refs_by_target ON code_refs (target);
+CREATE INDEX code_refs_by_image ON code_refs (image);
+'''
+
+# data_refs.access bits
+ACCESS_READ = 1
+ACCESS_WRITE = 2
+
+# code_refs.kind values
+REF_CALL = 'call'
+REF_JUMP = 'jump'
+REF_TABLE = 'table'     # from an addm A,PCL to each entry of its jump table
+
+
+def open_database(path):
+	db = sqlite3.connect(path)
+	version = db.execute('PRAGMA user_version').fetchone()[0]
+	if version == 0:
+		db.executescript(SCHEMA)
+		db.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+	elif version != SCHEMA_VERSION:
+		db.close()
+		raise ValueError('%s was made by a different version of ht68xref' % path)
+	return db
+
+
+def names_path(image):
+	return os.path.splitext(image)[0] + '.names'
+
+
+def function_owners(flow):
+	# code address -> entry of the function it's part of; code shared
+	# between functions goes to the first one
+	owners = {}
+	for entry in flow.function_entries():
+		for start, end, successors in flow.function_blocks(entry):
+			for addr in range(start, end):
+				owners.setdefault(addr, entry)
+	return owners
+
+
+def collect_refs(opcodes, names=None, flow=None):
+	# returns (labels, data refs, code refs) for an image, as rows for
+	# the names, data_refs and code_refs tables minus the image column;
+	# pass flow to reuse an existing analysis of the same opcodes
+	if flow is None:
+		flow = FlowGraph(opcodes)
+	if names:
+		flow.labels.update(names)
+	owners = function_owners(flow)
+
+	data_refs = []
+	code_refs = []
+	is_code = flow.is_code
+	for addr in range(flow.size):
+		if not is_code[addr]:
+			continue
+		opcode = opcodes[addr]
+		access = memory_access(opcode)
+		if access is not None:
+			mem, bit, reads, writes = access
+			kind = (ACCESS_READ if reads else 0) | (ACCESS_WRITE if writes else 0)
+			if kind:
+				data_refs.append((addr, owners.get(addr), opcode, mem, bit, kind))
+		flow_kind = FLOW_KINDS[ITYPE_TABLE[opcode]]
+		if flow_kind == FLOW_CALL:
+			code_refs.append((addr, owners.get(addr), opcode, OPVALUE_TABLE[opcode], REF_CALL))
+		elif flow_kind == FLOW_JUMP:
+			code_refs.append((addr, owners.get(addr), opcode, OPVALUE_TABLE[opcode], REF_JUMP))
+
+	for addr, (first, last) in sorted(flow.jump_tables.items()):
+		for entry in range(first, last + 1):
+			code_refs.append((addr, owners.get(addr), opcodes[addr], entry, REF_TABLE))
+
+	labels = sorted(flow.labels.items())
+	return labels, data_refs, code_refs
+
+
+def update_database(db, paths):
+	# (re)indexes every image that's new or has changed since it was
+	# last indexed, and drops images that are no longer in paths;
+	# returns the number of images indexed
+	known = {}
+	for image_id, path, size, mtime in db.execute('SELECT id, path, size, mtime FROM images'):
+		known[path] = (image_id, size, mtime)
+
+	indexed = 0
+	wanted = set()
+	with db:
+		for path in paths:
+			path = os.path.abspath(path)
+			wanted.add(path)
+			st = os.stat(path)
+			extra = names_path(path)
+			mtime = max(st.st_mtime, os.stat(extra).st_mtime) if os.path.exists(extra) else st.st_mtime
+			if path in known:
+				image_id, size, old_mtime = known[path]
+				if size == st.st_size and old_mtime == mtime:
+					continue
+				delete_image(db, image_id)
+
+			opcodes = read_opcodes(path)
+			names = read_names(extra) if os.path.exists(extra) else None
+			labels, data_refs, code_refs = collect_refs(opcodes, names)
+
+			image_id = db.execute('INSERT INTO images (path, size, mtime) VALUES (?, ?, ?)',
+				(path, st.st_size, mtime)).lastrowid
+			db.executemany('INSERT INTO names VALUES (?, ?, ?)',
+				[(image_id,) + row for row in labels])
+			db.executemany('INSERT INTO data_refs VALUES (?, ?, ?, ?, ?, ?, ?)',
+				[(image_id,) + row for row in data_refs])
+			db.executemany('INSERT INTO code_refs VALUES (?, ?, ?, ?, ?, ?)',
+				[(image_id,) + row for row in code_refs])
+			indexed += 1
+
+		for path, (image_id, size, mtime) in known.items():
+			if path not in wanted:
+				delete_image(db, image_id)
+	return indexed
+
+
+def delete_image(db, image_id):
+	for table in ('names', 'data_refs', 'code_refs'):
+		db.execute('DELETE FROM %s WHERE image = ?' % table, (image_id,))
+	db.execute('DELETE FROM images WHERE id = ?', (image_id,))
+
+
+def parse_memory(s, defines=None):
+	# returns (data address, bit or None) for a data memory operand:
+	# '[0C8h]', '[0C8h].1', a register or bit name, or a defined name;
+	# a bit of '*' means any bit
+	s = s.strip()
+	if defines and s.upper() in defines:
+		s = defines[s.upper()]
+	bit = parse_bit_operand(s)
+	if bit is not None:
+		(mem, mem_mask), (bit, bit_mask) = bit
+		if mem_mask != 0xFF:
+			raise ValueError('wildcards are not supported here: %s' % s)
+		return (mem, bit if bit_mask else None)
+	data = parse_data_operand(s)
+	if data is None:
+		raise ValueError('unknown data memory operand %r' % s)
+	if data[1] != 0xFF:
+		raise ValueError('wildcards are not supported here: %s' % s)
+	return (data[0], None)
+
+
+QUERY_FIELDS = '''images.path, refs.address, refs.opcode,
+	(SELECT name FROM names WHERE names.image = refs.image AND names.address = refs.function LIMIT 1)'''
+
+
+def query_data(db, mem, bit, access):
+	# a byte-wide access to the register counts as an access to each of
+	# its bits too
+	sql = 'SELECT ' + QUERY_FIELDS + ''' FROM data_refs AS refs JOIN images ON images.id = refs.image
+		WHERE refs.mem = ? AND (refs.access & ?) != 0'''
+	params = [mem, access]
+	if bit is not None:
+		sql += ' AND (refs.bit IS NULL OR refs.bit = ?)'
+		params.append(bit)
+	sql += ' ORDER BY images.path, refs.address'
+	return db.execute(sql, params)
+
+
+def query_code(db, target, kinds):
+	# target is an address, or a name to look up in each image
+	sql = 'SELECT ' + QUERY_FIELDS + ' FROM code_refs AS refs JOIN images ON images.id = refs.image'
+	if isinstance(target, int):
+		sql += ' WHERE refs.target = ?'
+	else:
+		sql += ''' JOIN names ON names.image = refs.image AND names.address = refs.target
+			WHERE names.name = ?'''
+	sql += ' AND refs.kind IN (%s) ORDER BY images.path, refs.address' % ', '.join('?' * len(kinds))
+	return db.execute(sql, [target] + list(kinds))
+
+
+def image_labels(db, path):
+	labels = {}
+	for address, name in db.execute('''SELECT names.address, names.name FROM names
+			JOIN images ON images.id = names.image WHERE images.path = ?''', (path,)):
+		labels.setdefault(address, name)
+	return labels
+
+
+QUERY_KINDS = {
+	'reads': ('data', ACCESS_READ),
+	'writes': ('data', ACCESS_WRITE),
+	'refs': ('data', ACCESS_READ | ACCESS_WRITE),
+	'calls': ('code', (REF_CALL,)),
+	'jumps': ('code', (REF_JUMP, REF_TABLE)),
+	'xrefs': ('code', (REF_CALL, REF_JUMP, REF_TABLE)),
+}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Cross-reference data memory and code across Holtek HT68FB560 program images.')
+	commands = parser.add_subparsers(dest='command')
+	commands.required = True
+
+	index_parser = commands.add_parser('index', help='build or update a database',
+		epilog='example: %(prog)s xref.db firmware-releases/')
+	index_parser.add_argument('database', help='SQLite database to write')
+	index_parser.add_argument('images', nargs='+', help='program images, or folders of them')
+
+	query_parser = commands.add_parser('query', help='look up references',
+		epilog='example: %(prog)s xref.db writes intLMVar1 -D intLMVar1=[0C8h].1')
+	query_parser.add_argument('database', help='SQLite database to search')
+	query_parser.add_argument('kind', choices=sorted(QUERY_KINDS),
+		help='reads/writes/refs of data memory, or calls/jumps/xrefs to code')
+	query_parser.add_argument('target',
+		help="data memory ('[0C8h].1', 'STATUS.Z', 'PA') or a code address or name")
+	query_parser.add_argument('-D', '--define', action='append', default=[], metavar='NAME=OPERAND',
+		help='name a data memory operand, e.g. intLMVar1=[0C8h].1')
+	args = parser.parse_args()
+
+	if not os.path.exists(args.database) and args.command == 'query':
+		parser.error('%s does not exist' % args.database)
+	try:
+		db = open_database(args.database)
+	except (ValueError, sqlite3.DatabaseError) as e:
+		parser.error(str(e))
+
+	if args.command == 'index':
+		images = find_images(args.images)
+		began = time.time()
+		count = update_database(db, images)
+		print('indexed %d of %d images in %.2fs' % (count, len(images), time.time() - began), file=sys.stderr)
+		return
+
+	defines = {}
+	for define in args.define:
+		if '=' not in define:
+			parser.error('expected NAME=OPERAND, not %r' % define)
+		name, value = define.split('=', 1)
+		defines[name.strip().upper()] = value.strip()
+
+	began = time.time()
+	table, what = QUERY_KINDS[args.kind]
+	if table == 'data':
+		try:
+			mem, bit = parse_memory(args.target, defines)
+		except ValueError as e:
+			parser.error(str(e))
+		rows = query_data(db, mem, bit, what)
+	else:
+		try:
+			target = parse_number(args.target)
+		except ValueError:
+			target = args.target
+		rows = query_code(db, target, what)
+
+	count = 0
+	labels = {}
+	for path, address, opcode, function in rows:
+		if path not in labels:
+			labels[path] = image_labels(db, path)
+		where = ' (in %s)' % function if function else ''
+		print('%s:%04X: %s%s' % (path, address, format_opcode(opcode, labels[path]), where))
+		count += 1
+	print('%s %s: %d references in %.1fms' % (args.kind, args.target, count, (time.time() - began) * 1000), file=sys.stderr)
+
+
+if __name__ == '__main__':
+	main()
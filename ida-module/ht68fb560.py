@@ -23,170 +23,78 @@ from ida_segment import *
 from ida_name import *
 from ida_netnode import *
 import ida_ida
+import hashlib
 import json
-
-BANK_COUNT = 6
-
-HTOP_NONE   = 0   # no operand
-HTOP_DATA   = 1   # [m]
-HTOP_DATA_A = 2   # [m],A
-HTOP_A_DATA = 3   # A,[m]
-HTOP_A_IMM  = 4   # A,imm
-HTOP_ADDR   = 5   # program address
-HTOP_BIT    = 6   # [m].i
-
-IDEF_MAGIC_VALUE = 0
-IDEF_MASK        = 1
-IDEF_MNEMONIC    = 2
-IDEF_OP_TYPE     = 3
-IDEF_IDA_FEATURE = 4
-IDEF_COMMENT     = 5
-
-INSN_DEFS = [
-	(0x0000, 0xffff, 'nop',     HTOP_NONE,   0,                       'Nothing'),
-	(0x0001, 0xffff, 'clrwdt',  HTOP_NONE,   0,                       'Pre-Clear Watchdog Timer'),
-	(0x0002, 0xffff, 'halt',    HTOP_NONE,   CF_STOP,                 'Enter power down mode'),
-	(0x0003, 0xffff, 'ret',     HTOP_NONE,   CF_STOP,                 'Return from subroutine'),
-	(0x0004, 0xffff, 'reti',    HTOP_NONE,   CF_STOP,                 'Return from interrupt'),
-	(0x0005, 0xffff, 'clrwdt2', HTOP_NONE,   0,                       'Pre-Clear Watchdog Timer 2'),
-	(0x0080, 0xbf80, 'mov',     HTOP_DATA_A, CF_CHG1|CF_USE2,         '[m] := A'),
-	(0x0100, 0xbf80, 'cpla',    HTOP_DATA,   CF_USE1,                 'A := ~[m]'),
-	(0x0180, 0xbf80, 'cpl',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] := ~[m]'),
-	(0x0200, 0xbf80, 'sub',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A -= [m]'),
-	(0x0280, 0xbf80, 'subm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] := A - [m]'),
-	(0x0300, 0xbf80, 'add',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A += [m]'),
-	(0x0380, 0xbf80, 'addm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2|CF_JUMP, '[m] += A'),
-	(0x0400, 0xbf80, 'xor',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A ^= [m]'),
-	(0x0480, 0xbf80, 'xorm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] ^= A'),
-	(0x0500, 0xbf80, 'or',      HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A |= [m]'),
-	(0x0580, 0xbf80, 'orm',     HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] |= A'),
-	(0x0600, 0xbf80, 'and',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A &= [m]'),
-	(0x0680, 0xbf80, 'andm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] &= A'),
-	(0x0700, 0xbf80, 'mov',     HTOP_A_DATA, CF_CHG1|CF_USE2,         'A := [m]'),
-	(0x1000, 0xbf80, 'sza',     HTOP_DATA,   CF_USE1,                 'A := [m]; if (A == 0) skip next'),
-	(0x1080, 0xbf80, 'sz',      HTOP_DATA,   CF_USE1,                 'if ([m] == 0) skip next'),
-	(0x1100, 0xbf80, 'swapa',   HTOP_DATA,   CF_USE1,                 'A := swapNibbles([m])'),
-	(0x1180, 0xbf80, 'swap',    HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] := swapNibbles([m])'),
-	(0x1200, 0xbf80, 'sbc',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A ^= [m]'),
-	(0x1280, 0xbf80, 'sbcm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] ^= A'),
-	(0x1300, 0xbf80, 'adc',     HTOP_A_DATA, CF_USE1|CF_CHG1|CF_USE2, 'A ^= [m]'),
-	(0x1380, 0xbf80, 'adcm',    HTOP_A_DATA, CF_USE1|CF_USE2|CF_CHG2, '[m] ^= A'),
-	(0x1400, 0xbf80, 'inca',    HTOP_DATA,   CF_USE1,                 'A := [m] + 1'),
-	(0x1480, 0xbf80, 'inc',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m]++'),
-	(0x1500, 0xbf80, 'deca',    HTOP_DATA,   CF_USE1,                 'A := [m] - 1'),
-	(0x1580, 0xbf80, 'dec',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m]--'),
-	(0x1600, 0xbf80, 'siza',    HTOP_DATA,   CF_USE1,                 'A := [m] + 1; if (A == 0) skip next'),
-	(0x1680, 0xbf80, 'siz',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m]++; if ([m] == 0) skip next'),
-	(0x1700, 0xbf80, 'sdza',    HTOP_DATA,   CF_USE1,                 'A := [m] - 1; if (A == 0) skip next'),
-	(0x1780, 0xbf80, 'sdz',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m]--; if ([m] == 0) skip next'),
-	(0x1800, 0xbf80, 'rla',     HTOP_DATA,   CF_USE1,                 'A := [m] rotLeft 1'),
-	(0x1880, 0xbf80, 'rl',      HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] rotLeft 1'),
-	(0x1900, 0xbf80, 'rra',     HTOP_DATA,   CF_USE1,                 'A := [m] rotRight 1'),
-	(0x1980, 0xbf80, 'rr',      HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] rotRight 1'),
-	(0x1a00, 0xbf80, 'rlca',    HTOP_DATA,   CF_USE1,                 'A := [m] rotLeft 1   (with carry)'),
-	(0x1a80, 0xbf80, 'rlc',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] rotLeft 1   (with carry)'),
-	(0x1b00, 0xbf80, 'rrca',    HTOP_DATA,   CF_USE1,                 'A := [m] rotRight 1  (with carry)'),
-	(0x1b80, 0xbf80, 'rrc',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] rotRight 1  (with carry)'),
-	(0x1d00, 0xbf80, 'tabrd',   HTOP_DATA,   CF_CHG1,                 'TBLH:[m] := program[TBHP:TBLP]'),
-	(0x1e80, 0xbf80, 'daa',     HTOP_DATA,   CF_CHG1,                 '[m] = bcdAdjust(A)'),
-	(0x1f00, 0xbf80, 'clr',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] := 0'),
-	(0x1f80, 0xbf80, 'set',     HTOP_DATA,   CF_USE1|CF_CHG1,         '[m] := FFh'),
-	(0x0900, 0xff00, 'ret',     HTOP_A_IMM,  CF_CHG1|CF_USE2|CF_STOP, 'A := imm; return'),
-	(0x0a00, 0xff00, 'sub',     HTOP_A_IMM,  CF_USE1|CF_CHG1|CF_USE2, 'A -= imm'),
-	(0x0b00, 0xff00, 'add',     HTOP_A_IMM,  CF_USE1|CF_CHG1|CF_USE2, 'A += imm'),
-	(0x0c00, 0xff00, 'xor',     HTOP_A_IMM,  CF_USE1|CF_CHG1|CF_USE2, 'A ^= imm'),
-	(0x0d00, 0xff00, 'or',      HTOP_A_IMM,  CF_USE1|CF_CHG1|CF_USE2, 'A |= imm'),
-	(0x0e00, 0xff00, 'and',     HTOP_A_IMM,  CF_USE1|CF_CHG1|CF_USE2, 'A &= imm'),
-	(0x0f00, 0xff00, 'mov',     HTOP_A_IMM,  CF_CHG1|CF_USE2,         'A := imm'),
-	(0x2000, 0x3800, 'call',    HTOP_ADDR,   CF_CALL|CF_USE1,         'call addr'),
-	(0x2800, 0x3800, 'jmp',     HTOP_ADDR,   CF_STOP|CF_USE1,         'jump to addr'),
-	(0x3000, 0xbc00, 'set',     HTOP_BIT,    CF_CHG1|CF_USE2,         '[m] := 1'),
-	(0x3400, 0xbc00, 'clr',     HTOP_BIT,    CF_CHG1|CF_USE2,         '[m] := 0'),
-	(0x3800, 0xbc00, 'snz',     HTOP_BIT,    CF_USE1|CF_USE2,         'if ([m] != 0) skip next'),
-	(0x3c00, 0xbc00, 'sz',      HTOP_BIT,    CF_USE1|CF_USE2,         'if ([m] == 0) skip next'),
+import os
+import struct
+import sys
+
+# the decoder itself lives in ht68dec.py, which should sit next to this file
+# along with the other ht68*.py modules
+PROCS_DIR = get_user_idadir() + '/procs'
+if PROCS_DIR not in sys.path:
+	sys.path.append(PROCS_DIR)
+
+from ht68dec import *
+from ht68regs import *
+from ht68banks import BankAnalysis
+from ht68flow import FlowGraph
+from ht68match import read_names
+
+# translate the decoder's feature flags into IDA's
+IDA_FEATURES = [
+	(FL_STOP, CF_STOP),
+	(FL_CALL, CF_CALL),
+	(FL_CHG1, CF_CHG1),
+	(FL_CHG2, CF_CHG2),
+	(FL_USE1, CF_USE1),
+	(FL_USE2, CF_USE2),
+	(FL_JUMP, CF_JUMP),
 ]
 
-class NiceEnum(object):
-	pass
+def get_ida_feature(flags):
+	feature = 0
+	for fl, cf in IDA_FEATURES:
+		if flags & fl:
+			feature |= cf
+	return feature
 
-itypes = NiceEnum()
-for i, d in enumerate(INSN_DEFS):
-	# choose a non-conflicting name for certain instructions
-	name = 'i_' + d[IDEF_MNEMONIC]
-	if d[IDEF_OP_TYPE] == HTOP_BIT:
-		name += '_bit'
-	elif d[IDEF_OP_TYPE] == HTOP_A_IMM:
-		name += '_imm'
-	setattr(itypes, name, i)
 
+# pre-analysis files written by ht68prep.py
+PREP_VERSION = 1
+PREP_EXTENSION = '.prep'
+PREP_CACHE_ENV = 'HT68_PREP_CACHE'
 
-with open(get_user_idadir() + '/procs/ht68fb560.json', 'r') as f:
-	REG_DEFS = json.load(f)
 
 reg_lookup = NiceEnum()
-for addr, reg in enumerate(REG_DEFS):
-	if reg:
-		setattr(reg_lookup, reg['name'], addr)
-
-
-
-def get_itype_for_opcode(op):
-	for i, d in enumerate(INSN_DEFS):
-		magic = d[IDEF_MAGIC_VALUE]
-		mask = d[IDEF_MASK]
-		if (op & mask) == magic:
-			return i
-	return None
-
-def get_opvalue_for_opcode(itype, op):
-	idef = INSN_DEFS[itype]
-	htop = idef[IDEF_OP_TYPE]
-	if htop == HTOP_DATA or htop == HTOP_A_DATA or htop == HTOP_DATA_A:
-		# data memory
-		return (op & 0x7F) | ((op >> 7) & 0x80)
-	elif htop == HTOP_A_IMM:
-		# immediate
-		return op & 0xFF
-	elif htop == HTOP_ADDR:
-		# address
-		return (op & 0x7FF) | ((op >> 3) & 0x1800)
-	elif htop == HTOP_BIT:
-		# bit of data memory
-		addr = (op & 0x7F) | ((op >> 7) & 0x80)
-		bit = (op >> 7) & 7
-		return (addr, bit)
-
-
-def guess_jump_table_end(start):
-	guaranteed_end = BADADDR
-	work_ea = start
-
-	# we want to keep going until we find something that can't
-	# possibly be part of the jump table
-	while is_mapped(work_ea) and work_ea != guaranteed_end:
-		# what's here?
-		op = get_wide_byte(work_ea)
-		itype = get_itype_for_opcode(op)
-
-		if itype == itypes.i_ret or itype == itypes.i_ret_imm:
-			# ret can be part of the jump table, that's fine
-			# just keep going
-			work_ea += 1
-		elif itype == itypes.i_jmp:
-			target = get_opvalue_for_opcode(itype, op)
-			if target < guaranteed_end or guaranteed_end == BADADDR:
-				# we know that if we're jumping to an instruction,
-				# then that's definitely _after_ the jump table
-				# so we consider that to be a point where we must end
-				guaranteed_end = target
-			work_ea += 1
-		else:
-			# this is not a ret or a jump
-			# so it's probably not part of the jump table
-			# bail the fuck out
-			break
+for _name, _addr in REG_ADDRS.items():
+	setattr(reg_lookup, _name, _addr)
+
+
+
+class DecodeCacheHooks(IDB_Hooks):
+	# drops cached decodes for any word whose bytes get changed
+	def __init__(self, proc):
+		IDB_Hooks.__init__(self)
+		self.proc = proc
 
-	return work_ea - 1
+	def byte_patched(self, ea, old_value):
+		self.proc.decode_cache.pop(ea, None)
+		self.proc.prepared_code.discard(ea)
+		self.proc.bank_refs_current = False
+		return 0
+
+
+class BankAnalysisHooks(IDB_Hooks):
+	# resolves banked and indirect accesses whenever auto-analysis
+	# finishes, since that needs the whole image's control flow
+	def __init__(self, proc):
+		IDB_Hooks.__init__(self)
+		self.proc = proc
+
+	def auto_empty_finally(self):
+		self.proc._apply_bank_analysis()
+		return 0
 
 
 class HoltekProcessor(processor_t):
@@ -257,7 +165,7 @@ class HoltekProcessor(processor_t):
 
 		self.instruc = []
 		for insn in INSN_DEFS:
-			self.instruc.append({'name': insn[IDEF_MNEMONIC], 'feature': insn[IDEF_IDA_FEATURE]})
+			self.instruc.append({'name': insn[IDEF_MNEMONIC], 'feature': get_ida_feature(insn[IDEF_FEATURE])})
 		self.instruc_end = len(INSN_DEFS)
 		self.icode_return = 3   # ret. We should dynamically compute this index, really
 
@@ -281,42 +189,45 @@ class HoltekProcessor(processor_t):
 
 
 	def _prepare_db(self):
-		# define some enums
-		bit_enums = {}
-		for addr, reg in enumerate(REG_DEFS):
-			if reg and 'bits' in reg:
-				prefix = str(reg['name']) + ':'
-				enum = add_enum(BADADDR, 'bit_' + str(reg['name']), 0)
+		# all the register info comes precompiled from ht68regs, and
+		# auto-analysis is held off until we're done so IDA doesn't
+		# queue up work for every single change
+		was_enabled = enable_auto(False)
+		try:
+			# define some enums
+			bit_enums = {}
+			for addr, enum_name, members in BIT_ENUMS:
+				enum = add_enum(BADADDR, enum_name, 0)
 				bit_enums[addr] = enum
-				for bit, name in enumerate(reg['bits']):
-					if name:
-						add_enum_member(enum, prefix + str(name), bit, DEFMASK)
-
-		# fill all the register info in
-		for bank in range(6):
-			prefix = 'B%d:' % bank
-			for offset, reg in enumerate(REG_DEFS):
-				if reg and ('banks' not in reg or bank in reg['banks']):
-					ea = self.ram_addr + (bank * 0x100) + offset
-					MakeByte(ea)
-					MakeName(ea, prefix + str(reg['name']))
-					set_cmt(ea, str(reg['comment']), True)
-
-					if offset in bit_enums:
-						self.helper.altset_ea(ea, bit_enums[offset], self.bitfield_enum_tag)
-
-		# name the interrupts
-		MakeName(0, 'ResetVector')
-		MakeName(4, 'Interrupt_INT0_Pin')
-		MakeName(8, 'Interrupt_INT1_Pin')
-		MakeName(0xC, 'Interrupt_USB')
-		MakeName(0x10, 'Interrupt_MFunct0')
-		MakeName(0x14, 'Interrupt_MFunct1')
-		MakeName(0x18, 'Interrupt_MFunct2')
-		MakeName(0x1C, 'Interrupt_MFunct3')
-		MakeName(0x20, 'Interrupt_SIM')
-		MakeName(0x24, 'Interrupt_SPIA')
-		MakeName(0x28, 'Interrupt_LVD')
+				for bit, name in members:
+					add_enum_member(enum, name, bit, DEFMASK)
+
+			# fill all the register info in
+			ram_addr = self.ram_addr
+			helper = self.helper
+			tag = self.bitfield_enum_tag
+			for offset, name, comment in BANK_NAMES:
+				ea = ram_addr + offset
+				create_byte(ea, 1)
+				set_name(ea, name, SN_CHECK | SN_NOWARN)
+				set_cmt(ea, comment, True)
+
+				enum = bit_enums.get(offset & 0xFF)
+				if enum is not None:
+					helper.altset_ea(ea, enum, tag)
+
+			# name the interrupts
+			for ea, name in VECTORS:
+				set_name(ea, name, SN_CHECK | SN_NOWARN)
+
+			# pick up names carried over from another firmware release
+			# by ht68match.py, if there's a <image>.names file
+			names_path = os.path.splitext(get_input_file_path())[0] + '.names'
+			if os.path.exists(names_path):
+				for ea, name in read_names(names_path):
+					set_name(ea, name, SN_CHECK | SN_NOWARN)
+		finally:
+			enable_auto(was_enabled)
 
 
 	def notify_init(self, idp_file):
@@ -324,23 +235,67 @@ class HoltekProcessor(processor_t):
 		self.helper.create('$ holtek')
 		self.bitfield_enum_tag = 'b'
 
+		# ea -> (opcode, itype, operand value), so that ana, emu and
+		# the jump table code only ever decode each word once
+		self.decode_cache = {}
+		# words whose xrefs a pre-analysis already added, so notify_emu
+		# can skip them the first time round
+		self.prepared_code = set()
+		self.bank_refs_current = False
+		self.decode_cache_hooks = DecodeCacheHooks(self)
+		self.decode_cache_hooks.hook()
+		self.bank_analysis_hooks = BankAnalysisHooks(self)
+		self.bank_analysis_hooks.hook()
+
+
+	def notify_term(self):
+		self.decode_cache_hooks.unhook()
+		self.bank_analysis_hooks.unhook()
+		self.decode_cache = {}
+
 
 	def notify_newfile(self, fname):
 		print('NewFile: %s' % fname)
+		self.decode_cache = {}
 		self._ensure_ram_segment_exists()
+		self._apply_preanalysis()
 
 
 	def notify_oldfile(self, fname):
 		print('OldFile: %s' % fname)
+		self.decode_cache = {}
 		self._ensure_ram_segment_exists()
 
 
+	def _decode_at(self, ea):
+		try:
+			return self.decode_cache[ea]
+		except KeyError:
+			pass
+		if not is_mapped(ea):
+			return None
+		opcode = get_wide_byte(ea)
+		itype, value = decode(opcode)
+		entry = (opcode, itype, value)
+		self.decode_cache[ea] = entry
+		return entry
+
+
+	def _opcode_at(self, ea):
+		entry = self._decode_at(ea)
+		if entry is None:
+			return None
+		return entry[0]
+
+
 	def notify_ana(self, insn):
 		# Decode this instruction
-		opcode = get_wide_byte(insn.ea)
+		entry = self._decode_at(insn.ea)
 		insn.size = 1
+		if entry is None:
+			return 0
 
-		itype = get_itype_for_opcode(opcode)
+		opcode, itype, value = entry
 		if itype is None:
 			return 0
 
@@ -363,25 +318,25 @@ class HoltekProcessor(processor_t):
 		if htop == HTOP_DATA or htop == HTOP_DATA_A:
 			insn.Op1.type = o_mem
 			insn.Op1.dtype = dt_byte
-			insn.Op1.addr = self.ram_addr + get_opvalue_for_opcode(itype, opcode)
+			insn.Op1.addr = self.ram_addr + value
 
 		# load [m] into Op2 for A,[m]
 		if htop == HTOP_A_DATA:
 			insn.Op2.type = o_mem
 			insn.Op2.dtype = dt_byte
-			insn.Op2.addr = self.ram_addr + get_opvalue_for_opcode(itype, opcode)
+			insn.Op2.addr = self.ram_addr + value
 
 		# other cases!
 		if htop == HTOP_A_IMM:
 			insn.Op2.type = o_imm
 			insn.Op2.dtype = dt_byte
-			insn.Op2.value = get_opvalue_for_opcode(itype, opcode)
+			insn.Op2.value = value
 		elif htop == HTOP_ADDR:
 			insn.Op1.type = o_near
 			insn.Op1.dtype = dt_byte
-			insn.Op1.addr = get_opvalue_for_opcode(itype, opcode)
+			insn.Op1.addr = value
 		elif htop == HTOP_BIT:
-			addr, bit = get_opvalue_for_opcode(itype, opcode)
+			addr, bit = value
 			insn.Op1.type = o_mem
 			insn.Op1.dtype = dt_byte
 			insn.Op1.addr = self.ram_addr + addr
@@ -397,7 +352,7 @@ class HoltekProcessor(processor_t):
 		# this is a jump into a jump table, starting right after!
 		# determine how big it is
 		jt_start = insn.ea + 1
-		jt_end = guess_jump_table_end(jt_start)
+		jt_end = guess_jump_table_end(jt_start, self._opcode_at)
 
 		named_targets = {}
 
@@ -408,10 +363,8 @@ class HoltekProcessor(processor_t):
 
 			# diversion: if the jump is itself a branch, then we should
 			# name its target, too!
-			entry_op = get_wide_byte(entry_ea)
-			entry_itype = get_itype_for_opcode(entry_op)
+			entry_op, entry_itype, jt_target = self._decode_at(entry_ea)
 			if entry_itype == itypes.i_jmp:
-				jt_target = get_opvalue_for_opcode(entry_itype, entry_op)
 				try:
 					named_targets[jt_target].append(entry_index)
 				except KeyError:
@@ -423,6 +376,136 @@ class HoltekProcessor(processor_t):
 			MakeName(target, 'jtbl_%04X_case_target_%s' % (insn.ea, index_strs))
 
 
+	def _read_opcodes(self):
+		# the whole program image, as it is in the database
+		opcodes = []
+		ea = 0
+		while ea < self.ram_addr:
+			opcode = self._opcode_at(ea)
+			if opcode is None:
+				break
+			opcodes.append(opcode)
+			ea += 1
+		return opcodes
+
+
+	def _add_data_refs(self, ea, target, reads, writes):
+		if reads:
+			add_dref(ea, target, dr_R)
+		if writes:
+			add_dref(ea, target, dr_W)
+
+
+	def _apply_bank_analysis(self):
+		# the operands themselves always name bank 0 (and IAR0/IAR1
+		# for indirect accesses), so add data xrefs to wherever
+		# ht68banks could work out that the access really goes. That
+		# only depends on the bytes, so it's done again after a patch
+		if self.bank_refs_current:
+			return
+		opcodes = self._read_opcodes()
+		if not opcodes:
+			return
+
+		ram_size = 0x100 * BANK_COUNT
+		banks = BankAnalysis(FlowGraph(opcodes))
+		for ea, phys in banks.accesses.items():
+			if phys < ram_size:
+				mem, bit, reads, writes = memory_access(opcodes[ea])
+				self._add_data_refs(ea, self.ram_addr + phys, reads, writes)
+		self.bank_refs_current = True
+
+
+	def _find_preanalysis(self, opcodes):
+		# what ht68prep.py wrote for this image: next to the input file,
+		# or named after its sha1 in the HT68_PREP_CACHE directory
+		digest = hashlib.sha1(struct.pack('<%dH' % len(opcodes), *opcodes)).hexdigest()
+		paths = [os.path.splitext(get_input_file_path())[0] + PREP_EXTENSION]
+		cache_dir = os.environ.get(PREP_CACHE_ENV)
+		if cache_dir:
+			paths.append(os.path.join(cache_dir, digest + PREP_EXTENSION))
+		for path in paths:
+			if not os.path.exists(path):
+				continue
+			try:
+				with open(path, 'r') as f:
+					prep = json.load(f)
+			except ValueError:
+				print('Ignoring unreadable pre-analysis %s' % path)
+				continue
+			if prep.get('version') == PREP_VERSION and prep.get('sha1') == digest:
+				return path, prep
+		return None, None
+
+
+	def _apply_preanalysis(self):
+		# everything auto-analysis would find through ana/emu, applied
+		# in one go, with auto-analysis held off like in _prepare_db
+		opcodes = self._read_opcodes()
+		path, prep = self._find_preanalysis(opcodes)
+		if prep is None:
+			return
+		print('Applying pre-analysis from %s' % path)
+
+		ram_addr = self.ram_addr
+		ram_size = 0x100 * BANK_COUNT
+		jump_tables = set(addr for addr, first, last in prep['jump_tables'])
+		was_enabled = enable_auto(False)
+		try:
+			code = []
+			for start, end in prep['code']:
+				code.extend(xrange(start, end))
+			self.prepared_code = set(code)
+			for ea in code:
+				create_insn(ea)
+
+			# the flow notify_emu would add
+			for ea in code:
+				kind = FLOW_KINDS[ITYPE_TABLE[opcodes[ea]]]
+				if kind == FLOW_SKIP:
+					add_cref(ea, ea + 1, fl_F)
+					add_cref(ea, ea + 2, fl_JN)
+				elif kind == FLOW_NEXT or kind == FLOW_CALL or (kind == FLOW_ADDM and ea not in jump_tables):
+					add_cref(ea, ea + 1, fl_F)
+			for ea, target, kind in prep['code_refs']:
+				add_cref(ea, target, fl_CN if kind == 'call' else fl_JN)
+
+			for ea, mem, bit, access in prep['data_refs']:
+				self._add_data_refs(ea, ram_addr + mem, access & 1, access & 2)
+			for ea, phys, access in prep['bank_refs']:
+				if phys < ram_size:
+					self._add_data_refs(ea, ram_addr + phys, access & 1, access & 2)
+			self.bank_refs_current = True
+
+			enums = {}
+			for mem, bits in prep['bit_enums']:
+				for bit in bits:
+					enums[mem] = self._bit_enum(ram_addr + mem, bit)
+			for ea, mem, bit, access in prep['data_refs']:
+				if bit is not None:
+					op_enum(ea, 1, enums[mem], 0)
+
+			for ea, name in prep['names']:
+				set_name(ea, name, SN_CHECK | SN_NOWARN)
+			for ea in prep['functions']:
+				add_func(ea, BADADDR)
+		finally:
+			enable_auto(was_enabled)
+
+
+	def _bit_enum(self, enum_addr, bit):
+		# the enum for bits of the register at enum_addr, with a member
+		# for bit
+		enum_id = self.helper.altval_ea(enum_addr, self.bitfield_enum_tag)
+		if enum_id == 0:
+			enum_id = add_enum(BADADDR, 'bit_%03X' % (enum_addr - self.ram_addr), 0)
+			self.helper.altset_ea(enum_addr, enum_id, self.bitfield_enum_tag)
+		member_id = get_enum_member(enum_id, bit, 0, DEFMASK)
+		if member_id == BADADDR:
+			add_enum_member(enum_id, 'b%03X:%d' % (enum_addr - self.ram_addr, bit), bit, DEFMASK)
+		return enum_id
+
+
 	def _poke_operand(self, insn, op, read_flag, write_flag):
 		if op.type == o_mem:
 			if read_flag != 0:
@@ -434,34 +517,31 @@ class HoltekProcessor(processor_t):
 			# make this an enum, if we can
 			# TODO: ignore some like ACC maybe?
 			# maybe also make sure we don't overwrite existing op_enums
-			bit = op.value
-			enum_addr = insn.Op1.addr
-			enum_id = self.helper.altval_ea(enum_addr, self.bitfield_enum_tag)
-			if enum_id == 0:
-				enum_id = add_enum(BADADDR, 'bit_%03X' % (enum_addr - self.ram_addr), 0)
-				self.helper.altset_ea(enum_addr, enum_id, self.bitfield_enum_tag)
-			member_id = get_enum_member(enum_id, bit, 0, DEFMASK)
-			if member_id == BADADDR:
-				add_enum_member(enum_id, 'b%03X:%d' % (enum_addr - self.ram_addr, bit), bit, DEFMASK)
+			enum_id = self._bit_enum(insn.Op1.addr, op.value)
 			op_enum(insn.ea, 1, enum_id, 0)
 
 
-	SKIP_ITYPES = set((itypes.i_sza, itypes.i_sz, itypes.i_siza, itypes.i_siz, itypes.i_sdza, itypes.i_sdz, itypes.i_snz_bit, itypes.i_sz_bit))
+	SKIP_ITYPES = SKIP_ITYPES
 
 	def notify_emu(self, insn):
+		# a pre-analysis already added this word's xrefs; only skip it
+		# once, so redefining it later gets the usual treatment
+		if insn.ea in self.prepared_code:
+			self.prepared_code.discard(insn.ea)
+			return 1
+
 		itype = insn.itype
 		feature = insn.get_canon_feature()
 
 		# for most instructions, we want to chain onto the next
 		flow = (feature & CF_STOP) == 0
 
+		# ana already decoded the destination for us
 		if itype == itypes.i_jmp:
-			dest = get_opvalue_for_opcode(itype, get_wide_byte(insn.ea))
-			add_cref(insn.ea, dest, fl_JN)
+			add_cref(insn.ea, insn.Op1.addr, fl_JN)
 			flow = False
 		elif itype == itypes.i_call:
-			dest = get_opvalue_for_opcode(itype, get_wide_byte(insn.ea))
-			add_cref(insn.ea, dest, fl_CN)
+			add_cref(insn.ea, insn.Op1.addr, fl_CN)
 
 		self._poke_operand(insn, insn.Op1, feature & CF_USE1, feature & CF_CHG1)
 		self._poke_operand(insn, insn.Op2, feature & CF_USE2, feature & CF_CHG2)